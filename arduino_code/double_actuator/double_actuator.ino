@@ -16,6 +16,65 @@ const int REV2    = 5;    // PWM pin
 float pos1_in = 0.0;  // estimated position of actuator 1 in inches (0 = fully retracted)
 float pos2_in = 0.0;  // estimated position of actuator 2 in inches
 
+// ===================== SETPOINT LINES =====================
+// Every motion command ends in one setpoint: "pos1,pos2,pos3[,time_s]", the
+// host's Setpoint.encode() of its three or four channels (pos3 is parsed but
+// not driven on this rig). A plain command moves in time_s, or at full speed
+// without it; a timed command takes its move time from dur_ms instead.
+// Lines are read whole, so an E-stop byte is never swallowed by a parser
+// waiting for a field that is not coming.
+
+// ===================== TIMED COMMAND QUEUE =====================
+// "@due_ms,dur_ms,<setpoint>" runs at millis() >= due_ms. The host
+// converts its master clock to ours using "P" -> "PONG <millis>" pings.
+//
+// "Kt_ms,dur_ms,<setpoint>" is a keyframe of a streamed sequence: t_ms
+// counts from the start of the stream, which the first keyframe anchors to
+// our clock (again after the queue ran dry). Keyframes and "F" are answered
+// with "F<free slots>" and "S<free slots>" is pushed whenever one starts, so
+// the host can keep the queue filled ahead of time. Keyframe moves run
+// quietly: at 9600 baud the usual chatter would crowd out those reports.
+const int TIMED_SLOTS = 32;  // ~0.6 KB of RAM
+struct TimedCommand {
+  unsigned long dueMs;
+  unsigned long durMs;
+  float target1;
+  float target2;
+  bool keyframe;
+};
+TimedCommand timedQueue[TIMED_SLOTS];
+int timedHead = 0;   // next to run
+int timedCount = 0;
+bool streaming = false;
+unsigned long streamOriginMs = 0;
+
+// ===================== NON-BLOCKING MOVES =====================
+// Queued commands start a move and return to loop(), so the host can keep
+// sending while the actuators run; serviceMove() stops them on time.
+bool moving = false;
+unsigned long moveStartMs = 0;
+unsigned long moveMs = 0;
+float moveTarget1 = 0.0;
+float moveTarget2 = 0.0;
+float moveSpeed1 = 0.0;
+float moveSpeed2 = 0.0;
+int moveDir1 = 0;
+int moveDir2 = 0;
+bool moveQuiet = false;
+
+// ===================== E-STOP =====================
+// A single '!' byte stops both actuators at once -- also in the middle of a
+// move -- drops queued timed commands and latches: motion commands are
+// refused until an "R" line re-arms the rig.
+const char ESTOP_BYTE = '!';
+bool estopped = false;
+
+// ===================== DELTA FRAMES =====================
+// "D<setpoint>" is the change against the previous command, field by field;
+// the host only sends one after that command was acknowledged.
+float lastCmd[4];
+bool haveBase = false;
+
 // ===================== BASIC MOTOR CONTROL HELPERS =====================
 void stopActuator1() {
   digitalWrite(ENABLE1, LOW);
@@ -85,7 +144,8 @@ void setup() {
 
   resetActuators();   // <<< run reset here
 
-  Serial.println("Ready for serial commands: pos1,pos2,time");
+  // The host waits for this line instead of sleeping through the reset.
+  Serial.println("READY double_actuator pos1,pos2,pos3[,time]");
 }
 void resetActuators() {
   Serial.println("Resetting actuators (full retract)…");
@@ -105,24 +165,248 @@ void resetActuators() {
 
   Serial.println("Reset complete. Both actuators set to 0 inches.");
 }
+// ===================== SERIAL HELPERS =====================
+void eatLine() {
+  while (Serial.available() > 0) {
+    char c = Serial.read();
+    if (c == '\n' || c == '\r') break;
+  }
+}
+
+void handlePing() {
+  eatLine();
+  Serial.print("PONG ");
+  Serial.println(millis());
+}
+
+// "I" -> "ID <sketch>": lets the host tell boards apart without moving them
+void handleIdentify() {
+  eatLine();
+  Serial.println("ID double_actuator");
+}
+
+bool estopRequested() {
+  return Serial.available() > 0 && Serial.peek() == ESTOP_BYTE;
+}
+
+void handleEstop() {
+  if (moving) {
+    finishMove(true);
+  }
+  stopActuator1();
+  stopActuator2();
+  while (Serial.available() > 0) Serial.read();  // drop anything behind it
+  timedHead = 0;
+  timedCount = 0;
+  streaming = false;
+  estopped = true;
+  Serial.println("STOPPED");
+}
+
+void handleResume() {
+  eatLine();
+  estopped = false;
+  Serial.println("RESUMED");
+}
+
+// Reads the rest of a command line; false (the rig stopped) if it held an E-stop byte.
+bool readLine(String &line) {
+  line = Serial.readStringUntil('\n');
+  if (line.indexOf(ESTOP_BYTE) >= 0) {
+    handleEstop();
+    return false;
+  }
+  line.trim();
+  return true;
+}
+
+// The comma-separated field of line at start; start moves past it.
+String nextField(const String &line, int &start) {
+  int comma = line.indexOf(',', start);
+  if (comma < 0) comma = line.length();
+  String field = line.substring(start, comma);
+  start = comma + 1;
+  return field;
+}
+
+// The three positions of a setpoint line at start; false if the line ends first.
+bool parseSetpoint(const String &line, int &start, float &target1, float &target2, float &target3) {
+  float vals[3];
+  for (int i = 0; i < 3; i++) {
+    if (start > (int)line.length()) return false;
+    vals[i] = nextField(line, start).toFloat();
+  }
+  target1 = vals[0];
+  target2 = vals[1];
+  target3 = vals[2];
+  return true;
+}
+
+void reportFree(char tag) {
+  Serial.print(tag);
+  Serial.println(TIMED_SLOTS - timedCount);
+}
+
+// Parses "<time>,dur_ms,<setpoint>" behind the '@'/'K'; false, with the
+// error printed, if the command cannot be queued.
+bool parseTimed(unsigned long &timeMs, unsigned long &durMs, float &target1, float &target2) {
+  Serial.read();  // '@' or 'K'
+  String line;
+  if (!readLine(line)) return false;
+  int start = 0;
+  timeMs = (unsigned long)nextField(line, start).toInt();
+  durMs = (unsigned long)nextField(line, start).toInt();
+  float target3;  // not driven on this rig; a time_s field is ignored, dur_ms is the move time
+  if (!parseSetpoint(line, start, target1, target2, target3)) {
+    Serial.println("ERR fields");
+    return false;
+  }
+
+  if (estopped) {
+    Serial.println("ERR estop");
+    return false;
+  }
+  if (timedCount >= TIMED_SLOTS) {
+    Serial.println("ERR queue full");
+    return false;
+  }
+  return true;
+}
+
+void queueTimed(unsigned long dueMs, unsigned long durMs, float target1, float target2, bool keyframe) {
+  int slot = (timedHead + timedCount) % TIMED_SLOTS;
+  timedQueue[slot].dueMs = dueMs;
+  timedQueue[slot].durMs = durMs;
+  timedQueue[slot].target1 = constrain(target1, 0.0, STROKE_IN);
+  timedQueue[slot].target2 = constrain(target2, 0.0, STROKE_IN);
+  timedQueue[slot].keyframe = keyframe;
+  timedCount++;
+}
+
+void handleTimedCommand() {
+  unsigned long dueMs, durMs;
+  float target1, target2;
+  if (!parseTimed(dueMs, durMs, target1, target2)) return;
+  queueTimed(dueMs, durMs, target1, target2, false);
+  Serial.println("OK");
+}
+
+void handleKeyframe() {
+  unsigned long tMs, durMs;
+  float target1, target2;
+  if (!parseTimed(tMs, durMs, target1, target2)) return;
+  if (!streaming) {
+    // first keyframe (or the first after an underrun) runs now
+    streamOriginMs = millis() - tMs;
+    streaming = true;
+  }
+  queueTimed(streamOriginMs + tMs, durMs, target1, target2, true);
+  reportFree('F');
+}
+
+void runDueTimedCommand() {
+  if (timedCount == 0) return;
+  TimedCommand cmd = timedQueue[timedHead];
+  if ((long)(millis() - cmd.dueMs) < 0) return;
+  timedHead = (timedHead + 1) % TIMED_SLOTS;
+  timedCount--;
+  float moveTime = cmd.durMs > 0 ? cmd.durMs / 1000.0 : 0.001;
+  startMove(cmd.target1, cmd.target2, moveTime, cmd.keyframe);
+  if (cmd.keyframe) {
+    reportFree('S');
+  } else {
+    Serial.print("RAN ");
+    Serial.println(cmd.dueMs);
+  }
+}
+
 // ===================== MAIN LOOP =====================
 void loop() {
+  serviceMove();
+  runDueTimedCommand();
+  if (streaming && timedCount == 0 && !moving) {
+    streaming = false;  // ran dry: the next keyframe re-anchors the stream
+  }
+
   if (Serial.available() > 0) {
-    // Parse 3 numbers: pos1, pos2, time
-    float target1 = Serial.parseFloat();   // actuator 1 target position (inches)
-    float target2 = Serial.parseFloat();   // actuator 2 target position (inches)
-    float target3 = Serial.parseFloat();
-    float moveTime = Serial.parseFloat();  // move time (seconds)
-
-    // optional: eat the rest of the line
-    while (Serial.available() > 0) {
-      char c = Serial.read();
-      if (c == '\n' || c == '\r') break;
+    char first = Serial.peek();
+    if (first == ESTOP_BYTE) {
+      handleEstop();
+      return;
+    }
+    if (first == 'R') {
+      handleResume();
+      return;
+    }
+    if (first == 'P') {
+      handlePing();
+      return;
+    }
+    if (first == 'I') {
+      handleIdentify();
+      return;
+    }
+    if (first == '@') {
+      handleTimedCommand();
+      return;
+    }
+    if (first == 'K') {
+      handleKeyframe();
+      return;
+    }
+    if (first == 'F') {
+      eatLine();
+      reportFree('F');
+      return;
+    }
+
+    bool isDelta = (first == 'D');
+    if (isDelta) {
+      Serial.read();  // 'D'
+    }
+
+    String line;
+    if (!readLine(line)) return;  // it held an E-stop byte
+    if (line.length() == 0) return;
+
+    // pos1, pos2 (inches), pos3, optional move time (seconds)
+    int start = 0;
+    float target1, target2, target3;
+    if (!parseSetpoint(line, start, target1, target2, target3)) {
+      Serial.println("ERR fields");
+      Serial.println("DONE");
+      return;
+    }
+    bool hasTime = start <= (int)line.length();
+    float moveTime = hasTime ? nextField(line, start).toFloat() : 0.0;
+
+    if (isDelta) {
+      if (!haveBase) {
+        Serial.println("ERR nobase");
+        Serial.println("DONE");
+        return;
+      }
+      target1 += lastCmd[0];
+      target2 += lastCmd[1];
+      target3 += lastCmd[2];
+      if (hasTime) moveTime += lastCmd[3];
+    }
+    lastCmd[0] = target1;
+    lastCmd[1] = target2;
+    lastCmd[2] = target3;
+    lastCmd[3] = moveTime;
+    haveBase = true;
+
+    if (estopped) {
+      Serial.println("ERR estop");
+      Serial.println("DONE");
+      return;
     }
 
     // Validate move time
-    if (moveTime <= 0) {
+    if (hasTime && moveTime <= 0) {
       Serial.println("Error: time must be > 0");
+      Serial.println("DONE");
       return;
     }
 
@@ -130,17 +414,30 @@ void loop() {
     target1 = constrain(target1, 0.0, STROKE_IN);
     target2 = constrain(target2, 0.0, STROKE_IN);
 
+    if (!hasTime) {
+      // no move time given: as fast as the longer travel allows
+      moveTime = max(fabs(target1 - pos1_in), fabs(target2 - pos2_in)) / MAX_SPEED_IPS;
+      if (moveTime <= 0) moveTime = 0.001;
+    }
+
     Serial.print("Command received: ");
     Serial.print(target1); Serial.print(" in, ");
     Serial.print(target2); Serial.print(" in, ");
     Serial.print(moveTime); Serial.println(" s");
 
     moveActuatorsToTargets(target1, target2, moveTime);
+    Serial.println("DONE");
   }
 }
 
-// ===================== MOTION FUNCTION =====================
-void moveActuatorsToTargets(float target1, float target2, float moveTime) {
+// ===================== MOTION FUNCTIONS =====================
+void startMove(float target1, float target2, float moveTime, bool quiet) {
+  if (moving) {
+    // the next queued command is due: take over.  A move cut short ends
+    // where the elapsed time got it, not at its target.
+    finishMove(millis() - moveStartMs < moveMs);
+  }
+
   // Compute distance to move
   float delta1 = target1 - pos1_in;
   float delta2 = target2 - pos2_in;
@@ -154,7 +451,7 @@ void moveActuatorsToTargets(float target1, float target2, float moveTime) {
 
   // If no movement requested, just stop
   if (dist1 == 0 && dist2 == 0) {
-    Serial.println("No movement required.");
+    if (!quiet) Serial.println("No movement required.");
     stopActuator1();
     stopActuator2();
     return;
@@ -177,7 +474,7 @@ void moveActuatorsToTargets(float target1, float target2, float moveTime) {
   int pwm2 = (int)pwm2f;
 
   // Check if we’re asking more than the actuator can physically do
-  if (reqSpeed1 > MAX_SPEED_IPS || reqSpeed2 > MAX_SPEED_IPS) {
+  if (!quiet && (reqSpeed1 > MAX_SPEED_IPS || reqSpeed2 > MAX_SPEED_IPS)) {
     Serial.println("Warning: requested move is faster than max speed.");
     Serial.println("Actuators will run at max speed and may not reach targets in the given time.");
   }
@@ -186,34 +483,65 @@ void moveActuatorsToTargets(float target1, float target2, float moveTime) {
   driveActuator1(dir1, pwm1);
   driveActuator2(dir2, pwm2);
 
-  // Block until moveTime has passed (simple version)
-  unsigned long ms = (unsigned long)(moveTime * 1000.0);
-  delay(ms);
+  moving = true;
+  moveStartMs = millis();
+  moveMs = (unsigned long)(moveTime * 1000.0);
+  moveTarget1 = target1;
+  moveTarget2 = target2;
+  moveSpeed1 = reqSpeed1;
+  moveSpeed2 = reqSpeed2;
+  moveDir1 = dir1;
+  moveDir2 = dir2;
+  moveQuiet = quiet;
+}
 
+void serviceMove() {
+  if (moving && millis() - moveStartMs >= moveMs) {
+    finishMove(false);
+  }
+}
+
+void finishMove(bool interrupted) {
   // Stop both actuators
   stopActuator1();
   stopActuator2();
+  moving = false;
+  float ranTime = interrupted ? (millis() - moveStartMs) / 1000.0 : moveMs / 1000.0;
 
   // Update our estimated positions
   // If speed was within range, assume we hit the target; otherwise approximate
-  if (reqSpeed1 <= MAX_SPEED_IPS) {
-    pos1_in = target1;
+  if (moveSpeed1 <= MAX_SPEED_IPS && !interrupted) {
+    pos1_in = moveTarget1;
   } else {
-    // moved ~MAX_SPEED_IPS * time in the desired direction
-    pos1_in += dir1 * MAX_SPEED_IPS * moveTime;
+    // moved ~speed * time in the desired direction
+    pos1_in += moveDir1 * min(moveSpeed1, MAX_SPEED_IPS) * ranTime;
     pos1_in = constrain(pos1_in, 0.0, STROKE_IN);
   }
 
-  if (reqSpeed2 <= MAX_SPEED_IPS) {
-    pos2_in = target2;
+  if (moveSpeed2 <= MAX_SPEED_IPS && !interrupted) {
+    pos2_in = moveTarget2;
   } else {
-    pos2_in += dir2 * MAX_SPEED_IPS * moveTime;
+    pos2_in += moveDir2 * min(moveSpeed2, MAX_SPEED_IPS) * ranTime;
     pos2_in = constrain(pos2_in, 0.0, STROKE_IN);
   }
 
+  if (moveQuiet) return;
   Serial.print("New estimated positions: A1 = ");
   Serial.print(pos1_in);
   Serial.print(" in, A2 = ");
   Serial.print(pos2_in);
   Serial.println(" in");
 }
+
+void moveActuatorsToTargets(float target1, float target2, float moveTime) {
+  startMove(target1, target2, moveTime, false);
+
+  // Block until moveTime has passed, but watch for an E-stop byte
+  while (moving) {
+    if (estopRequested()) {
+      handleEstop();
+      return;
+    }
+    serviceMove();
+  }
+}
@@ -31,6 +31,8 @@ except Exception as e:
 def parse_args(argv: list[str] | None = None):
     import argparse
 
+    from core.shm import DEFAULT_NAME as DEFAULT_SHM_NAME
+
     p = argparse.ArgumentParser(description="Motion Simulator UI")
     p.add_argument("--qss", type=str, default="../ui/styles.qss",
                    help="Path to a Qt stylesheet (.qss). Use empty string to skip.")
@@ -38,6 +40,47 @@ def parse_args(argv: list[str] | None = None):
                    help="Log level: DEBUG/INFO/WARNING/ERROR")
     p.add_argument("--title", type=str, default="Motion Simulator Control",
                    help="Main window title")
+    p.add_argument("--latency-dump", type=str, default="",
+                   help="Write latency histograms (JSON) to this path on exit.")
+    p.add_argument("--rigs", type=str, default="",
+                   help="Drive several rigs: comma-separated ports, or 'auto' for every detected Arduino.")
+    p.add_argument("--rig-config", type=str, default="",
+                   help="JSON file with per-rig port/name/offset/scale; overrides --rigs.")
+    p.add_argument("--udp-port", type=int, default=None,
+                   help="Accept streamed setpoints on this UDP port (see core/netinput.py).")
+    p.add_argument("--cueing-hz", type=float, default=None,
+                   help="UDP packets carry vehicle telemetry (ax,ay,az,p,q,r) sent at this rate, "
+                        "turned into platform angles by the washout filter (see core/cueing.py).")
+    p.add_argument("--shm", nargs="?", const=DEFAULT_SHM_NAME, default=None, metavar="NAME",
+                   help="Accept setpoints from processes on this host through a shared-memory ring "
+                        f"(default name {DEFAULT_SHM_NAME}; see core/shm.py).")
+    p.add_argument("--predict", action="store_true",
+                   help="Extrapolate live input (gamepad/UDP) ahead by the measured link latency.")
+    p.add_argument("--predict-horizon-ms", type=float, default=None,
+                   help="Fixed prediction horizon instead of the measured latency.")
+    p.add_argument("--max-vel", type=float, default=None,
+                   help="Setpoint velocity limit, deg/s (see core/limits.py).")
+    p.add_argument("--max-acc", type=float, default=None,
+                   help="Setpoint acceleration limit, deg/s^2.")
+    p.add_argument("--strict-limits", action="store_true",
+                   help="Refuse to start a sequence that breaks the motion limits "
+                        "instead of playing it clamped.")
+    p.add_argument("--replay", choices=("latest", "all"), default="latest",
+                   help="Commands re-sent after a serial reconnect: newest only, or all buffered.")
+    p.add_argument("--no-reset", action="store_true",
+                   help="Open serial ports with DTR low so (re)connecting does not reset the board.")
+    p.add_argument("--keepalive-ms", type=float, default=None,
+                   help="Repeat an unchanged setpoint at most this often (0 = send every one).")
+    p.add_argument("--delta", action="store_true",
+                   help="Send changed setpoints as D frames against the last acked one (see core/delta.py).")
+    p.add_argument("--stream-lead-ms", type=float, default=None,
+                   help="Keep this much of a sequence queued on the board as keyframes "
+                        "(0 = send one step at a time; see core/keyframes.py).")
+    p.add_argument("--sequences", type=str, default="",
+                   help="Directory of sequence CSVs for the preset buttons (default: src/sequences).")
+    p.add_argument("--crossfade-ms", type=float, default=None,
+                   help="Blend a sequence that takes over from another in over this long "
+                        "(0 = cut straight to its first row; see core/timescale.py).")
     return p.parse_args(argv or sys.argv[1:])
 
 
@@ -114,7 +157,41 @@ def main(argv: list[str] | None = None) -> int:
     try_apply_stylesheet(app, args.qss)
 
     # Create and show main window
-    win = MainWindow()
+    rig_configs = None
+    if args.rig_config:
+        from core.rigs import load_rig_configs
+        rig_configs = load_rig_configs(args.rig_config)
+    elif args.rigs:
+        from core.rigs import rig_configs_from_ports
+        rig_configs = rig_configs_from_ports(args.rigs)
+
+    limits = None
+    if args.max_vel is not None or args.max_acc is not None:
+        from core.limits import MotionLimits
+        defaults = MotionLimits()
+        limits = MotionLimits(
+            max_vel=args.max_vel if args.max_vel is not None else defaults.max_vel,
+            max_acc=args.max_acc if args.max_acc is not None else defaults.max_acc,
+        )
+
+    win = MainWindow(
+        latency_dump=Path(args.latency_dump) if args.latency_dump else None,
+        rig_configs=rig_configs,
+        udp_port=args.udp_port,
+        cueing_hz=args.cueing_hz,
+        shm_name=args.shm,
+        predict=args.predict,
+        predict_horizon_s=(args.predict_horizon_ms / 1000.0) if args.predict_horizon_ms is not None else None,
+        limits=limits,
+        replay_policy=args.replay,
+        reset_on_connect=not args.no_reset,
+        keepalive_s=args.keepalive_ms / 1000.0 if args.keepalive_ms is not None else None,
+        delta=args.delta,
+        stream_lead_s=args.stream_lead_ms / 1000.0 if args.stream_lead_ms is not None else None,
+        sequence_dir=Path(args.sequences) if args.sequences else None,
+        crossfade_s=args.crossfade_ms / 1000.0 if args.crossfade_ms is not None else None,
+        strict_limits=args.strict_limits,
+    )
     win.setWindowTitle(args.title)
     win.show()
 
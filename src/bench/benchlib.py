@@ -0,0 +1,57 @@
+# bench/benchlib.py
+"""Plumbing shared by the bench scripts.
+
+Every bench runs as a plain script from src/ (``python bench/x_bench.py``),
+so bench/ is already on sys.path and ``import benchlib`` works; importing it
+puts src/ there as well, for the ``core`` and ``widgets`` imports that follow.
+
+  parser()      -- argparse parser with the common ``--json`` option
+  add_json()    -- the same option on a subcommand parser
+  percentile()  -- nearest-rank percentile of some samples
+  finish()      -- print the failures, write the results, return the exit code
+
+Pass/fail limits belong in each bench, next to the requirement they come
+from (a firmware constant, a row dt, the link's bit time), not here.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+from typing import Iterable, Sequence
+
+APP_ROOT = Path(__file__).resolve().parent.parent
+if str(APP_ROOT) not in sys.path:
+    sys.path.insert(0, str(APP_ROOT))
+
+
+def add_json(p: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    p.add_argument("--json", type=str, default="", help="Write results as JSON to this path")
+    return p
+
+
+def parser(description: str) -> argparse.ArgumentParser:
+    """Argument parser for a bench; ``--json`` is already on it."""
+    return add_json(argparse.ArgumentParser(description=description))
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile (``pct`` in 0..100); 0.0 for no samples."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(math.ceil(len(ordered) * pct / 100.0)) - 1))
+    return ordered[idx]
+
+
+def finish(failures: Iterable[str], results, json_path: str = "") -> int:
+    """Report the run: one FAIL line per failure, results to ``json_path``; 1 if anything failed."""
+    failures = list(failures)
+    for failure in failures:
+        print(f"  FAIL {failure}")
+    if json_path:
+        Path(json_path).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 1 if failures else 0
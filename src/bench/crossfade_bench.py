@@ -0,0 +1,167 @@
+# bench/crossfade_bench.py
+"""Handoff between two sequences: cut vs crossfade.
+
+Ride A hovers around ``--from-in`` inches, ride B starts at ``--to-in``.
+Both play in real time through PlaybackEngine (capped at the firmware's
+MAX_SPEED_IPS) and SequenceWorker, with B either queued behind A or
+played over it halfway through.  The same handoffs then run on GUI rides
+of pitch/roll degrees, ``--from-deg`` to ``--to-deg``, through an engine
+left at its default cap (MotionLimits.max_vel).  For each handoff the
+steps actually sent are recorded and reported:
+
+  peak   -- fastest step (units/s) between A's last step and the end of
+            the fade; with the fade it must stay under the cap itself
+  start  -- time from play() to B's first step; the blend is computed as
+            the player asks for it, so B must not start later than A's next
+            row would have gone out (one row dt, or ``--max-start-ms``)
+  window -- wall time until B's own rows come out unmixed; on the degree
+            rides it must stay within what the cap asks for (``--fade-ms``,
+            or the jump at 2/3 of max_vel)
+
+A handoff over the speed limit with the fade on, a fade stretched past
+its window, or a slow start prints FAIL and exits 1.
+
+Example (from src/):
+    python bench/crossfade_bench.py --fade-ms 1000
+"""
+
+from __future__ import annotations
+
+import math
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import benchlib  # puts src/ on sys.path
+
+from PySide6.QtCore import Qt
+
+from core.limits import MAX_SPEED_IPS, MotionLimits
+from core.playback import PlaybackEngine
+from core.sequence import SequenceWorker
+
+CHANNELS = 4  # pos1, pos2, pos3, move time: the double_actuator line
+DEG_CHANNELS = 3  # pitch, roll, yaw: what the GUI plays
+ROW_DT = 0.05
+RIDE_IPS = 0.3  # the inch rides' own peak speed
+RIDE_DPS = 3.0  # the degree rides'
+
+
+def parse_args(argv: list[str] | None = None):
+    p = benchlib.parser("Sequence crossfade benchmark")
+    p.add_argument("--rows", type=int, default=120)
+    p.add_argument("--from-in", type=float, default=3.0)
+    p.add_argument("--to-in", type=float, default=9.0)
+    p.add_argument("--from-deg", type=float, default=25.0)
+    p.add_argument("--to-deg", type=float, default=-25.0)
+    p.add_argument("--fade-ms", type=float, default=1000.0)
+    p.add_argument("--max-start-ms", type=float, default=None, help="Default: one row dt")
+    return p.parse_args(argv)
+
+
+def write_csv(path: Path, rows: int, center: float, speed: float = RIDE_IPS) -> Path:
+    with path.open("w", encoding="utf-8") as f:
+        f.write("pos1,pos2,pos3,time\n")
+        for i in range(rows):
+            t = i * ROW_DT
+            f.write(f"{center + speed * math.sin(t):.4f},{center - speed * math.sin(t):.4f},0,{ROW_DT}\n")
+    return path
+
+
+class _Recorder:
+    """Steps as the player sends them, each with the dt it was given."""
+
+    def __init__(self):
+        self.steps = []  # (run, setpoint, dt, perf_counter)
+        self._dts = {}
+        self.run = 0
+
+    def wrap(self, pairs, run):
+        for setpoint, dt in pairs:
+            self._dts[id(setpoint)] = dt
+            yield setpoint, dt
+
+    def hit(self, setpoint, run):
+        self.steps.append((run, list(setpoint), self._dts.pop(id(setpoint), 0.0), time.perf_counter()))
+
+
+def handoff(a: Path, b: Path, rows: int, fade_s: float, interrupt: bool,
+            channels: int = CHANNELS, **engine_kwargs) -> dict:
+    rec = _Recorder()
+
+    def make_player(path, pairs, t0):
+        rec.run += 1
+        worker = SequenceWorker(str(path), rows=rec.wrap(pairs, rec.run))
+        worker.stepEmitted.connect(lambda sp, run=rec.run: rec.hit(sp, run), Qt.DirectConnection)
+        return worker
+
+    done = threading.Event()
+    engine = PlaybackEngine(make_player, channels=channels, fade_s=fade_s, **engine_kwargs)
+    engine.idle.connect(done.set, Qt.DirectConnection)
+    engine.start()
+    engine.load(a, ROW_DT).result()
+    engine.load(b, ROW_DT).result()
+    engine.play(a, ROW_DT)
+    if interrupt:
+        time.sleep(0.5 * rows * ROW_DT)
+        t_play = time.perf_counter()
+        engine.play(b, ROW_DT)
+    else:
+        engine.queue_next(b, ROW_DT)
+    done.wait(60.0)
+    engine.stop()
+
+    first_b = next(i for i, s in enumerate(rec.steps) if s[0] == 2)
+    start_ms = (rec.steps[first_b][3] - t_play) * 1000.0 if interrupt else 0.0
+    peak, window = 0.0, 0.0
+    b_rows = [list(map(float, line.split(",")[:channels])) for line in b.read_text().splitlines()[1:]]
+    for i in range(first_b - 1, len(rec.steps) - 1):
+        _, x, dt, _ = rec.steps[i]
+        _, y, _, _ = rec.steps[i + 1]
+        if dt > 0:
+            peak = max(peak, max(abs(q - p) for p, q in zip(x[:2], y[:2])) / dt)
+        j = i + 1 - first_b
+        if j < len(b_rows) and abs(y[0] - b_rows[j][0]) > 1e-9:
+            window = rec.steps[i + 1][3] - rec.steps[first_b][3]
+    return {"peak": peak, "start_ms": start_ms, "window_s": window, "steps": len(rec.steps)}
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    failures = []
+    results = {}
+    fade_s = args.fade_ms / 1000.0
+    max_start_ms = ROW_DT * 1000.0 if args.max_start_ms is None else args.max_start_ms
+    # the fade's smoothstep peaks at 1.5x its mean speed, so a jump stretches the window
+    deg_window = max(fade_s, 1.5 * abs(args.to_deg - args.from_deg) / MotionLimits.max_vel)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        rides = {
+            # units: (a, b, channels, engine kwargs, peak limit, window limit)
+            "in": (write_csv(tmp / "a.csv", args.rows, args.from_in), write_csv(tmp / "b.csv", args.rows, args.to_in),
+                   CHANNELS, {"max_vel": MAX_SPEED_IPS}, MAX_SPEED_IPS, None),
+            "deg": (write_csv(tmp / "a_deg.csv", args.rows, args.from_deg, RIDE_DPS),
+                    write_csv(tmp / "b_deg.csv", args.rows, args.to_deg, RIDE_DPS),
+                    DEG_CHANNELS, {}, MotionLimits.max_vel, deg_window + 2 * ROW_DT),
+        }
+        for units, (a, b, channels, kwargs, limit, max_window) in rides.items():
+            for mode, interrupt in (("queued", False), ("played over", True)):
+                for name, fade in (("cut", 0.0), ("crossfade", fade_s)):
+                    r = handoff(a, b, args.rows, fade, interrupt, channels, **kwargs)
+                    results[f"{units}/{mode}/{name}"] = r
+                    print(f"{units:<4} {mode:<12} {name:<10} peak={r['peak']:7.2f} {units}/s "
+                          f"window={r['window_s']:5.2f} s start={r['start_ms']:5.2f} ms steps={r['steps']}")
+                    if name == "crossfade" and r["peak"] > limit * (1 + 1e-9):  # float rounding only
+                        failures.append(f"{units} {mode}: crossfade peak {r['peak']:.2f}/s > {limit:.2f}")
+                    if name == "crossfade" and max_window is not None and r["window_s"] > max_window:
+                        failures.append(f"{units} {mode}: crossfade took {r['window_s']:.2f} s, "
+                                        f"expected at most {max_window:.2f}")
+                    if r["start_ms"] > max_start_ms:
+                        failures.append(f"{units} {mode}/{name}: next sequence started after "
+                                        f"{r['start_ms']:.2f} ms")
+    return benchlib.finish(failures, results, args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,150 @@
+# bench/cueing_bench.py
+"""Washout motion cueing: streaming vs whole-log, and the cues it makes.
+
+A synthetic ``--seconds`` log at ``--rate-hz`` (a sustained launch, a
+slalom with sensor noise, a pitch-rate pulse and a slow yaw) is run
+through core.cueing both ways and reported:
+
+  stream   -- WashoutFilter.step() per sample: p50/p99 cost; a live source
+              needs p99 within one sample period (``--max-step-us``)
+  log      -- cue_log() over the whole log (SciPy lfilter when installed),
+              samples/s against the streaming loop; the two outputs must
+              agree to 1e-9
+  cues     -- sustained tilt against asin(a/g) (to the wire's 1-degree
+              resolution), the output rate and acceleration against their
+              limits, and the pitch-rate pulse washed back out as fast as
+              the rotational high-pass's own decay allows
+  udp      -- the same log as telemetry packets through NetInputWorker on
+              localhost; the last delivered setpoint must match the
+              filter's (no sample skipped by the filter)
+
+A mismatch, a rate over its limit or a slow step prints FAIL and exits 1.
+
+Example (from src/):
+    python bench/cueing_bench.py --seconds 60 --rate-hz 100
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import socket
+import threading
+import time
+
+import benchlib  # puts src/ on sys.path
+
+from core.cueing import G, CueingParams, WashoutFilter, cue_log, lfilter
+from core.netinput import NetInputWorker, encode_packet
+
+LAUNCH = (1.0, 10.0, 3.0)  # start s, end s, m/s^2
+PULSE = (12.0, 13.0, 0.3)  # start s, end s, rad/s of pitch rate
+
+
+def parse_args(argv: list[str] | None = None):
+    p = benchlib.parser("Motion cueing benchmark")
+    p.add_argument("--seconds", type=float, default=60.0)
+    p.add_argument("--rate-hz", type=float, default=100.0)
+    p.add_argument("--max-step-us", type=float, default=None, help="Default: one sample period")
+    return p.parse_args(argv)
+
+
+def make_log(seconds: float, rate_hz: float) -> list:
+    rng = random.Random(7)
+    log = []
+    for i in range(int(seconds * rate_hz)):
+        t = i / rate_hz
+        ax = LAUNCH[2] if LAUNCH[0] <= t < LAUNCH[1] else 0.0
+        ay = 2.0 * math.sin(0.5 * t) + rng.gauss(0.0, 0.2) if t >= 20.0 else 0.0
+        q = PULSE[2] if PULSE[0] <= t < PULSE[1] else 0.0
+        log.append((ax, ay, 0.0, 0.0, q, 0.1 * math.sin(0.2 * t)))
+    return log
+
+
+def bench_udp(log, rate_hz: float, expected) -> bool:
+    got = []
+    worker = NetInputWorker(got.append, host="127.0.0.1", port=0, cueing=WashoutFilter(rate_hz))
+    worker.bind()
+    thread = threading.Thread(target=worker.start, daemon=True)
+    thread.start()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    addr = ("127.0.0.1", worker.address[1])
+    for seq, sample in enumerate(log):
+        sock.sendto(encode_packet(seq, sample), addr)
+        if seq % 10 == 0:
+            time.sleep(0.001)  # paced (a real sender streams at rate_hz); a burst overflows the socket
+    deadline = time.monotonic() + 5.0
+    while worker.received < len(log) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.2)
+    worker.stop()
+    thread.join(1.0)
+    sock.close()
+    match = bool(got) and all(abs(a - b) < 1e-3 for a, b in zip(got[-1], expected))  # float32 wire
+    print(f"udp    received={worker.received}/{len(log)} delivered={worker.delivered} "
+          f"last matches the filter: {match}")
+    return match and worker.received == len(log)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    failures = []
+    rate = args.rate_hz
+    params = CueingParams()
+    max_step_us = 1e6 / rate if args.max_step_us is None else args.max_step_us
+    log = make_log(args.seconds, rate)
+
+    filt = WashoutFilter(rate, params)
+    costs, live = [], []
+    t_all = time.perf_counter()
+    for sample in log:
+        t0 = time.perf_counter()
+        live.append(filt.step(sample))
+        costs.append((time.perf_counter() - t0) * 1e6)
+    stream_s = time.perf_counter() - t_all
+    p99 = benchlib.percentile(costs, 99)
+    print(f"stream n={len(log)} p50/p99 = {benchlib.percentile(costs, 50):.1f}/{p99:.1f} us/sample "
+          f"({len(log) / stream_s:,.0f} samples/s)")
+    if p99 > max_step_us:
+        failures.append(f"step p99={p99:.1f} us > {max_step_us:.1f}")
+
+    t0 = time.perf_counter()
+    offline, dts = cue_log(log, rate, params)
+    log_s = time.perf_counter() - t0
+    diff = max(abs(a - b) for x, y in zip(live, offline) for a, b in zip(x, y))
+    print(f"log    {len(log) / log_s:,.0f} samples/s (x{stream_s / log_s:.1f} the stream loop, "
+          f"{'scipy' if lfilter is not None else 'no scipy'}) max diff vs stream={diff:.2e}")
+    if diff > 1e-9 or len(offline) != len(log):
+        failures.append(f"cue_log differs from the streaming filter by {diff:.2e}")
+
+    i_end = int(LAUNCH[1] * rate) - 1
+    tilt = live[i_end][0]
+    want = min(params.max_angle_deg, math.degrees(math.asin(LAUNCH[2] / G)))
+    rates = [max(abs(b - a) for a, b in zip(x, y)) * rate for x, y in zip(live, live[1:])]
+    accs = [max(abs(c - 2 * b + a) for a, b, c in zip(x, y, z)) * rate * rate
+            for x, y, z in zip(live, live[1:], live[2:])]
+    leveled = abs(live[int((PULSE[1] + 6.0) * rate)][0])
+    # what a critically damped high-pass leaves of the pulse's whole angle 6 s on
+    w6 = params.rot_omega * 6.0
+    max_leveled = math.degrees(PULSE[2] * (PULSE[1] - PULSE[0])) * (1.0 + w6) * math.exp(-w6)
+    print(f"cues   sustained tilt {tilt:.2f} deg (asin(a/g) {want:.2f}) peak rate {max(rates):.1f} deg/s "
+          f"(max {params.max_rate_dps:g}) peak acc {max(accs):.0f} deg/s^2 (max {params.max_acc_dps2:g}) "
+          f"pitch 6 s after the pulse {leveled:.2f} deg")
+    if abs(tilt - want) >= 1.0:  # Setpoint.encode() sends whole degrees
+        failures.append(f"sustained tilt {tilt:.2f} deg, expected {want:.2f}")
+    if max(rates) > params.max_rate_dps + 1e-6:
+        failures.append(f"output rate {max(rates):.1f} deg/s > {params.max_rate_dps}")
+    if max(accs) > params.max_acc_dps2 + 1e-3:
+        failures.append(f"output acceleration {max(accs):.0f} deg/s^2 > {params.max_acc_dps2}")
+    if leveled > max_leveled:
+        failures.append(f"pitch {leveled:.2f} deg 6 s after the rate pulse (> {max_leveled:.2f}); no washout")
+
+    if not bench_udp(log, rate, live[-1]):
+        failures.append("UDP telemetry path lost samples or disagrees with the filter")
+
+    return benchlib.finish(failures, {"step_us": costs, "stream_s": stream_s, "log_s": log_s,
+                                      "max_diff": diff}, args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
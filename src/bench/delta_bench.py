@@ -0,0 +1,131 @@
+# bench/delta_bench.py
+"""Link traffic with and without change suppression / delta frames.
+
+Streams ``--rate`` setpoints per second through ArduinoWorker to a virtual
+arduino board for each workload:
+
+  idle   -- the stick at rest: the same setpoint every frame
+  drift  -- slow motion: small changes on every channel
+
+and each encoder mode:
+
+  off      -- every setpoint written (keepalive 0)
+  suppress -- unchanged wire values suppressed, keepalive ``--keepalive-ms``
+  delta    -- suppression plus D frames against the last acked command
+
+Reports lines and bytes written to the board and checks that the board
+ended on the last setpoint sent -- a delta frame applied to the wrong base
+would show up here.  With suppression on, the board may see no more lines
+than there were distinct wire values plus one keepalive per
+``--keepalive-ms``; delta frames must not cost more bytes than plain
+suppression.  Any of these prints FAIL (exit 1).
+
+Example (from src/):
+    python bench/delta_bench.py --seconds 3
+"""
+
+from __future__ import annotations
+
+import math
+import time
+
+import benchlib  # puts src/ on sys.path
+
+from core.arduino import ArduinoWorker
+from core.setpoint import Setpoint
+from core.sim import sim_factory
+
+MODES = {
+    "off": {"keepalive_s": 0.0, "delta": False},
+    "suppress": {"delta": False},
+    "delta": {"delta": True},
+}
+
+
+def parse_args(argv: list[str] | None = None):
+    p = benchlib.parser("Change suppression / delta frame benchmark")
+    p.add_argument("--rate", type=float, default=60.0)
+    p.add_argument("--seconds", type=float, default=3.0)
+    p.add_argument("--keepalive-ms", type=float, default=1000.0)
+    return p.parse_args(argv)
+
+
+def setpoint_at(workload: str, t: float) -> Setpoint:
+    if workload == "idle":
+        return Setpoint.of(0.0, 0.0, 0.0)
+    return Setpoint.of(20.0 * math.sin(0.8 * t), 12.0 * math.sin(0.5 * t + 1.0), 8.0 * math.cos(0.3 * t))
+
+
+def run(workload: str, mode: str, args) -> dict:
+    factory = sim_factory("arduino", ack="OK", motion_scale=0.0)
+    kwargs = dict(MODES[mode])
+    kwargs.setdefault("keepalive_s", args.keepalive_ms / 1000.0)
+    worker = ArduinoWorker(preferred_port="SIM0", serial_factory=factory, **kwargs)
+    worker.start()
+    fw = factory.boards["SIM0"]
+    bytes0, lines0 = fw.rx_bytes, len(fw.commands)
+
+    total = int(args.rate * args.seconds)
+    t0 = time.monotonic()
+    last = None
+    values = 0  # distinct wire values in a row: the lines suppression has to let through
+    for i in range(total):
+        target = t0 + i / args.rate
+        now = time.monotonic()
+        if target > now:
+            time.sleep(target - now)
+        sp = setpoint_at(workload, i / args.rate)
+        if last is None or sp.encode() != last.encode():
+            values += 1
+        last = sp
+        worker.send_setpoint(last)
+    deadline = time.monotonic() + 5.0
+    while worker._cmd_q.unfinished_tasks and worker._cmd_q.qsize() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    worker.stop()
+
+    want = tuple(int(v) for v in last)
+    got = fw.commands[-1] if fw.commands else None
+    enc = worker._encoder
+    return {
+        "workload": workload,
+        "mode": mode,
+        "offered": total,
+        "values": values,
+        "lines": len(fw.commands) - lines0,
+        "bytes": fw.rx_bytes - bytes0,
+        "suppressed": enc.suppressed,
+        "deltas": enc.deltas,
+        "final_ok": got == want,
+        "final": got,
+        "want": want,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    results = []
+    failures = []
+    keepalives = int(args.seconds * 1000.0 / args.keepalive_ms)
+    for workload in ("idle", "drift"):
+        by_mode = {}
+        for mode in MODES:
+            r = run(workload, mode, args)
+            results.append(r)
+            by_mode[mode] = r
+            print(f"{workload:<6} {mode:<9} offered={r['offered']:4d} lines={r['lines']:4d} "
+                  f"bytes={r['bytes']:6d} suppressed={r['suppressed']:4d} deltas={r['deltas']:4d}")
+            if not r["final_ok"]:
+                failures.append(f"{workload}/{mode}: board ended on {r['final']}, last setpoint was {r['want']}")
+            if mode != "off" and r["lines"] > r["values"] + keepalives:
+                failures.append(f"{workload}/{mode}: {r['lines']} lines for {r['values']} distinct values "
+                                f"and {keepalives} keepalives")
+        if by_mode["delta"]["bytes"] > by_mode["suppress"]["bytes"]:
+            failures.append(f"{workload}: delta frames cost {by_mode['delta']['bytes']} bytes, "
+                            f"suppression alone {by_mode['suppress']['bytes']}")
+    return benchlib.finish(failures, results, args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
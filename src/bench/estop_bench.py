@@ -0,0 +1,152 @@
+# bench/estop_bench.py
+"""E-stop latency check for ArduinoWorker on a virtual double_actuator board.
+
+Each trial fills the command queue with ``--queued`` long moves, waits
+until the firmware is in the middle of the first one, calls
+``ArduinoWorker.estop()`` and measures:
+
+  write   -- estop() call -> E-stop byte written to the port (host side)
+  halt    -- estop() call -> firmware stopped the actuators (includes the
+             byte's time on the 9600 baud wire and the firmware's poll)
+  leaked  -- motion still running or commands still queued 0.3 s after the stop
+
+The worker is then resumed for the next trial.  The stop has to go out
+ahead of everything queued, so by default the write must come within one
+queued command's time on the wire (``--max-write-us``), and the halt
+within that plus the stop byte's own wire time and the sketch's 1 ms check
+between motion steps (``--max-halt-ms``).  A trial over either, or any
+leaked command, prints FAIL and the script exits 1, so it can gate CI.
+
+Example (from src/):
+    python bench/estop_bench.py --trials 5
+"""
+
+from __future__ import annotations
+
+import time
+
+import benchlib  # puts src/ on sys.path
+
+from core.arduino import ArduinoWorker
+from core.setpoint import Setpoint
+from core.sim import DoubleActuatorFirmware, SimSerial
+
+POLL_S = 0.001  # move_actuators_to_targets() looks for the stop byte between 1 ms steps
+
+
+def parse_args(argv: list[str] | None = None):
+    p = benchlib.parser("ArduinoWorker E-stop latency benchmark")
+    p.add_argument("--trials", type=int, default=5)
+    p.add_argument("--queued", type=int, default=50, help="Commands queued ahead of the stop")
+    p.add_argument("--move-s", type=float, default=3.0, help="Duration of each queued move")
+    p.add_argument("--max-write-us", type=float, default=None, help="Default: one queued command's wire time")
+    p.add_argument("--max-halt-ms", type=float, default=None, help="Default: write + stop byte + 1 ms poll")
+    return p.parse_args(argv)
+
+
+class _FastBootFirmware(DoubleActuatorFirmware):
+    RESET_S = 0.0  # skip the 7 s full-retract in setup()
+
+
+class _Board:
+    """serial_factory that keeps the firmware instance reachable."""
+
+    def __init__(self):
+        self.serial = None
+
+    def __call__(self, port=None, baudrate=115200, timeout=None, **kwargs):
+        self.serial = SimSerial(port=port, baudrate=baudrate, timeout=timeout,
+                                firmware=_FastBootFirmware(parse_timeout=0.05), **kwargs)
+        return self.serial
+
+    @property
+    def firmware(self):
+        return self.serial.firmware
+
+
+def _wait(pred, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if pred():
+            return True
+        time.sleep(0.001)
+    return pred()
+
+
+def limits(args) -> tuple[float, float]:
+    """(max write us, max halt ms) from the link: see the module docstring."""
+    byte_s = 10.0 / _FastBootFirmware.baud
+    command_s = len(Setpoint.of(6.0, 6.0, 0.0, args.move_s).encode()) * byte_s
+    write_us = command_s * 1e6 if args.max_write_us is None else args.max_write_us
+    halt_ms = write_us / 1000.0 + (byte_s + POLL_S) * 1000.0 if args.max_halt_ms is None else args.max_halt_ms
+    return write_us, halt_ms
+
+
+def run_trial(worker: ArduinoWorker, board: _Board, args, trial: int) -> dict:
+    fw = board.firmware
+    stops_before = len(fw.stopped_ns)
+    # alternate targets so every command is a real move of --move-s seconds
+    for i in range(args.queued):
+        target = 6.0 if (i + trial) % 2 == 0 else 2.0
+        worker.send_setpoint(Setpoint.of(target, target, 0.0, args.move_s))
+    # stop in the middle of the first move
+    started = _wait(lambda: fw.moving, 5.0)
+    time.sleep(0.05)
+
+    t0 = time.perf_counter_ns()
+    worker.estop()
+    halted = _wait(lambda: len(fw.stopped_ns) > stops_before, 2.0)
+    write_us = (worker.estop_write_ns - t0) / 1000.0 if worker.estop_write_ns >= t0 else float("nan")
+    halt_ms = (fw.stopped_ns[-1] - t0) / 1e6 if halted else float("nan")
+
+    # anything that still reaches the firmware is a leak
+    time.sleep(0.3)
+    leaked = 1 if fw.moving or worker._cmd_q.qsize() else 0
+
+    worker.resume()
+    _wait(lambda: not fw.estopped, 2.0)
+    return {
+        "trial": trial,
+        "started": started,
+        "halted": halted,
+        "write_us": write_us,
+        "halt_ms": halt_ms,
+        "leaked": leaked,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    board = _Board()
+    worker = ArduinoWorker(preferred_port="SIM0", baud=_FastBootFirmware.baud, serial_factory=board)
+    worker.start()  # opens the port and waits out the bootloader reset
+
+    max_write_us, max_halt_ms = limits(args)
+    results = []
+    failures = []
+    try:
+        for trial in range(args.trials):
+            r = run_trial(worker, board, args, trial)
+            results.append(r)
+            trial_failures = []
+            if not r["started"]:
+                trial_failures.append("first move never started")
+            if not r["halted"]:
+                trial_failures.append("firmware never stopped")
+            if not r["write_us"] <= max_write_us:
+                trial_failures.append(f"write_us={r['write_us']:.0f} > {max_write_us:.0f}")
+            if not r["halt_ms"] <= max_halt_ms:
+                trial_failures.append(f"halt_ms={r['halt_ms']:.2f} > {max_halt_ms:.2f}")
+            if r["leaked"]:
+                trial_failures.append("motion command written after the stop")
+            r["failures"] = trial_failures
+            print(f"trial={trial} write={r['write_us']:8.1f}us halt={r['halt_ms']:6.2f}ms "
+                  f"leaked={r['leaked']}")
+            failures += [f"trial {trial}: {failure}" for failure in trial_failures]
+    finally:
+        worker.stop()
+    return benchlib.finish(failures, results, args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
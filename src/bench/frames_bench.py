@@ -0,0 +1,140 @@
+# bench/frames_bench.py
+"""Serial input: incremental frame parser and the background reader.
+
+Two parts:
+
+  parser -- ``--lines`` firmware lines (acks, F/S slot reports, progress
+            chatter) fed to FrameParser in random chunks of 1..``--chunk``
+            bytes, as bulk ``read(in_waiting)`` calls hand them over;
+            reports lines/s and MB/s and checks every line comes out whole
+  link   -- ``--moves`` commands through ArduinoWorker to a virtual
+            double_actuator board, which prints progress lines between
+            its acks; counts what the board printed against what the
+            worker's reader dispatched
+
+Any line lost or mangled, a parser slower than the fastest board's link
+(115200 baud, 11.5 kB/s), or a command left without its ack, prints FAIL
+and exits 1.
+
+Example (from src/):
+    python bench/frames_bench.py --lines 200000 --moves 40
+"""
+
+from __future__ import annotations
+
+import random
+import time
+
+import benchlib  # puts src/ on sys.path
+
+from PySide6.QtCore import Qt
+
+from core.arduino import ArduinoWorker
+from core.frames import FrameParser, classify
+from core.setpoint import Setpoint
+from core.sim import FIRMWARES, DoubleActuatorFirmware, sim_factory
+
+SAMPLE_LINES = (b"OK", b"DONE", b"F31", b"S30", b"RAN 123456", b"PONG 98765",
+                b"Moving actuators to 3.00, 7.50 over 1.00 s", b"ERR queue full")
+
+
+def parse_args(argv: list[str] | None = None):
+    p = benchlib.parser("Frame parser / serial reader benchmark")
+    p.add_argument("--lines", type=int, default=200000)
+    p.add_argument("--chunk", type=int, default=64, help="Largest bulk read, bytes")
+    p.add_argument("--moves", type=int, default=40)
+    p.add_argument("--seed", type=int, default=1)
+    return p.parse_args(argv)
+
+
+def bench_parser(args) -> dict:
+    rng = random.Random(args.seed)
+    lines = [rng.choice(SAMPLE_LINES) for _ in range(args.lines)]
+    stream = b"".join(line + b"\r\n" for line in lines)
+    chunks = []
+    pos = 0
+    while pos < len(stream):
+        n = rng.randint(1, args.chunk)
+        chunks.append(stream[pos:pos + n])
+        pos += n
+
+    parser = FrameParser()
+    out = []
+    t0 = time.perf_counter()
+    for chunk in chunks:
+        for line in parser.feed(chunk):
+            classify(line)
+            out.append(line)
+    elapsed = time.perf_counter() - t0
+    return {
+        "lines": len(lines),
+        "chunks": len(chunks),
+        "lines_per_s": len(lines) / elapsed,
+        "mb_per_s": len(stream) / elapsed / 1e6,
+        "intact": out == lines and parser.pending == 0,
+    }
+
+
+def bench_link(args) -> dict:
+    fw = DoubleActuatorFirmware(motion_scale=0.0)
+    fw.RESET_S = 0.0
+    factory = sim_factory("double_actuator")
+    factory.boards["SIM0"] = fw
+    worker = ArduinoWorker(preferred_port="SIM0", baud=fw.baud, serial_factory=factory, keepalive_s=0.0)
+    acks, messages = [], []
+    worker.ack.connect(acks.append, Qt.DirectConnection)
+    worker.message.connect(messages.append, Qt.DirectConnection)
+    worker.start()
+    deadline = time.monotonic() + 5.0
+    while not worker.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    t0 = time.monotonic()
+    for i in range(args.moves):
+        worker.send_setpoint(Setpoint.of(float(2 + i % 5), float(6 - i % 3), 0.0, 1.0))
+    deadline = time.monotonic() + 2.0 + args.moves
+    while len(acks) < args.moves and time.monotonic() < deadline:
+        time.sleep(0.01)
+    elapsed = time.monotonic() - t0
+    time.sleep(0.2)  # trailing output
+    reader = worker._reader
+    frames, reads = (reader.frames, reader.reads) if reader is not None else (0, 0)
+    worker.stop()
+    return {
+        "moves": args.moves,
+        "acked": len(acks),
+        "printed": fw.tx_lines,
+        "dispatched": frames,
+        "reads": reads,
+        "messages": len(messages),
+        "seconds": elapsed,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    failures = []
+
+    p = bench_parser(args)
+    print(f"parser lines={p['lines']} chunks={p['chunks']} {p['lines_per_s'] / 1e6:.2f} M lines/s "
+          f"{p['mb_per_s']:.1f} MB/s intact={p['intact']}")
+    if not p["intact"]:
+        failures.append("parser lost or mangled lines")
+    link_bps = max(fw.baud for fw in FIRMWARES.values()) / 10.0  # 8N1: 10 bits a byte
+    if p["mb_per_s"] * 1e6 < link_bps:
+        failures.append(f"parser takes {p['mb_per_s'] * 1e6:.0f} B/s, the link delivers {link_bps:.0f}")
+
+    link = bench_link(args)
+    print(f"link   moves={link['moves']} acked={link['acked']} printed={link['printed']} "
+          f"dispatched={link['dispatched']} reads={link['reads']} messages={link['messages']} "
+          f"in {link['seconds']:.2f} s")
+    if link["acked"] < link["moves"]:
+        failures.append(f"{link['moves'] - link['acked']} commands without an ack")
+    if link["dispatched"] != link["printed"]:
+        failures.append(f"board printed {link['printed']} lines, reader dispatched {link['dispatched']}")
+
+    return benchlib.finish(failures, {"parser": p, "link": link}, args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
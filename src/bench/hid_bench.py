@@ -0,0 +1,223 @@
+# bench/hid_bench.py
+"""HID decoding microbenchmark and regression check over recorded corpora.
+
+Corpora live in bench/fixtures/hid/*.jsonl (format: core/hidcorpus.py).
+
+  bench   ns/report and transient allocation bytes/report per corpus; the
+          decode has to keep up with the pad, so a report slower than the
+          corpus's own report interval prints FAIL
+  check   replay every corpus and compare the decode against "expect"
+  bless   rewrite "expect" from the current decoder (after an intended change)
+  synth   regenerate the synthetic fixtures shipped with the repo
+  record  capture a new corpus from a live pad (needs hidapi)
+
+Example (from src/):
+    python bench/hid_bench.py bench --repeat 200
+    python bench/hid_bench.py check
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import benchlib  # puts src/ on sys.path
+
+from core import hidcorpus
+from core.controller import ControllerWorker
+from core.hidcorpus import CorpusRecord, HIDCorpus
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "hid"
+
+
+def parse_args(argv: list[str] | None = None):
+    p = benchlib.parser("HID decoding benchmark / regression corpus")
+    p.add_argument("command", nargs="?", default="bench",
+                   choices=("bench", "check", "bless", "synth", "record"))
+    p.add_argument("--fixtures", type=str, default=str(FIXTURE_DIR))
+    p.add_argument("--repeat", type=int, default=100, help="Passes over each corpus when timing")
+    p.add_argument("--pad", type=str, default="", help="record: corpus name")
+    p.add_argument("--seconds", type=float, default=10.0, help="record: capture length")
+    return p.parse_args(argv)
+
+
+def _corpus_paths(folder: Path) -> list[Path]:
+    return sorted(folder.glob("*.jsonl"))
+
+
+# ----- synthetic fixtures ------------------------------------------------------
+def _stick(i: int, phase: float) -> float:
+    return math.sin(i * 0.11 + phase)
+
+
+def _buttons(i: int) -> int:
+    # press SOUTH, then EAST, then NORTH briefly over the capture
+    if 40 <= i < 44:
+        return 0b0001
+    if 90 <= i < 93:
+        return 0b0010
+    if 150 <= i < 152:
+        return 0b1000
+    return 0
+
+
+def _synth_xbox_packed(n: int) -> HIDCorpus:
+    corpus = HIDCorpus(pad="xbox_packed", description="18-byte packed XInput-style report, axes at offset 10")
+    for i in range(n):
+        rep = bytearray(18)
+        rep[0] = 0x01
+        buttons = _buttons(i)
+        rep[7] = buttons & 0xFF
+        rep[8] = buttons >> 8
+        rep[9] = 0  # triggers placeholder
+        axes = [int(32000 * _stick(i, ph)) for ph in (0.0, 1.0, 2.0, 3.0)]
+        if i == 0:
+            axes = [0, 0, 0, 0]  # pad at rest when the capture starts
+        struct.pack_into("<hhhh", rep, 10, *axes)
+        corpus.records.append(CorpusRecord(t_ms=i * 4.0, report=bytes(rep)))
+    return corpus
+
+
+def _synth_generic_8byte(n: int) -> HIDCorpus:
+    corpus = HIDCorpus(pad="generic_8byte", description="lx,ly,rx,ry,hat,buttons,lt,rt (u8 each)")
+    for i in range(n):
+        axes = [int(127.5 + 127 * _stick(i, ph)) for ph in (0.5, 1.5, 2.5, 3.5)]
+        rep = bytes(axes + [8, _buttons(i), int(255 * abs(_stick(i, 0.2))), 0])
+        corpus.records.append(CorpusRecord(t_ms=i * 8.0, report=rep))
+    return corpus
+
+
+def _synth_switch_simple(n: int) -> HIDCorpus:
+    corpus = HIDCorpus(pad="switch_simple", description="Switch Pro 0x3F simple-HID report (12 bytes, u16 axes)")
+    for i in range(n):
+        b = _buttons(i)
+        axes = [int(32768 + 32000 * _stick(i, ph)) for ph in (0.3, 1.3, 2.3, 3.3)]
+        rep = struct.pack("<BBBBHHHH", 0x3F, b, 0, 8, *axes)
+        corpus.records.append(CorpusRecord(t_ms=i * 15.0, report=rep))
+    return corpus
+
+
+def _synth_inputs_events(n: int) -> HIDCorpus:
+    corpus = HIDCorpus(pad="inputs_xinput", backend="inputs",
+                       description="Windows 'inputs' events from an XInput pad (signed 16-bit sticks)")
+    names = {0b0001: "BTN_SOUTH", 0b0010: "BTN_EAST", 0b1000: "BTN_NORTH"}
+    prev = 0
+    for i in range(n):
+        t = i * 8.0
+        for code, ph in (("ABS_X", 0.0), ("ABS_Y", 1.0), ("ABS_RX", 2.0), ("ABS_RY", 3.0)):
+            corpus.records.append(CorpusRecord(t_ms=t, event=("Absolute", code, int(32000 * _stick(i, ph)))))
+        corpus.records.append(CorpusRecord(t_ms=t, event=("Absolute", "ABS_Z", int(255 * abs(_stick(i, 0.7))))))
+        b = _buttons(i)
+        for mask, name in names.items():
+            if (b ^ prev) & mask:
+                corpus.records.append(CorpusRecord(t_ms=t, event=("Key", name, 1 if b & mask else 0)))
+        prev = b
+        corpus.records.append(CorpusRecord(t_ms=t, event=("Sync", "SYN_REPORT", 0)))
+    return corpus
+
+
+SYNTHETIC = (_synth_xbox_packed, _synth_generic_8byte, _synth_switch_simple, _synth_inputs_events)
+
+
+# ----- commands ----------------------------------------------------------------
+def bench_corpus(corpus: HIDCorpus, repeat: int) -> dict:
+    worker = ControllerWorker()
+    records = corpus.records
+    n = len(records)
+    feed = hidcorpus.feed
+
+    best = None
+    for _ in range(repeat):
+        hidcorpus.reset_worker(worker)
+        t0 = time.perf_counter_ns()
+        for rec in records:
+            feed(worker, rec)
+        elapsed = time.perf_counter_ns() - t0
+        best = elapsed if best is None else min(best, elapsed)
+
+    # Transient allocation: traced peak above the baseline, per record.
+    hidcorpus.reset_worker(worker)
+    tracemalloc.start()
+    transient = 0
+    for rec in records:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        feed(worker, rec)
+        transient += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    span_ms = records[-1].t_ms - records[0].t_ms if n > 1 else 0.0
+    return {
+        "pad": corpus.pad,
+        "records": n,
+        "interval_ns": span_ms * 1e6 / max(1, n - 1),
+        "ns_per_record": (best or 0) / max(1, n),
+        "alloc_bytes_per_record": transient / max(1, n),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    folder = Path(args.fixtures)
+
+    if args.command == "synth":
+        folder.mkdir(parents=True, exist_ok=True)
+        worker = ControllerWorker()
+        for make in SYNTHETIC:
+            corpus = make(200)
+            hidcorpus.bless(worker, corpus)
+            hidcorpus.save_corpus(corpus, folder / f"{corpus.pad}.jsonl")
+            print(f"wrote {corpus.pad}.jsonl ({len(corpus.records)} records)")
+        return 0
+
+    if args.command == "record":
+        if not args.pad:
+            print("record needs --pad NAME", file=sys.stderr)
+            return 2
+        corpus = hidcorpus.record_hid(args.pad, args.seconds)
+        hidcorpus.bless(ControllerWorker(), corpus)
+        folder.mkdir(parents=True, exist_ok=True)
+        hidcorpus.save_corpus(corpus, folder / f"{args.pad}.jsonl")
+        print(f"recorded {len(corpus.records)} reports to {args.pad}.jsonl")
+        return 0
+
+    paths = _corpus_paths(folder)
+    if not paths:
+        print(f"No corpora in {folder}", file=sys.stderr)
+        return 2
+
+    failures = []
+    results = []
+    for path in paths:
+        corpus = hidcorpus.load_corpus(path)
+        worker = ControllerWorker()
+        if args.command == "check":
+            mismatches = hidcorpus.check(worker, corpus)
+            status = "ok" if not mismatches else f"{len(mismatches)} mismatches"
+            print(f"{corpus.pad:<16} {len(corpus.records):>6} records  {status}")
+            for mismatch in mismatches[:10]:
+                print(f"  {mismatch}")
+            results.append({"pad": corpus.pad, "records": len(corpus.records), "mismatches": len(mismatches)})
+            if mismatches:
+                failures.append(f"{corpus.pad}: {len(mismatches)} reports decode differently")
+        elif args.command == "bless":
+            hidcorpus.bless(worker, corpus)
+            hidcorpus.save_corpus(corpus, path)
+            print(f"blessed {path.name}")
+        else:
+            r = bench_corpus(corpus, args.repeat)
+            results.append(r)
+            print(f"{r['pad']:<16} {r['records']:>6} records  {r['ns_per_record']:9.0f} ns/record  "
+                  f"{r['alloc_bytes_per_record']:8.1f} B/record transient")
+            if r["ns_per_record"] > r["interval_ns"] > 0:
+                failures.append(f"{r['pad']}: {r['ns_per_record']:.0f} ns/report, "
+                                f"reports come every {r['interval_ns']:.0f} ns")
+    return benchlib.finish(failures, results, args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,117 @@
+# bench/library_bench.py
+"""Sequence library: indexing, warm preset starts, invalidation and the cache cap.
+
+Writes ``--files`` CSVs of ``--rows`` rows and reports:
+
+  index    -- one SequenceLibrary.scan() over the directory (parse, extents
+              and limit check per file)
+  click    -- what a preset click costs before a ride starts: the old way
+              (read the CSV and check it every time) vs library.info() +
+              library.get() on an indexed, unchanged file (p50/p99)
+  mtime    -- a file rewritten with more rows must be read again, not
+              served from the cache
+  cap      -- with ``--cap-mb`` smaller than the directory, the cache stays
+              under the cap
+
+A stale entry, a cap overrun, a warm click no faster than re-reading, or a
+warm click p99 longer than one row of the ride (``--max-click-p99-ms``;
+the ride would start late) prints FAIL and exits 1.
+
+Example (from src/):
+    python bench/library_bench.py --files 40 --rows 5000
+"""
+
+from __future__ import annotations
+
+import math
+import tempfile
+import time
+from pathlib import Path
+
+import benchlib  # puts src/ on sys.path
+
+from core.library import SequenceLibrary
+from core.limits import MotionLimits, check_sequence
+from core.sequence import load_sequence
+
+ROW_DT = 0.02
+
+
+def parse_args(argv: list[str] | None = None):
+    p = benchlib.parser("Sequence library benchmark")
+    p.add_argument("--files", type=int, default=40)
+    p.add_argument("--rows", type=int, default=5000)
+    p.add_argument("--clicks", type=int, default=50)
+    p.add_argument("--cap-mb", type=float, default=2.0)
+    p.add_argument("--max-click-p99-ms", type=float, default=ROW_DT * 1000.0, help="Default: one row dt")
+    return p.parse_args(argv)
+
+
+def write_csv(path: Path, rows: int, phase: float = 0.0) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        f.write("pitch,roll,yaw,dt\n")
+        for i in range(rows):
+            t = i * ROW_DT + phase
+            f.write(f"{10 * math.sin(t):.2f},{8 * math.sin(0.7 * t):.2f},{5 * math.cos(0.3 * t):.2f},{ROW_DT}\n")
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    failures = []
+    limits = MotionLimits()
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        for i in range(args.files):
+            write_csv(root / f"ride{i:03d}.csv", args.rows, phase=i)
+        paths = sorted(root.glob("*.csv"))
+
+        lib = SequenceLibrary(root, dt=0.5, limits=limits)
+        t0 = time.perf_counter()
+        infos = lib.scan()
+        index_s = time.perf_counter() - t0
+        print(f"index  files={len(infos)} rows={args.rows} {index_s * 1000:.0f} ms "
+              f"({index_s * 1000 / max(1, len(infos)):.1f} ms/file) cached={lib.cached_bytes / 1e6:.1f} MB")
+
+        cold, warm = [], []
+        for i in range(args.clicks):
+            path = paths[i % len(paths)]
+            t0 = time.perf_counter()
+            check_sequence(*load_sequence(path, 0.5), limits)
+            cold.append((time.perf_counter() - t0) * 1000.0)
+            t0 = time.perf_counter()
+            lib.info(path)
+            lib.get(path)
+            warm.append((time.perf_counter() - t0) * 1000.0)
+        for name, lat in (("re-read", cold), ("library", warm)):
+            print(f"click  {name:<8} p50/p99 = {benchlib.percentile(lat, 50):.3f}/"
+                  f"{benchlib.percentile(lat, 99):.3f} ms")
+        warm_p99 = benchlib.percentile(warm, 99)
+        if warm_p99 > args.max_click_p99_ms:
+            failures.append(f"warm click p99={warm_p99:.3f} ms > {args.max_click_p99_ms:g}")
+        if benchlib.percentile(warm, 50) >= benchlib.percentile(cold, 50):
+            failures.append("a warm click costs as much as re-reading the file")
+
+        target = paths[0]
+        time.sleep(0.01)  # a new mtime even on coarse filesystems
+        write_csv(target, args.rows + 7)
+        rows = len(lib.get(target)[0])
+        info = lib.info(target)
+        fresh = rows == args.rows + 7 and info.rows == args.rows + 7
+        print(f"mtime  rewritten file: get() rows={rows} info.rows={info.rows} fresh={fresh}")
+        if not fresh:
+            failures.append("edited file served from the cache")
+
+        cap = int(args.cap_mb * 1e6)
+        small = SequenceLibrary(root, dt=0.5, max_bytes=cap)
+        small.scan()
+        for path in paths:
+            small.get(path)
+        print(f"cap    {args.cap_mb:g} MB: cached={small.cached_bytes / 1e6:.2f} MB loads={small.loads}")
+        if small.cached_bytes > cap:
+            failures.append(f"cache {small.cached_bytes} bytes over its {cap}-byte cap")
+
+    return benchlib.finish(failures, {"index_s": index_s, "cold_ms": cold, "warm_ms": warm}, args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
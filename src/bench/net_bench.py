@@ -0,0 +1,209 @@
+# bench/net_bench.py
+"""Loopback sender and benchmark for the UDP setpoint endpoint.
+
+``bench`` starts a :class:`NetInputWorker` on 127.0.0.1 with a recording
+sink, streams packets at ``--rate`` from this process and reports the
+added latency (sendto -> sink call) and delivered/coalesced/stale counts.
+``--reorder`` re-sends every Nth packet late to exercise the staleness
+check.  ``--sim`` puts an ``ArduinoWorker`` on a virtual board
+(core.sim) behind the listener, so ``send_latest`` coalescing is measured
+against a real ack-paced writer.
+
+The endpoint has to sustain 200 packets/s with under a millisecond added,
+so by default a run that handled fewer than ``--min-rate`` packets/s (when
+it offered at least that many) or whose p99 is over ``--max-p99-us``
+prints FAIL and exits 1, as do reordered packets that were not dropped.
+
+``send`` streams a sine-wave setpoint at a running app (``app.py --udp-port``).
+
+Examples (from src/):
+    python bench/net_bench.py bench --rate 500 --seconds 5
+    python bench/net_bench.py bench --rate 200 --sim --ack OK
+    python bench/net_bench.py send --port 4560 --rate 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import socket
+import threading
+import time
+
+import benchlib  # puts src/ on sys.path
+
+from PySide6.QtCore import Qt
+
+from core.netinput import DEFAULT_PORT, NetInputWorker, encode_packet
+from core.setpoint import Setpoint
+
+
+def parse_args(argv: list[str] | None = None):
+    p = argparse.ArgumentParser(description="UDP setpoint endpoint benchmark / loopback sender")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("bench", help="In-process listener + loopback sender")
+    b.add_argument("--rate", type=float, default=500.0, help="Packets per second")
+    b.add_argument("--seconds", type=float, default=5.0)
+    b.add_argument("--channels", type=int, default=3)
+    b.add_argument("--reorder", type=int, default=0,
+                   help="Re-send every Nth packet after the next one (0 = never)")
+    b.add_argument("--sim", action="store_true", help="Feed ArduinoWorker.send_latest on a virtual board")
+    b.add_argument("--protocol", default="arduino", help="core.sim firmware for --sim")
+    b.add_argument("--ack", default="OK", help="Extra ack line for --sim (firmware that never acks stalls)")
+    b.add_argument("--max-p99-us", type=float, default=1000.0)
+    b.add_argument("--min-rate", type=float, default=200.0, help="Minimum packets/s handled by the endpoint")
+    benchlib.add_json(b)
+
+    s = sub.add_parser("send", help="Stream a sine wave to a running listener")
+    s.add_argument("--host", default="127.0.0.1")
+    s.add_argument("--port", type=int, default=DEFAULT_PORT)
+    s.add_argument("--rate", type=float, default=200.0)
+    s.add_argument("--seconds", type=float, default=0.0, help="0 = until Ctrl+C")
+    s.add_argument("--amplitude", type=float, default=10.0)
+    return p.parse_args(argv)
+
+
+def _wave(i: int, rate: float, channels: int, amplitude: float) -> Setpoint:
+    t = i / rate
+    return Setpoint(amplitude * math.sin(2 * math.pi * (0.2 + 0.1 * c) * t) for c in range(channels))
+
+
+class RecordingSink:
+    """Maps each delivered setpoint back to its send time via channel 0 = seq."""
+
+    def __init__(self, sent_ns: dict, downstream=None):
+        self._sent_ns = sent_ns
+        self._downstream = downstream
+        self.latencies_us: list[float] = []
+
+    def __call__(self, setpoint) -> None:
+        now = time.perf_counter_ns()
+        sent = self._sent_ns.get(int(setpoint[0]))
+        if sent is not None:
+            self.latencies_us.append((now - sent) / 1000.0)
+        if self._downstream is not None:
+            self._downstream(setpoint)
+
+
+def run_bench(args) -> dict:
+    sent_ns: dict[int, int] = {}
+    worker_ard = None
+    downstream = None
+    if args.sim:
+        from core.arduino import ArduinoWorker
+        from core.sim import FIRMWARES, sim_factory
+        worker_ard = ArduinoWorker(preferred_port="SIM0", baud=FIRMWARES[args.protocol].baud,
+                                   serial_factory=sim_factory(args.protocol, ack=args.ack or None,
+                                                              motion_scale=0.0))
+        acked = []
+        worker_ard.ack.connect(lambda s: acked.append(s), Qt.DirectConnection)
+        worker_ard.start()
+        downstream = worker_ard.send_latest
+
+    sink = RecordingSink(sent_ns, downstream)
+    net = NetInputWorker(sink, host="127.0.0.1", port=0)
+    if not net.bind():
+        raise SystemExit("bind failed")
+    addr = net.address
+    listener = threading.Thread(target=net.start, daemon=True)
+    listener.start()
+
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    period = 1.0 / args.rate
+    total = int(args.rate * args.seconds)
+    late = None
+    t0 = time.perf_counter()
+    for i in range(total):
+        target = t0 + i * period
+        while True:
+            remaining = target - time.perf_counter()
+            if remaining <= 0:
+                break
+            time.sleep(remaining if remaining > 0.002 else 0)
+        sp = _wave(i, args.rate, args.channels, 10.0)
+        sp[0] = float(i)  # carry the index so the sink can find the send time
+        pkt = encode_packet(i, sp)
+        if args.reorder and i % args.reorder == 0:
+            late = pkt
+            continue
+        sent_ns[i] = time.perf_counter_ns()
+        tx.sendto(pkt, addr)
+        if late is not None:
+            tx.sendto(late, addr)  # older seq: must be dropped as stale
+            late = None
+    wall = time.perf_counter() - t0
+    time.sleep(0.2)
+    net.stop()
+    listener.join(1.0)
+    tx.close()
+
+    acks = 0
+    if worker_ard is not None:
+        time.sleep(0.5)
+        worker_ard.stop()
+        acks = len(acked)
+
+    lat = sorted(sink.latencies_us)
+    return {
+        "sent": total,
+        "rate": total / wall if wall > 0 else 0.0,
+        "handled_rate": net.received / wall if wall > 0 else 0.0,
+        "received": net.received,
+        "delivered": net.delivered,
+        "coalesced": net.received - net.delivered - net.stale - net.malformed,
+        "stale": net.stale,
+        "malformed": net.malformed,
+        "lat_p50_us": benchlib.percentile(lat, 50),
+        "lat_p99_us": benchlib.percentile(lat, 99),
+        "lat_max_us": lat[-1] if lat else 0.0,
+        "serial_acks": acks,
+    }
+
+
+def run_send(args) -> int:
+    tx = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    period = 1.0 / args.rate
+    t0 = time.perf_counter()
+    i = 0
+    try:
+        while not args.seconds or i * period < args.seconds:
+            target = t0 + i * period
+            remaining = target - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+            tx.sendto(encode_packet(i, _wave(i, args.rate, 3, args.amplitude)), (args.host, args.port))
+            i += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        tx.close()
+    print(f"sent {i} packets to {args.host}:{args.port}")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.cmd == "send":
+        return run_send(args)
+
+    result = run_bench(args)
+    print(
+        f"sent={result['sent']} rate={result['rate']:.0f}/s received={result['received']} "
+        f"delivered={result['delivered']} coalesced={result['coalesced']} stale={result['stale']} "
+        f"latency p50/p99/max={result['lat_p50_us']:.0f}/{result['lat_p99_us']:.0f}/"
+        f"{result['lat_max_us']:.0f}us"
+        + (f" serial_acks={result['serial_acks']}" if args.sim else "")
+    )
+    failures = []
+    if result["lat_p99_us"] > args.max_p99_us:
+        failures.append(f"lat_p99_us={result['lat_p99_us']:.0f} > {args.max_p99_us:g}")
+    if args.rate >= args.min_rate and result["handled_rate"] < args.min_rate:
+        failures.append(f"handled {result['handled_rate']:.0f} packets/s < {args.min_rate:g}")
+    if args.reorder and result["stale"] == 0:
+        failures.append("reordered packets were not dropped as stale")
+    return benchlib.finish(failures, result, args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
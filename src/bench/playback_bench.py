@@ -0,0 +1,211 @@
+# bench/playback_bench.py
+"""Sequence start latency and back-to-back transitions.
+
+Two parts:
+
+  start       -- ``--starts`` sequences of ``--rows`` rows started back to
+                 back, each replacing the one still playing; time from the
+                 request to the first step.  The old way reads the CSV (the
+                 GUI's motion-limit check), waits for the previous thread
+                 and builds a new QThread and SequenceWorker per run;
+                 PlaybackEngine hands over the preloaded rows and plays
+                 them on its one thread
+  transition  -- two short sequences through PlaybackEngine to a virtual
+                 double_actuator board in keyframe mode, the second queued
+                 with queue_next(); dead time on the board between the last
+                 move of the first and the first move of the second
+
+A start has to be instant to the ride: by default the engine's p99 must be
+within one row dt (``--max-start-p99-ms``), so the first step is not later
+than the second row would be.  The handoff has to be as seamless as any
+other step: its gap may exceed the largest gap between moves inside either
+sequence by at most one ``millis()`` tick, the board's own clock
+resolution (``--max-gap-ms`` overrides).  Either prints FAIL and exits 1.
+
+Example (from src/):
+    python bench/playback_bench.py --starts 20 --rows 5000
+"""
+
+from __future__ import annotations
+
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import benchlib  # puts src/ on sys.path
+
+from PySide6.QtCore import QThread, Qt
+
+from core.arduino import ArduinoWorker
+from core.playback import PlaybackEngine
+from core.sequence import SequenceWorker, load_sequence
+from core.sim import DoubleActuatorFirmware, sim_factory
+
+CHANNELS = 4  # pos1, pos2, pos3, move time: the double_actuator line
+
+
+def parse_args(argv: list[str] | None = None):
+    p = benchlib.parser("Playback engine benchmark")
+    p.add_argument("--starts", type=int, default=20)
+    p.add_argument("--rows", type=int, default=5000)
+    p.add_argument("--dt", type=float, default=0.01)
+    p.add_argument("--max-start-p99-ms", type=float, default=None, help="Default: one row dt")
+    p.add_argument("--max-gap-ms", type=float, default=None,
+                   help="Board-side gap at the handoff; default: the sequences' own worst gap + 1 ms")
+    return p.parse_args(argv)
+
+
+def write_csv(path: Path, rows: int, dt: float, offset: int = 0) -> Path:
+    with path.open("w", encoding="utf-8") as f:
+        f.write("pos1,pos2,pos3,time\n")
+        for i in range(rows):
+            # whole inches inside the actuator stroke, a real move every step
+            f.write(f"{2 + (i + offset) % 8},{6 - (i + offset) % 3},0,{dt}\n")
+    return path
+
+
+class _FirstStep:
+    """Records when the first step of the current run arrives.
+
+    The run being replaced may still emit a step or two; those are ignored.
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.run = 0
+        self.at = 0.0
+
+    def arm(self):
+        self.run += 1
+        self.event.clear()
+
+    def hit(self, run: int):
+        if run == self.run and not self.event.is_set():
+            self.at = time.perf_counter()
+            self.event.set()
+
+
+def bench_thread_per_run(csv_path: Path, args) -> list:
+    first = _FirstStep()
+    latencies = []
+    prev = None
+    for _ in range(args.starts):
+        first.arm()
+        t0 = time.perf_counter()
+        load_sequence(csv_path, args.dt)
+        if prev is not None:
+            worker, thread = prev
+            worker.stop()
+            thread.wait(2000)
+        thread = QThread()
+        worker = SequenceWorker(str(csv_path), dt=args.dt)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        worker.stepEmitted.connect(lambda sp, run=first.run: first.hit(run), Qt.DirectConnection)
+        worker.finished.connect(thread.quit, Qt.DirectConnection)
+        thread.start()
+        first.event.wait(5.0)
+        latencies.append((first.at - t0) * 1000.0)
+        prev = (worker, thread)
+    worker, thread = prev
+    worker.stop()
+    thread.wait(2000)
+    return latencies
+
+
+def bench_engine(csv_path: Path, args) -> list:
+    first = _FirstStep()
+
+    def make_player(path, rows, t0):
+        worker = SequenceWorker(str(path), rows=rows)
+        worker.stepEmitted.connect(lambda sp, run=first.run: first.hit(run), Qt.DirectConnection)
+        return worker
+
+    engine = PlaybackEngine(make_player)
+    engine.start()
+    engine.load(csv_path, args.dt).result()  # the GUI reads presets ahead at startup
+    latencies = []
+    for _ in range(args.starts):
+        first.arm()
+        t0 = time.perf_counter()
+        engine.load(csv_path, args.dt).result()
+        engine.play(csv_path, args.dt)
+        first.event.wait(5.0)
+        latencies.append((first.at - t0) * 1000.0)
+    engine.stop()
+    return latencies
+
+
+def bench_transition(tmp: Path) -> dict:
+    rows, dt = 3, 0.5
+    a = write_csv(tmp / "a.csv", rows, dt)
+    b = write_csv(tmp / "b.csv", rows, dt, offset=7)
+    fw = DoubleActuatorFirmware(motion_scale=1.0)
+    fw.RESET_S = 0.0
+    factory = sim_factory("double_actuator")
+    factory.boards["SIM0"] = fw
+    worker = ArduinoWorker(preferred_port="SIM0", baud=fw.baud, serial_factory=factory, keepalive_s=0.0)
+    worker.start()
+    deadline = time.monotonic() + 5.0
+    while not worker.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # a straight cut: this measures the queue handoff, not the blend (bench/crossfade_bench.py)
+    engine = PlaybackEngine(lambda path, rows, t0: SequenceWorker(str(path), stream=worker, rows=rows, t0=t0),
+                            channels=CHANNELS, fade_s=0.0)
+    errors = []
+    engine.error.connect(errors.append, Qt.DirectConnection)
+    engine.start()
+    engine.play(a, dt)
+    engine.queue_next(b, dt)
+    deadline = time.monotonic() + 2 * rows * dt + 5.0
+    while time.monotonic() < deadline and (engine.busy or len(fw.moves) < 2 * rows or fw._move is not None):
+        time.sleep(0.01)
+    engine.stop()
+    worker.stop()
+
+    moves = fw.moves
+    gaps = [max(0.0, (n[0] - (m[0] + m[3])) * 1000.0) for m, n in zip(moves, moves[1:])]
+    return {
+        "moves": len(moves),
+        "expected": 2 * rows,
+        "gap_ms": gaps[rows - 1] if len(gaps) >= rows else float("inf"),
+        "gap_max_ms": max(gaps, default=0.0),
+        "inner_gap_ms": max(gaps[:rows - 1] + gaps[rows:], default=0.0),  # inside A or B
+        "errors": errors,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        csv_path = write_csv(tmp / "seq.csv", args.rows, args.dt)
+        results = {"thread_per_run": bench_thread_per_run(csv_path, args),
+                   "engine": bench_engine(csv_path, args)}
+        for name, lat in results.items():
+            print(f"start {name:<15} n={len(lat)} p50/p99/max = {benchlib.percentile(lat, 50):.2f}/"
+                  f"{benchlib.percentile(lat, 99):.2f}/{max(lat, default=0.0):.2f} ms")
+        trans = bench_transition(tmp)
+    print(f"transition moves={trans['moves']}/{trans['expected']} gap={trans['gap_ms']:.1f} ms "
+          f"max gap={trans['gap_max_ms']:.1f} ms (inside a sequence {trans['inner_gap_ms']:.1f} ms)")
+    for err in trans["errors"]:
+        print(f"  {err}")
+
+    max_start_ms = args.dt * 1000.0 if args.max_start_p99_ms is None else args.max_start_p99_ms
+    max_gap_ms = trans["inner_gap_ms"] + 1.0 if args.max_gap_ms is None else args.max_gap_ms
+    p99 = benchlib.percentile(results["engine"], 99)
+    if p99 > max_start_ms:
+        failures.append(f"engine start p99={p99:.2f} ms > {max_start_ms:.2f}")
+    if trans["moves"] < trans["expected"]:
+        failures.append(f"transition ran {trans['moves']} of {trans['expected']} moves")
+    if trans["gap_ms"] > max_gap_ms:
+        failures.append(f"transition gap={trans['gap_ms']:.1f} ms > {max_gap_ms:.1f}")
+    results["transition"] = trans
+    return benchlib.finish(failures, results, args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
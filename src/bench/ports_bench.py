@@ -0,0 +1,95 @@
+# bench/ports_bench.py
+"""Port discovery benchmark on a host with several virtual boards.
+
+``--boards`` virtual boards alternate between the arduino (115200 baud) and
+double_actuator (9600 baud) sketches.  Reports:
+
+  serial  -- probing one port after another (the old trial-and-error)
+  scan    -- PortDiscovery.scan(): all ports probed in one parallel round
+  cached  -- a second scan: identities come from the VID/PID/serial cache
+  find    -- find() x1000 on the cached enumeration (reconnect path)
+
+Every board must be identified with the right firmware and baud rate, and
+the scan must finish in one probe round: under the slowest single probe
+plus the fastest one, which any second round in series would add
+(``--max-scan-ms`` overrides).  Otherwise the script prints FAIL and
+exits 1.
+
+Example (from src/):
+    python bench/ports_bench.py --boards 6
+"""
+
+from __future__ import annotations
+
+import time
+
+import benchlib  # puts src/ on sys.path
+
+from core.ports import PortDiscovery, probe_port
+from core.sim import FIRMWARES, sim_bus
+
+
+def parse_args(argv: list[str] | None = None):
+    p = benchlib.parser("PortDiscovery benchmark")
+    p.add_argument("--boards", type=int, default=4)
+    p.add_argument("--max-scan-ms", type=float, default=None, help="Default: one probe round, see above")
+    return p.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    protocols = ("arduino", "double_actuator")
+    boards = {f"SIM{i}": protocols[i % 2] for i in range(args.boards)}
+    # RESET_S would only matter if a probe reset the board; it must not
+    factory = sim_bus(boards, motion_scale=0.0)
+
+    serial_ids, probe_ms = {}, []
+    for port in boards:
+        t0 = time.perf_counter()
+        serial_ids[port] = probe_port(port, factory)
+        probe_ms.append((time.perf_counter() - t0) * 1000.0)
+    serial_ms = sum(probe_ms)
+    max_scan_ms = max(probe_ms) + min(probe_ms) if args.max_scan_ms is None else args.max_scan_ms
+
+    discovery = PortDiscovery(serial_factory=factory, lister=factory.comports)
+    t0 = time.perf_counter()
+    infos = discovery.scan()
+    scan_ms = (time.perf_counter() - t0) * 1000.0
+    probes = discovery.probes
+
+    t0 = time.perf_counter()
+    discovery.scan()
+    cached_ms = (time.perf_counter() - t0) * 1000.0
+
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        discovery.find()
+    find_us = (time.perf_counter() - t0) * 1000.0  # per call: ms total / 1000 calls = us
+
+    failures = []
+    for info in infos:
+        want = boards[info.device]
+        if info.firmware != want or info.baud != FIRMWARES[want].baud:
+            failures.append(f"{info.device}: got {info.firmware}@{info.baud}, want {want}@{FIRMWARES[want].baud}")
+    for port, (firmware, baud) in serial_ids.items():
+        if firmware != boards[port]:
+            failures.append(f"{port}: serial probe got {firmware}@{baud}")
+    if len(infos) != len(boards):
+        failures.append(f"found {len(infos)} of {len(boards)} boards")
+    if discovery.probes != probes:
+        failures.append("cached scan probed again")
+    if scan_ms > max_scan_ms:
+        failures.append(f"scan_ms={scan_ms:.0f} > {max_scan_ms:.0f}: more than one probe round")
+
+    result = {"boards": args.boards, "serial_ms": serial_ms, "scan_ms": scan_ms,
+              "cached_ms": cached_ms, "find_us": find_us, "enumerations": discovery.enumerations,
+              "failures": failures}
+    print(f"boards={args.boards} serial={serial_ms:.0f}ms scan={scan_ms:.0f}ms "
+          f"cached={cached_ms:.2f}ms find={find_us:.1f}us")
+    for info in infos:
+        print(f"  {info.label()}")
+    return benchlib.finish(failures, result, args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
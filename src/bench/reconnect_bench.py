@@ -0,0 +1,123 @@
+# bench/reconnect_bench.py
+"""USB-hiccup recovery benchmark for ArduinoWorker on a virtual board.
+
+Streams setpoints at ``--rate``, unplugs the virtual port (core.sim.unplug)
+for ``--outage-ms`` partway through and reports, per replay policy:
+
+  stall   -- port back -> first ack after it (reconnect + reset/handshake)
+  connect -- open -> READY banner of the reconnect alone
+  gap     -- last ack before the outage -> first ack after it
+  acked   -- acks received vs. setpoints sent
+  dropped -- commands discarded by the replay policy
+
+The supervisor retries with exponential backoff, so once the port is back
+the worst wait is the retry interval that spans the outage's end; the
+stall may be that, plus the reconnect itself and one setpoint period
+(``--max-stall-ms`` overrides).  The "all" policy must deliver every
+setpoint.  Either failing prints FAIL and exits 1.
+
+Example (from src/):
+    python bench/reconnect_bench.py --outage-ms 200 --policies latest,all
+"""
+
+from __future__ import annotations
+
+import time
+
+import benchlib  # puts src/ on sys.path
+
+from PySide6.QtCore import Qt
+
+from core.arduino import ArduinoWorker
+from core.connection import REPLAY_ALL, Backoff
+from core.latency import LATENCY
+from core.setpoint import Setpoint
+from core.sim import sim_factory, unplug
+
+
+def parse_args(argv: list[str] | None = None):
+    p = benchlib.parser("ArduinoWorker reconnect benchmark")
+    p.add_argument("--policies", default="latest,all", help="Comma-separated replay policies to run")
+    p.add_argument("--rate", type=float, default=60.0, help="Setpoints per second")
+    p.add_argument("--seconds", type=float, default=4.0)
+    p.add_argument("--outage-at", type=float, default=1.0, help="Seconds into the stream")
+    p.add_argument("--outage-ms", type=float, default=200.0)
+    p.add_argument("--no-reset", action="store_true", help="Open with DTR low (no auto-reset)")
+    p.add_argument("--max-stall-ms", type=float, default=None, help="Default: backoff interval + connect + period")
+    return p.parse_args(argv)
+
+
+def retry_interval_s(outage_s: float) -> float:
+    """The backoff delay in progress when an ``outage_s`` outage ends (worst case)."""
+    backoff = Backoff()
+    waited = delay = 0.0
+    while waited < outage_s:
+        delay = backoff.next()
+        waited += delay
+    return delay
+
+
+def run_policy(policy: str, args) -> dict:
+    port = f"SIM-{policy}"
+    worker = ArduinoWorker(preferred_port=port, replay_policy=policy, reset_on_connect=not args.no_reset,
+                           serial_factory=sim_factory("arduino", ack="OK", motion_scale=0.0))
+    acks: list[float] = []
+    worker.ack.connect(lambda _s: acks.append(time.monotonic()), Qt.DirectConnection)
+    worker.start()
+    dropped0 = LATENCY.dropped
+
+    period = 1.0 / args.rate
+    total = int(args.rate * args.seconds)
+    t0 = time.monotonic()
+    outage_start = t0 + args.outage_at
+    outage_end = outage_start + args.outage_ms / 1000.0
+    unplugged = False
+    for i in range(total):
+        target = t0 + i * period
+        now = time.monotonic()
+        if target > now:
+            time.sleep(target - now)
+        if not unplugged and time.monotonic() >= outage_start:
+            unplug(port, args.outage_ms / 1000.0)
+            unplugged = True
+        worker.send_setpoint(Setpoint.of(float(i % 100), 0.0, 0.0))
+    deadline = time.monotonic() + 5.0
+    while time.monotonic() < deadline and worker._cmd_q.qsize():
+        time.sleep(0.01)
+    time.sleep(0.2)
+    worker.stop()
+
+    before = [t for t in acks if t < outage_start]
+    after = [t for t in acks if t >= outage_end]
+    return {
+        "policy": policy,
+        "sent": total,
+        "acked": len(acks),
+        "dropped": LATENCY.dropped - dropped0,
+        "stall_ms": (after[0] - outage_end) * 1000.0 if after else float("nan"),
+        "connect_ms": worker.connect_s * 1000.0,
+        "gap_ms": (after[0] - before[-1]) * 1000.0 if after and before else float("nan"),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    results = []
+    failures = []
+    for policy in [p.strip() for p in args.policies.split(",") if p.strip()]:
+        r = run_policy(policy, args)
+        results.append(r)
+        print(f"policy={r['policy']:<7} sent={r['sent']} acked={r['acked']} dropped={r['dropped']} "
+              f"stall={r['stall_ms']:.1f}ms connect={r['connect_ms']:.1f}ms gap={r['gap_ms']:.1f}ms")
+        max_stall_ms = args.max_stall_ms
+        if max_stall_ms is None:
+            max_stall_ms = (retry_interval_s(args.outage_ms / 1000.0) + 1.0 / args.rate) * 1000.0 + r["connect_ms"]
+        if not r["stall_ms"] <= max_stall_ms:
+            failures.append(f"{policy}: stall_ms={r['stall_ms']:.1f} > {max_stall_ms:.1f}")
+        if policy == REPLAY_ALL and (r["dropped"] or r["acked"] < r["sent"]):
+            failures.append(f"{policy}: {r['acked']} of {r['sent']} setpoints acked, {r['dropped']} dropped")
+    return benchlib.finish(failures, results, args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,88 @@
+# bench/seqtool_bench.py
+"""seqtool throughput against process count.
+
+Writes ``--files`` CSVs of ``--rows`` rows and runs ``seqtool.py validate``
+over the directory with 1, 2, 4, ... up to ``--max-jobs`` processes
+(default: the core count), reporting files/s and the speed-up over one
+process.  Up to the core count the checks have to scale, so every step up
+in processes must be faster than the one before.  That, or a missing or
+unreadable per-file report, prints FAIL and exits 1.
+
+Example (from src/):
+    python bench/seqtool_bench.py --files 200 --rows 5000
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import math
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import benchlib  # puts src/ on sys.path
+
+import seqtool
+
+
+def parse_args(argv: list[str] | None = None):
+    p = benchlib.parser("seqtool process-pool benchmark")
+    p.add_argument("--files", type=int, default=64)
+    p.add_argument("--rows", type=int, default=5000)
+    p.add_argument("--max-jobs", type=int, default=os.cpu_count() or 1)
+    return p.parse_args(argv)
+
+
+def write_csv(path: Path, rows: int, phase: float) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        f.write("pitch,roll,yaw,dt\n")
+        for i in range(rows):
+            t = i * 0.02 + phase
+            f.write(f"{10 * math.sin(t):.2f},{8 * math.sin(0.7 * t):.2f},{5 * math.cos(0.3 * t):.2f},0.02\n")
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    failures = []
+    results = []
+    jobs_list = []
+    jobs = 1
+    while jobs < args.max_jobs:
+        jobs_list.append(jobs)
+        jobs *= 2
+    jobs_list.append(args.max_jobs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "in"
+        src.mkdir()
+        for i in range(args.files):
+            write_csv(src / f"ride{i:04d}.csv", args.rows, phase=i)
+        base = prev = None
+        cores = os.cpu_count() or 1
+        for jobs in jobs_list:
+            reports = Path(tmp) / f"reports{jobs}"
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                seqtool.main(["validate", str(src), "--jobs", str(jobs), "-q", "--report-dir", str(reports)])
+            elapsed = time.perf_counter() - t0
+            written = list(reports.glob("*.json"))
+            intact = all("rows" in json.loads(p.read_text()) for p in written)
+            base = base or elapsed
+            results.append({"jobs": jobs, "seconds": elapsed, "files_per_s": args.files / elapsed,
+                            "speedup": base / elapsed, "reports": len(written)})
+            print(f"jobs={jobs:3d} {elapsed:7.2f} s {args.files / elapsed:8.1f} files/s "
+                  f"speed-up x{base / elapsed:.2f} reports={len(written)}")
+            if len(written) != args.files or not intact:
+                failures.append(f"jobs={jobs}: {len(written)} of {args.files} reports, intact={intact}")
+            if prev is not None and jobs <= cores and elapsed >= prev:
+                failures.append(f"jobs={jobs}: {elapsed:.2f} s, no faster than fewer processes ({prev:.2f} s)")
+            prev = elapsed
+
+    return benchlib.finish(failures, results, args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
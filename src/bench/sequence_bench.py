@@ -0,0 +1,172 @@
+# bench/sequence_bench.py
+"""Headless timing-accuracy benchmark for SequenceWorker.
+
+Writes synthetic sequences (angles + per-row dt) to a temp dir, runs
+``SequenceWorker.run()`` on the calling thread with a recording sink on
+``stepEmitted`` and reports:
+
+  drift     -- last step's wall-clock time minus its scheduled time
+  jitter    -- per-step |actual interval - row dt| (p50/p99/max)
+  cpu       -- process CPU time per row
+  memory    -- tracemalloc peak during playback
+
+Each metric has a ``--max-*`` threshold; any breach prints FAIL and the
+script exits 1, so it can gate CI.  Only the CPU time has a default: a row
+that costs more than the nominal dt could never be played in time.  Drift
+and jitter depend on the host's timer, so set them for the machine.
+
+Example (from src/):
+    python bench/sequence_bench.py --rows 1000,10000 --dt 0.002 --max-drift-ms 50
+    python bench/sequence_bench.py --rows 1000000 --dt 0 --no-memory
+"""
+
+from __future__ import annotations
+
+import math
+import tempfile
+import time
+import tracemalloc
+from array import array
+from pathlib import Path
+
+import benchlib  # puts src/ on sys.path
+
+from PySide6.QtCore import Qt
+
+from core.sequence import SequenceWorker
+
+
+def parse_args(argv: list[str] | None = None):
+    p = benchlib.parser("SequenceWorker timing benchmark")
+    p.add_argument("--rows", default="1000,10000",
+                   help="Comma-separated row counts (k/M suffixes allowed, e.g. 1k,1M)")
+    p.add_argument("--dt", type=float, default=0.002, help="Nominal per-row dt in seconds")
+    p.add_argument("--dt-jitter", type=float, default=0.5,
+                   help="Vary dt deterministically within +/- this fraction")
+    p.add_argument("--no-memory", action="store_true",
+                   help="Skip tracemalloc (it slows playback and skews timing)")
+    p.add_argument("--max-drift-ms", type=float, default=None)
+    p.add_argument("--max-jitter-p99-ms", type=float, default=None)
+    p.add_argument("--max-cpu-us-per-row", type=float, default=None, help="Default: the nominal dt")
+    p.add_argument("--max-peak-mb", type=float, default=None)
+    return p.parse_args(argv)
+
+
+def _parse_count(text: str) -> int:
+    text = text.strip().lower()
+    scale = 1
+    if text.endswith("k"):
+        scale, text = 1_000, text[:-1]
+    elif text.endswith("m"):
+        scale, text = 1_000_000, text[:-1]
+    return int(float(text) * scale)
+
+
+def write_synthetic(path: Path, rows: int, dt: float, dt_jitter: float) -> array:
+    """Write ``rows`` rows and return the per-row dt actually used."""
+    dts = array("d")
+    with path.open("w", newline="") as fh:
+        fh.write("pitch,roll,yaw,dt\n")  # header row, skipped by the worker
+        for i in range(rows):
+            t = i * 0.01
+            row_dt = dt * (1.0 + dt_jitter * math.sin(i * 0.37)) if dt > 0 else 0.0
+            dts.append(row_dt)
+            fh.write(f"{20 * math.sin(t):.3f},{15 * math.sin(0.7 * t):.3f},"
+                     f"{10 * math.cos(0.3 * t):.3f},{row_dt:.6f}\n")
+    return dts
+
+
+class RecordingSink:
+    """Stores the perf_counter time of each step in a preallocated array."""
+
+    def __init__(self, capacity: int):
+        self.times = array("d", bytes(8 * capacity))
+        self.count = 0
+
+    def __call__(self, setpoint) -> None:
+        if self.count < len(self.times):
+            self.times[self.count] = time.perf_counter()
+        self.count += 1
+
+
+def run_case(rows: int, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / f"synthetic_{rows}.csv"
+        dts = write_synthetic(path, rows, args.dt, args.dt_jitter)
+        sink = RecordingSink(rows)
+        worker = SequenceWorker(str(path), dt=args.dt)
+        worker.stepEmitted.connect(sink, Qt.DirectConnection)
+
+        if not args.no_memory:
+            tracemalloc.start()
+        cpu0 = time.process_time()
+        wall0 = time.perf_counter()
+        worker.run()
+        wall = time.perf_counter() - wall0
+        cpu = time.process_time() - cpu0
+        peak = 0
+        if not args.no_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    n = min(sink.count, rows)
+    times = sink.times
+    errors = [abs((times[i] - times[i - 1]) - dts[i - 1]) for i in range(1, n)]
+    scheduled_last = sum(dts[: n - 1]) if n else 0.0
+    drift = (times[n - 1] - times[0] - scheduled_last) if n else 0.0
+    return {
+        "rows": rows,
+        "steps": sink.count,
+        "wall_s": wall,
+        "scheduled_s": sum(dts),
+        "drift_ms": drift * 1000.0,
+        "jitter_p50_ms": benchlib.percentile(errors, 50) * 1000.0,
+        "jitter_p99_ms": benchlib.percentile(errors, 99) * 1000.0,
+        "jitter_max_ms": max(errors, default=0.0) * 1000.0,
+        "cpu_s": cpu,
+        "cpu_us_per_row": cpu / max(1, rows) * 1e6,
+        "peak_mb": peak / (1024 * 1024),
+    }
+
+
+def check_thresholds(result: dict, args) -> list[str]:
+    failures = []
+    max_cpu = args.max_cpu_us_per_row
+    if max_cpu is None and args.dt > 0:
+        max_cpu = args.dt * 1e6
+    checks = (
+        ("drift_ms", args.max_drift_ms, abs(result["drift_ms"])),
+        ("jitter_p99_ms", args.max_jitter_p99_ms, result["jitter_p99_ms"]),
+        ("cpu_us_per_row", max_cpu, result["cpu_us_per_row"]),
+        ("peak_mb", args.max_peak_mb, result["peak_mb"]),
+    )
+    for name, limit, value in checks:
+        if limit is not None and value > limit:
+            failures.append(f"{name}={value:.3f} > {limit}")
+    if result["steps"] != result["rows"]:
+        failures.append(f"steps={result['steps']} != rows={result['rows']}")
+    return failures
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    results = []
+    failures = []
+    for text in args.rows.split(","):
+        if not text.strip():
+            continue
+        result = run_case(_parse_count(text), args)
+        result["failures"] = check_thresholds(result, args)
+        results.append(result)
+        print(
+            f"rows={result['rows']:>8} wall={result['wall_s']:8.3f}s sched={result['scheduled_s']:8.3f}s "
+            f"drift={result['drift_ms']:8.2f}ms jitter p50/p99/max="
+            f"{result['jitter_p50_ms']:.2f}/{result['jitter_p99_ms']:.2f}/{result['jitter_max_ms']:.2f}ms "
+            f"cpu={result['cpu_us_per_row']:.1f}us/row peak={result['peak_mb']:.2f}MB"
+        )
+        failures += [f"rows={result['rows']}: {failure}" for failure in result["failures"]]
+    return benchlib.finish(failures, results, args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
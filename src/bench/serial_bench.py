@@ -0,0 +1,185 @@
+# bench/serial_bench.py
+"""Throughput benchmark for ArduinoWorker against the virtual serial board.
+
+Runs without hardware (see core/sim.py) and reports commands/s, ack latency
+percentiles and queue depth for three workloads:
+
+  gamepad   -- steady 60 Hz stream, like ControllerWorker.anglesChanged
+  sequence  -- steady stream at 1/dt, like SequenceWorker.stepEmitted
+  burst     -- N commands enqueued at once
+
+With ``--rigs N`` (N > 1) the same workloads are broadcast through a
+RigManager to N virtual boards, and thread count / CPU time are reported
+so per-seat overhead can be compared (the thread count includes one
+emulated-board thread per rig; the host side adds a single I/O thread).
+
+Example (from src/):
+    python bench/serial_bench.py --protocol double_actuator --ack DONE
+    python bench/serial_bench.py --ack DONE --rigs 8
+"""
+
+from __future__ import annotations
+
+import math
+import sys
+import threading
+import time
+
+import benchlib
+
+from PySide6.QtCore import Qt
+
+from core.arduino import ArduinoWorker
+from core.latency import LATENCY
+from core.rigs import RigConfig, RigManager
+from core.sim import FIRMWARES, sim_factory
+
+
+def parse_args(argv: list[str] | None = None):
+    p = benchlib.parser("ArduinoWorker loopback benchmark")
+    p.add_argument("--protocol", choices=sorted(FIRMWARES), default="double_actuator")
+    p.add_argument("--workloads", default="gamepad,sequence,burst",
+                   help="Comma-separated subset of gamepad,sequence,burst")
+    p.add_argument("--duration", type=float, default=5.0, help="Seconds per streaming workload")
+    p.add_argument("--seq-dt", type=float, default=0.05, help="Row interval for the sequence workload")
+    p.add_argument("--burst", type=int, default=200, help="Commands in the burst workload")
+    p.add_argument("--drain", type=float, default=10.0, help="Max seconds to wait for the queue to drain")
+    p.add_argument("--parse-delay", type=float, default=0.002, help="Firmware per-command cost (s)")
+    p.add_argument("--parse-timeout", type=float, default=None, help="Firmware Serial.setTimeout (s)")
+    p.add_argument("--motion-scale", type=float, default=0.05,
+                   help="Scale factor for firmware motion/reset delays (1.0 = real time)")
+    p.add_argument("--ack", type=str, default="", help="Ack line the firmware prints per command")
+    p.add_argument("--rigs", type=int, default=1, help="Broadcast to this many virtual rigs via RigManager")
+    return p.parse_args(argv)
+
+
+def queue_depth(worker) -> int:
+    if isinstance(worker, RigManager):
+        return sum(len(link.pending) for link in worker._links)
+    return worker._cmd_q.qsize()
+
+
+class _QueueSampler(threading.Thread):
+    def __init__(self, worker, period: float = 0.005):
+        super().__init__(daemon=True)
+        self._worker = worker
+        self._period = period
+        self._halt = threading.Event()
+        self.samples: list[int] = []
+
+    def run(self):
+        while not self._halt.wait(self._period):
+            self.samples.append(queue_depth(self._worker))
+
+    def stop(self):
+        self._halt.set()
+        self.join(1.0)
+
+
+def _angles(i: int) -> tuple[float, float, float]:
+    t = i * 0.05
+    return 20.0 * math.sin(t), 15.0 * math.sin(0.7 * t), 10.0 * math.cos(0.3 * t)
+
+
+def run_workload(name: str, args) -> dict:
+    firmware_kwargs = {"parse_delay": args.parse_delay, "motion_scale": args.motion_scale,
+                       "ack": args.ack or None}
+    if args.parse_timeout is not None:
+        firmware_kwargs["parse_timeout"] = args.parse_timeout
+    factory = sim_factory(args.protocol, **firmware_kwargs)
+    baud = FIRMWARES[args.protocol].baud
+    if args.rigs > 1:
+        worker = RigManager([RigConfig(port=f"sim://{args.protocol}/{i}", baud=baud) for i in range(args.rigs)],
+                            serial_factory=factory)
+    else:
+        worker = ArduinoWorker(preferred_port=f"sim://{args.protocol}", baud=baud, serial_factory=factory)
+    acks = []
+    # no event loop here, so deliver acks on the pump thread
+    worker.ack.connect(acks.append, Qt.DirectConnection)
+    worker.start()
+    deadline = time.monotonic() + 15.0
+    while not worker.ready and time.monotonic() < deadline:
+        time.sleep(0.01)  # commands are held until every board has sent READY
+
+    LATENCY.reset()
+    cpu0 = time.process_time()
+    sampler = _QueueSampler(worker)
+    sampler.start()
+    offered = 0
+    t0 = time.perf_counter()
+    if name == "burst":
+        for i in range(args.burst):
+            worker.send_angles(*_angles(i))
+            offered += 1
+    else:
+        period = 1.0 / 60.0 if name == "gamepad" else args.seq_dt
+        next_t = t0
+        while time.perf_counter() - t0 < args.duration:
+            worker.send_angles(*_angles(offered))
+            offered += 1
+            next_t += period
+            time.sleep(max(0.0, next_t - time.perf_counter()))
+    offer_end = time.perf_counter()
+
+    drain_deadline = offer_end + args.drain
+    while time.perf_counter() < drain_deadline:
+        if LATENCY.total.count + LATENCY.dropped >= offered:
+            break
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+    threads = threading.active_count()
+    sampler.stop()
+    worker.stop()
+
+    snap = LATENCY.snapshot()
+    completed = snap["total"]["count"]
+    depth = sampler.samples or [0]
+    return {
+        "workload": name,
+        "offered": offered,
+        "offered_per_s": offered / max(1e-9, offer_end - t0),
+        "completed": completed,
+        "acked": len(acks),
+        "backlog": queue_depth(worker),
+        "commands_per_s": completed / max(1e-9, elapsed),
+        "ack_latency": snap["ack"],
+        "queue_wait": snap["dequeue"],
+        "end_to_end": snap["total"],
+        "queue_depth_max": max(depth),
+        "queue_depth_mean": sum(depth) / len(depth),
+        "rigs": args.rigs,
+        "threads": threads,
+        "cpu_s": cpu,
+    }
+
+
+def format_result(r: dict) -> str:
+    ack = r["ack_latency"]
+    e2e = r["end_to_end"]
+    return (
+        f"{r['workload']:<9} offered={r['offered']:>5} ({r['offered_per_s']:6.1f}/s) "
+        f"done={r['completed']:>5} acked={r['acked']:>5} backlog={r['backlog']:>5} "
+        f"rate={r['commands_per_s']:7.1f}/s | ack p50/p95/p99 = "
+        f"{ack['p50_ms']:.1f}/{ack['p95_ms']:.1f}/{ack['p99_ms']:.1f} ms | "
+        f"e2e p50/p99 = {e2e['p50_ms']:.1f}/{e2e['p99_ms']:.1f} ms | "
+        f"queue max/mean = {r['queue_depth_max']}/{r['queue_depth_mean']:.1f} | "
+        f"rigs={r['rigs']} threads={r['threads']} cpu={r['cpu_s']:.2f}s"
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    results = []
+    for name in [w.strip() for w in args.workloads.split(",") if w.strip()]:
+        if name not in ("gamepad", "sequence", "burst"):
+            print(f"Unknown workload: {name}", file=sys.stderr)
+            return 2
+        result = run_workload(name, args)
+        results.append(result)
+        print(format_result(result))
+    return benchlib.finish([], results, args.json)  # a report: nothing here has a pass mark
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
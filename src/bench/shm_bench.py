@@ -0,0 +1,215 @@
+# bench/shm_bench.py
+"""Shared-memory setpoint ring: handoff latency against UDP, and torn reads.
+
+``bench`` runs a producer in a separate process streaming ``--rate``
+setpoints per second, once into a :class:`SetpointRing` read by an
+:class:`ShmInputWorker` and once as UDP packets to a
+:class:`NetInputWorker`, both in this process with a recording sink.
+Reported per path:
+
+  latency   -- write/sendto -> sink call, p50/p99/max (us); the ring's p99
+               must stay within one reader poll period (POLL_S, or
+               ``--max-p99-us``), and with no socket in the way its p50
+               must beat UDP's
+  counts    -- delivered / coalesced; the last setpoint written must be the
+               last one delivered
+
+``--stress`` then has the producer write as fast as it can into a
+``--stress-slots`` ring, so it laps the reader all the time: every
+delivered setpoint must be whole (its channels agree with each other) and
+newer than the one before.  A torn or out-of-order setpoint, a lost final
+setpoint or a slow handoff prints FAIL and exits 1.
+
+``send`` streams a sine wave into a running app's ring (``app.py --shm``).
+
+Examples (from src/):
+    python bench/shm_bench.py bench --rate 1000 --seconds 5
+    python bench/shm_bench.py send --rate 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import multiprocessing as mp
+import socket
+import sys
+import threading
+import time
+
+import benchlib  # puts src/ on sys.path
+
+from core.netinput import NetInputWorker, encode_packet
+from core.shm import DEFAULT_NAME, POLL_S, SetpointRing, ShmInputWorker
+
+RING_NAME = "motionsim_shm_bench"
+
+
+def parse_args(argv: list[str] | None = None):
+    p = argparse.ArgumentParser(description="Shared-memory setpoint ring benchmark / local producer")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("bench", help="Producer process -> ring / UDP -> in-process reader")
+    b.add_argument("--rate", type=float, default=1000.0, help="Setpoints per second")
+    b.add_argument("--seconds", type=float, default=3.0)
+    b.add_argument("--max-p99-us", type=float, default=POLL_S * 1e6, help="Default: one reader poll period")
+    b.add_argument("--stress", type=int, default=200000, help="Unpaced writes for the torn-read check (0 = skip)")
+    b.add_argument("--stress-slots", type=int, default=4)
+    benchlib.add_json(b)
+
+    s = sub.add_parser("send", help="Stream a sine wave into a running app's ring")
+    s.add_argument("--name", default=DEFAULT_NAME)
+    s.add_argument("--rate", type=float, default=500.0)
+    s.add_argument("--seconds", type=float, default=0.0, help="0 = until Ctrl+C")
+    s.add_argument("--amplitude", type=float, default=10.0)
+    return p.parse_args(argv)
+
+
+def _setpoint(i: int) -> list:
+    """Channel 0 carries the index; the others are derived from it, so a torn read shows."""
+    return [float(i), -2.0 * i, 0.5 * i]
+
+
+def _produce(kind: str, target, rate: float, total: int, out) -> None:
+    """Producer process: ``total`` setpoints at ``rate`` (0 = unpaced); send times go to ``out``."""
+    if kind == "shm":
+        ring = SetpointRing.attach(target)
+        send = ring.write
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        def send(sp):
+            sock.sendto(encode_packet(int(sp[0]), sp), target)
+    sent_ns = [0] * total
+    t0 = time.perf_counter()
+    for i in range(total):
+        if rate > 0:
+            target_t = t0 + i / rate
+            while True:
+                remaining = target_t - time.perf_counter()
+                if remaining <= 0:
+                    break
+                time.sleep(remaining if remaining > 0.002 else 0)
+        sent_ns[i] = time.perf_counter_ns()
+        send(_setpoint(i))
+    out.put(sent_ns if rate > 0 else [])
+    if kind == "shm":
+        ring.close()
+
+
+class RecordingSink:
+    def __init__(self):
+        self.got: list[tuple[int, list]] = []
+
+    def __call__(self, setpoint) -> None:
+        self.got.append((time.perf_counter_ns(), list(setpoint)))
+
+
+def run_path(kind: str, rate: float, total: int, slots: int = 64) -> dict:
+    sink = RecordingSink()
+    if kind == "shm":
+        worker = ShmInputWorker(sink, name=RING_NAME, slots=slots)
+        if not worker.open():
+            raise SystemExit("could not create the ring")
+        target = RING_NAME
+    else:
+        worker = NetInputWorker(sink, host="127.0.0.1", port=0)
+        if not worker.bind():
+            raise SystemExit("bind failed")
+        target = worker.address
+    listener = threading.Thread(target=worker.start, daemon=True)
+    listener.start()
+    time.sleep(0.05)
+
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    producer = ctx.Process(target=_produce, args=(kind, target, rate, total, out))
+    producer.start()
+    sent_ns = out.get()
+    producer.join()
+    deadline = time.monotonic() + 2.0
+    while (not sink.got or sink.got[-1][1][0] != total - 1) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    worker.stop()
+    listener.join(2.0)
+
+    torn = sum(1 for _, sp in sink.got if sp[1] != -2.0 * sp[0] or sp[2] != 0.5 * sp[0])
+    order = [sp[0] for _, sp in sink.got]
+    backwards = sum(1 for a, b in zip(order, order[1:]) if b <= a)
+    lat = sorted((t - sent_ns[int(sp[0])]) / 1000.0 for t, sp in sink.got) if sent_ns else []
+    return {
+        "written": total,
+        "delivered": worker.delivered,
+        "coalesced": getattr(worker, "coalesced", total - worker.delivered),
+        "retried_reads": getattr(worker, "torn", 0),
+        "torn": torn,
+        "backwards": backwards,
+        "last": int(order[-1]) if order else -1,
+        "p50_us": benchlib.percentile(lat, 50),
+        "p99_us": benchlib.percentile(lat, 99),
+        "max_us": lat[-1] if lat else 0.0,
+    }
+
+
+def run_bench(args) -> int:
+    failures = []
+    results = {}
+    total = int(args.rate * args.seconds)
+    for kind in ("shm", "udp"):
+        r = run_path(kind, args.rate, total)
+        results[kind] = r
+        print(f"{kind:<4} p50/p99/max = {r['p50_us']:7.1f}/{r['p99_us']:7.1f}/{r['max_us']:8.1f} us  "
+              f"delivered={r['delivered']}/{r['written']} coalesced={r['coalesced']} last={r['last']}")
+        if r["last"] != total - 1:
+            failures.append(f"{kind}: last delivered setpoint {r['last']}, written {total - 1}")
+    if results["shm"]["p99_us"] > args.max_p99_us:
+        failures.append(f"shm p99 {results['shm']['p99_us']:.1f} us > {args.max_p99_us:g}")
+    if results["shm"]["p50_us"] >= results["udp"]["p50_us"]:
+        failures.append(f"shm p50 {results['shm']['p50_us']:.1f} us, no faster than UDP's "
+                        f"{results['udp']['p50_us']:.1f}")
+
+    if args.stress:
+        t0 = time.perf_counter()
+        r = run_path("shm", 0.0, args.stress, slots=args.stress_slots)
+        results["stress"] = r
+        print(f"stress {args.stress} unpaced writes into {args.stress_slots} slots in "
+              f"{time.perf_counter() - t0:.2f} s: delivered={r['delivered']} retried reads={r['retried_reads']} "
+              f"torn={r['torn']} out of order={r['backwards']} last={r['last']}")
+        if r["torn"] or r["backwards"]:
+            failures.append(f"stress: {r['torn']} torn / {r['backwards']} out-of-order setpoints delivered")
+        if r["last"] != args.stress - 1:
+            failures.append(f"stress: last delivered setpoint {r['last']}, written {args.stress - 1}")
+
+    return benchlib.finish(failures, results, args.json)
+
+
+def run_send(args) -> int:
+    try:
+        ring = SetpointRing.attach(args.name)
+    except FileNotFoundError:
+        print(f"no ring named {args.name}; is the app running with --shm?", file=sys.stderr)
+        return 1
+    print(f"streaming into {args.name} at {args.rate:g}/s (Ctrl+C to stop)")
+    t0 = time.perf_counter()
+    i = 0
+    try:
+        while args.seconds <= 0 or i < args.rate * args.seconds:
+            t = i / args.rate
+            ring.write([args.amplitude * math.sin(2 * math.pi * (0.2 + 0.1 * c) * t) for c in range(3)])
+            i += 1
+            time.sleep(max(0.0, t0 + i / args.rate - time.perf_counter()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.close()
+    print(f"sent {i} setpoints")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    return run_bench(args) if args.cmd == "bench" else run_send(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,172 @@
+# bench/speed_bench.py
+"""Playback speed: duration, velocity cap and a live change.
+
+Two parts:
+
+  offline   -- core.timescale.ScaledPlayback over a gentle and a brisk
+               ride of actuator inches (peak ``--gentle-ips`` /
+               ``--brisk-ips``, capped at the firmware's MAX_SPEED_IPS) and
+               a GUI ride of pitch/roll/yaw degrees (``--deg-amp`` sine,
+               capped at MotionLimits.max_vel) at each ``--speeds`` factor:
+               planned duration against duration/speed, step count and the
+               fastest step.  1x must reproduce the rows exactly; no step
+               may beat the ride's cap unless the ride itself does at 1x,
+               and a sped-up ride that stays under its cap must not be
+               stretched at all
+  live      -- the gentle ride through PlaybackEngine and SequenceWorker
+               in real time, switched from 1x to ``--live-speed`` halfway
+               through; wall time against the ideal, off by at most the
+               one row already playing when the speed changed
+
+A wrong duration, an over-speed step or a live change that does not take
+prints FAIL and exits 1.
+
+Example (from src/):
+    python bench/speed_bench.py --speeds 0.25,0.5,2,4
+"""
+
+from __future__ import annotations
+
+import math
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import benchlib  # puts src/ on sys.path
+
+from PySide6.QtCore import Qt
+
+from core.limits import MAX_SPEED_IPS, MotionLimits
+from core.playback import PlaybackEngine
+from core.sequence import SequenceWorker, load_sequence
+from core.timescale import ScaledPlayback
+
+CHANNELS = 4  # pos1, pos2, pos3, move time: the double_actuator line
+DEG_CHANNELS = 3  # pitch, roll, yaw: what the GUI plays
+ROW_DT = 0.1
+DEG_W = 0.5  # rad/s
+
+
+def parse_args(argv: list[str] | None = None):
+    p = benchlib.parser("Playback speed benchmark")
+    p.add_argument("--speeds", type=str, default="0.25,0.5,2,4")
+    p.add_argument("--rows", type=int, default=60)
+    p.add_argument("--gentle-ips", type=float, default=0.4)
+    p.add_argument("--brisk-ips", type=float, default=1.5)
+    p.add_argument("--deg-amp", type=float, default=20.0, help="Degrees; the ride peaks at amp * 0.5 deg/s")
+    p.add_argument("--live-speed", type=float, default=4.0)
+    p.add_argument("--max-live-error-ms", type=float, default=ROW_DT * 1000.0, help="Default: one row dt")
+    return p.parse_args(argv)
+
+
+def write_csv(path: Path, rows: int, peak_ips: float) -> Path:
+    """A sine around mid-stroke whose fastest stretch moves at ``peak_ips``."""
+    w = 1.0  # rad/s
+    amp = peak_ips / w
+    with path.open("w", encoding="utf-8") as f:
+        f.write("pos1,pos2,pos3,time\n")
+        for i in range(rows):
+            t = i * ROW_DT
+            f.write(f"{6 + amp * math.sin(w * t):.4f},{6 + amp * math.cos(w * t):.4f},0,{ROW_DT}\n")
+    return path
+
+
+def write_deg_csv(path: Path, rows: int, amp: float) -> Path:
+    """Pitch and roll sines of ``amp`` degrees, as the GUI's presets are."""
+    with path.open("w", encoding="utf-8") as f:
+        f.write("pitch,roll,yaw,dt\n")
+        for i in range(rows):
+            t = i * ROW_DT
+            f.write(f"{amp * math.sin(DEG_W * t):.4f},{amp * math.cos(DEG_W * t):.4f},0,{ROW_DT}\n")
+    return path
+
+
+def _peak(pairs) -> float:
+    peak = 0.0
+    for (a, dt), (b, _) in zip(pairs, pairs[1:]):
+        if dt > 0:
+            peak = max(peak, max(abs(y - x) for x, y in zip(a, b)) / dt)
+    return peak
+
+
+def bench_offline(rides: dict, speeds, failures: list) -> list:
+    results = []
+    for name, (setpoints, dts, max_vel) in rides.items():
+        # None: ScaledPlayback's own default, which must be the GUI's degree limit
+        kw = {} if max_vel is None else {"max_vel": max_vel}
+        max_vel = MotionLimits.max_vel if max_vel is None else max_vel
+        base = _peak(list(zip(setpoints, dts)))
+        cap = max(max_vel, base)
+        duration = sum(dts[:-1])
+        same = list(ScaledPlayback(setpoints, dts, **kw))
+        if len(same) != len(setpoints) or any(list(a) != list(b) or d != e
+                                                for (a, d), b, e in zip(same, setpoints, dts)):
+            failures.append(f"{name}: 1x does not reproduce the rows")
+        for speed in speeds:
+            timeline = ScaledPlayback(setpoints, dts, speed=lambda s=speed: s, **kw)
+            pairs = list(timeline)
+            planned = sum(dt for _, dt in pairs[:-1])
+            peak = _peak(pairs)
+            ideal = duration / speed
+            print(f"{name:<6} x{speed:<5g} steps={len(pairs):4d} planned={planned:6.2f} s "
+                  f"(ideal {ideal:6.2f}) peak={peak:.2f}/s (1x {base:.2f}, cap {max_vel:g}) "
+                  f"stretched={timeline.limited}")
+            results.append({"ride": name, "speed": speed, "steps": len(pairs), "planned_s": planned,
+                            "ideal_s": ideal, "peak": peak, "cap": max_vel, "stretched": timeline.limited})
+            if peak > cap + 1e-6:
+                failures.append(f"{name} x{speed:g}: step at {peak:.2f}/s > {cap:.2f}")
+            if timeline.limited and speed * base < max_vel - 1e-6:
+                failures.append(f"{name} x{speed:g}: {timeline.limited} steps stretched, "
+                                f"but x{speed:g} peaks at {speed * base:.2f}/s < {max_vel:g}")
+            if list(pairs[-1][0]) != list(setpoints[-1]):
+                failures.append(f"{name} x{speed:g}: does not end on the last row")
+            if not timeline.limited and abs(planned - ideal) > 1e-6:
+                failures.append(f"{name} x{speed:g}: planned {planned:.3f} s, expected {ideal:.3f}")
+            if timeline.limited and not (ideal < planned < duration):
+                failures.append(f"{name} x{speed:g}: stretched ride takes {planned:.3f} s")
+    return results
+
+
+def bench_live(path: Path, speed: float, args, failures: list) -> dict:
+    done = threading.Event()
+    engine = PlaybackEngine(lambda p, rows, t0: SequenceWorker(str(p), rows=rows), channels=CHANNELS,
+                            max_vel=MAX_SPEED_IPS)
+    engine.idle.connect(done.set, Qt.DirectConnection)
+    setpoints, dts = load_sequence(path, ROW_DT, CHANNELS)
+    duration = sum(dts)
+    engine.start()
+    engine.load(path, ROW_DT).result()
+    t0 = time.perf_counter()
+    engine.play(path, ROW_DT)
+    time.sleep(duration / 2)
+    engine.set_speed(speed)
+    done.wait(duration + 5.0)
+    wall = time.perf_counter() - t0
+    engine.stop()
+    ideal = duration / 2 + duration / 2 / speed
+    print(f"live   1x -> x{speed:g} halfway: {wall:.2f} s (ideal {ideal:.2f}, all at 1x {duration:.2f})")
+    if abs(wall - ideal) * 1000.0 > args.max_live_error_ms:
+        failures.append(f"live speed change: {wall:.2f} s, expected {ideal:.2f} +/- {args.max_live_error_ms:g} ms")
+    return {"wall_s": wall, "ideal_s": ideal}
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    speeds = [float(s) for s in args.speeds.split(",") if s.strip()]
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        gentle = write_csv(tmp / "gentle.csv", args.rows, args.gentle_ips)
+        brisk = write_csv(tmp / "brisk.csv", args.rows, args.brisk_ips)
+        degrees = write_deg_csv(tmp / "degrees.csv", args.rows * 4, args.deg_amp)
+        rides = {"gentle": (*load_sequence(gentle, ROW_DT, CHANNELS), MAX_SPEED_IPS),
+                 "brisk": (*load_sequence(brisk, ROW_DT, CHANNELS), MAX_SPEED_IPS),
+                 "deg": (*load_sequence(degrees, ROW_DT, DEG_CHANNELS), None)}
+        results = {"offline": bench_offline(rides, speeds, failures),
+                   "live": bench_live(gentle, args.live_speed, args, failures)}
+    return benchlib.finish(failures, results, args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,171 @@
+# bench/stream_bench.py
+"""Sequence playback: one step per round trip vs. streamed keyframes.
+
+Plays ``--rows`` steps of ``--dt`` through SequenceWorker and ArduinoWorker
+to a virtual double_actuator board running moves in real time, with the
+producer stalling ``--hiccup-ms`` every ``--hiccup-every`` steps (a busy
+GUI thread).  Modes:
+
+  step      -- SequenceWorker sleeps dt and sends each step; the board
+               runs it when it arrives
+  keyframe  -- SequenceWorker streams K frames ``--lead-ms`` ahead and the
+               board runs them on its own clock
+
+Reports the dead time between the end of one move and the start of the
+next as the board saw it (p50/p99/max) and how far the ride ran over its
+scheduled length.  In keyframe mode every step must run, in order, and
+the hiccups must not reach the board: no underruns while ``--lead-ms``
+covers a stall, and p99 dead time under the stall itself
+(``--max-gap-p99-ms`` overrides).  Otherwise the script prints FAIL and
+exits 1.
+
+Example (from src/):
+    python bench/stream_bench.py --rows 8 --dt 1 --hiccup-ms 60
+"""
+
+from __future__ import annotations
+
+import math
+import tempfile
+import time
+from pathlib import Path
+
+import benchlib  # puts src/ on sys.path
+
+from PySide6.QtCore import Qt
+
+from core.arduino import ArduinoWorker
+from core.sequence import SequenceWorker
+from core.sim import DoubleActuatorFirmware, sim_factory
+
+CHANNELS = 4  # pos1, pos2, pos3, move time: the double_actuator line
+
+
+class _Hiccups:
+    """Forwards to the worker, stalling the caller now and then."""
+
+    def __init__(self, worker, every: int, stall_s: float):
+        self._worker = worker
+        self._every = every
+        self._stall = stall_s
+        self._n = 0
+
+    def __getattr__(self, name):
+        return getattr(self._worker, name)
+
+    def _tick(self):
+        self._n += 1
+        if self._every and self._n % self._every == 0:
+            time.sleep(self._stall)
+
+    def send_setpoint(self, setpoint, trace=None):
+        self._tick()
+        self._worker.send_setpoint(setpoint, trace)
+
+    def stream_keyframe(self, setpoint, t_s, dur_s, trace=None):
+        self._tick()
+        self._worker.stream_keyframe(setpoint, t_s, dur_s, trace)
+
+
+def parse_args(argv: list[str] | None = None):
+    p = benchlib.parser("Keyframe streaming benchmark")
+    p.add_argument("--rows", type=int, default=8)
+    p.add_argument("--dt", type=float, default=1.0,
+                   help="Seconds per row; whole seconds, as the plain line truncates its move time")
+    p.add_argument("--lead-ms", type=float, default=500.0)
+    p.add_argument("--hiccup-ms", type=float, default=60.0)
+    p.add_argument("--hiccup-every", type=int, default=3)
+    p.add_argument("--max-gap-p99-ms", type=float, default=None, help="Default: --hiccup-ms")
+    return p.parse_args(argv)
+
+
+def write_sequence(path: Path, rows: int, dt: float) -> list:
+    targets = []
+    with path.open("w", encoding="utf-8") as f:
+        for i in range(rows):
+            # whole inches (the wire format truncates), a real move every step
+            p1 = 6 + ((i % 2) * 2 - 1) * (1 + i % 2)
+            p2 = 6 + round(2 * math.sin(i))
+            targets.append((float(p1), float(p2)))
+            f.write(f"{p1},{p2},0,{dt},{dt}\n")
+    return targets
+
+
+def run(mode: str, csv_path: Path, targets: list, args) -> dict:
+    fw = DoubleActuatorFirmware(motion_scale=1.0)
+    fw.RESET_S = 0.0
+    factory = sim_factory("double_actuator")
+    factory.boards["SIM0"] = fw
+    worker = ArduinoWorker(preferred_port="SIM0", baud=fw.baud, serial_factory=factory,
+                           keepalive_s=0.0, stream_lead_s=args.lead_ms / 1000.0)
+    worker.start()
+    deadline = time.monotonic() + 5.0
+    while not worker.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    sink = _Hiccups(worker, args.hiccup_every, args.hiccup_ms / 1000.0)
+    if mode == "step":
+        seq = SequenceWorker(str(csv_path), dt=args.dt, channels=CHANNELS)
+        seq.stepEmitted.connect(sink.send_setpoint, Qt.DirectConnection)
+    else:
+        seq = SequenceWorker(str(csv_path), dt=args.dt, channels=CHANNELS, stream=sink)
+    errors = []
+    seq.error.connect(errors.append, Qt.DirectConnection)
+    t0 = time.monotonic()
+    seq.run()
+    # let the board finish what it has queued
+    deadline = time.monotonic() + args.rows * args.dt + 3.0
+    while time.monotonic() < deadline and (len(fw.moves) < len(targets) or fw._move is not None):
+        time.sleep(0.01)
+    worker.stop()
+
+    moves = fw.moves
+    gaps = [max(0.0, (b[0] - (a[0] + a[3])) * 1000.0) for a, b in zip(moves, moves[1:])]
+    ride = (moves[-1][0] + moves[-1][3] - moves[0][0]) if moves else 0.0
+    ran = [(round(m[1], 2), round(m[2], 2)) for m in moves]
+    return {
+        "mode": mode,
+        "moves": len(moves),
+        "gap_p50_ms": benchlib.percentile(gaps, 50),
+        "gap_p99_ms": benchlib.percentile(gaps, 99),
+        "gap_max_ms": max(gaps, default=0.0),
+        "overrun_ms": (ride - len(targets) * args.dt) * 1000.0,
+        "underruns": fw.underruns,
+        "in_order": ran == targets,
+        "host_s": time.monotonic() - t0,
+        "errors": errors,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "seq.csv"
+        targets = write_sequence(csv_path, args.rows, args.dt)
+        results = [run(mode, csv_path, targets, args) for mode in ("step", "keyframe")]
+
+    failures = []
+    for r in results:
+        print(f"{r['mode']:<9} moves={r['moves']:4d} gap p50/p99/max = {r['gap_p50_ms']:.1f}/"
+              f"{r['gap_p99_ms']:.1f}/{r['gap_max_ms']:.1f} ms overrun={r['overrun_ms']:+.0f} ms "
+              f"underruns={r['underruns']}")
+        for err in r["errors"]:
+            print(f"  {err}")
+    kf = results[-1]
+    if not kf["in_order"]:
+        failures.append(f"keyframe mode ran {kf['moves']} of {args.rows} steps or out of order")
+    if kf["errors"]:
+        failures.append("keyframe mode fell back to one step at a time")
+    stalls = args.hiccup_every > 0 and args.hiccup_ms > 0
+    max_gap = args.max_gap_p99_ms
+    if max_gap is None and stalls:
+        max_gap = args.hiccup_ms
+    if max_gap is not None and kf["gap_p99_ms"] >= max_gap:
+        failures.append(f"keyframe gap_p99_ms={kf['gap_p99_ms']:.1f}, not under {max_gap:g}")
+    if stalls and args.lead_ms > args.hiccup_ms and kf["underruns"]:
+        failures.append(f"keyframe queue ran dry {kf['underruns']} times with {args.lead_ms:g} ms of lead")
+    return benchlib.finish(failures, results, args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+# bench/telemetry_bench.py
+"""Chunked telemetry import: memory against log size, and throughput.
+
+Writes two wide logger exports (``--columns`` columns, a millisecond time
+column with jitter, a few blank cells) of ``--rows`` and ten times as
+many rows, and imports each through core.telemetry.import_log with a
+column map that picks six of the columns, once plain and once through
+the washout filter.  For every run:
+
+  peak    -- tracemalloc peak of the import; memory has to be flat in
+             file size, so the big log's may exceed the small log's by
+             less than one chunk of log text (``--chunk-rows`` rows), the
+             most a chunked reader should ever hold
+  rate    -- rows read per second and MB/s of log
+  rows    -- output rows against the log's duration / ``--step``
+
+A peak that grows with the log, a wrong row count or an unreadable
+output prints FAIL and exits 1.
+
+Example (from src/):
+    python bench/telemetry_bench.py --rows 50000 --columns 60
+"""
+
+from __future__ import annotations
+
+import csv
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import benchlib  # puts src/ on sys.path
+
+from core.cueing import CueingParams
+from core.telemetry import CHUNK_ROWS, ColumnMap, import_log
+
+LOG_MS = 10  # nominal sample spacing of the log
+MAP = {"time": "Time_ms", "time_scale": 0.001,
+       "columns": {"ax": "LongAccel", "ay": {"source": "LatAccel_g", "scale": 9.80665},
+                   "az": "VertAccel", "p": "RollRate", "q": "PitchRate", "r": "YawRate"}}
+
+
+def parse_args(argv: list[str] | None = None):
+    p = benchlib.parser("Chunked telemetry import benchmark")
+    p.add_argument("--rows", type=int, default=20000, help="small log; the big one has 10x")
+    p.add_argument("--columns", type=int, default=40)
+    p.add_argument("--step", type=float, default=0.02)
+    p.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS // 8)
+    return p.parse_args(argv)
+
+
+def write_log(path: Path, rows: int, columns: int) -> float:
+    """A logger-style export; returns its duration in seconds."""
+    rng = random.Random(11)
+    mapped = [c["source"] if isinstance(c, dict) else c for c in MAP["columns"].values()]
+    header = ["Time_ms"] + [f"Channel{i:03d}" for i in range(columns - len(mapped) - 1)]
+    header[5:5] = mapped
+    t_ms = 0.0
+    with path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for i in range(rows):
+            t_ms = i * LOG_MS + rng.uniform(-2.0, 2.0)
+            row = [f"{t_ms:.3f}"] + [f"{rng.gauss(0.0, 1.0):.5f}" for _ in header[1:]]
+            if i % 997 == 0:
+                row[6] = ""  # a dropout in a mapped column
+            writer.writerow(row)
+    return t_ms / 1000.0
+
+
+def run(log: Path, out: Path, mapping: ColumnMap, step: float, cue, chunk_rows: int) -> dict:
+    """Timed once as is, then again under tracemalloc for the peak (tracing slows it down)."""
+    t0 = time.perf_counter()
+    import_log(log, out, mapping, step, cue=cue, chunk_rows=chunk_rows)
+    seconds = time.perf_counter() - t0
+    tracemalloc.start()
+    report = import_log(log, out, mapping, step, cue=cue, chunk_rows=chunk_rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    report.update({"seconds": seconds, "peak_bytes": peak, "log_bytes": log.stat().st_size})
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    failures = []
+    results = {}
+    mapping = ColumnMap.from_dict(MAP)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for mode, cue in (("plain", None), ("cued", CueingParams())):
+            peaks, row_bytes = [], 0.0
+            for rows in (args.rows, 10 * args.rows):
+                log = tmp / f"log{rows}.csv"
+                if not log.exists():
+                    duration = write_log(log, rows, args.columns)
+                    (tmp / f"log{rows}.dur").write_text(repr(duration))
+                duration = float((tmp / f"log{rows}.dur").read_text())
+                out = tmp / f"out_{mode}_{rows}.csv"
+                r = run(log, out, mapping, args.step, cue, args.chunk_rows)
+                results[f"{mode}/{rows}"] = r
+                peaks.append(r["peak_bytes"])
+                row_bytes = max(row_bytes, r["log_bytes"] / max(1, rows))
+                mb = r["log_bytes"] / 1e6
+                print(f"{mode:<6} {rows:>8} rows ({mb:6.1f} MB, {r['reader']}) peak={r['peak_bytes'] / 1e6:6.2f} MB "
+                      f"{r['rows_read'] / r['seconds']:>9,.0f} rows/s {mb / r['seconds']:5.1f} MB/s "
+                      f"out={r['rows']} skipped={r['skipped_rows']} out-of-order={r['out_of_order_rows']}")
+                expected = int(duration / args.step) + 1
+                if abs(r["rows"] - expected) > 1:
+                    failures.append(f"{mode}/{rows}: {r['rows']} output rows, expected {expected}")
+                with out.open(newline="", encoding="utf-8") as f:
+                    lines = sum(1 for _ in csv.reader(f)) - 1
+                if lines != r["rows"]:
+                    failures.append(f"{mode}/{rows}: output has {lines} rows, report says {r['rows']}")
+            chunk_bytes = args.chunk_rows * row_bytes
+            if peaks[1] - peaks[0] >= chunk_bytes:
+                failures.append(f"{mode}: peak memory grew {(peaks[1] - peaks[0]) / 1e6:.2f} MB for a 10x log, "
+                                f"one chunk is {chunk_bytes / 1e6:.2f} MB")
+    return benchlib.finish(failures, results, args.json)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
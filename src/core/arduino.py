@@ -1,85 +1,550 @@
 # core/arduino.py
 from PySide6.QtCore import QObject, QThread, Signal, Slot
-import serial, serial.tools.list_ports, time, queue, threading
+import serial, time, queue, threading
+
+from core.connection import (READY_TIMEOUT_S, REPLAY_LATEST, Backoff, apply_replay_policy,
+                             check_policy, open_serial)
+from core.delta import KEEPALIVE_S, DeltaEncoder, is_motion
+from core import frames
+from core.frames import FrameDispatcher, SerialReader
+from core.keyframes import (FREE_QUERY, PROBE_TIMEOUT_S, STREAM_LEAD_S, KeyframeWindow,
+                            encode_keyframe, is_keyframe, parse_slots)
+from core.latency import LATENCY, ACK, DEQUEUE, ENQUEUE, WRITE
+from core.limits import SetpointLimiter
+from core.ports import PortDiscovery
+from core.setpoint import Setpoint
+from core.sync import PING_PAYLOAD
+
+ACK_TIMEOUT_S = 1.0
+ESTOP_BYTE = b"!"  # out-of-band stop, handled by the firmware even mid-move
+RESUME_PAYLOAD = b"R\n"
+_LATEST = object()  # queue marker: write whatever is in the newest-wins slot
+SUPERVISE_INTERVAL_S = 0.5  # how often a healthy link is re-checked
+
 
 class ArduinoWorker(QObject):
     connected = Signal(str)
     disconnected = Signal(str)
     ack = Signal(str)
     error = Signal(str)
+    message = Signal(str)  # firmware output that is not a reply (status, warnings)
 
-    def __init__(self, preferred_port: str | None = None, baud=115200, parent=None):
+    def __init__(self, preferred_port: str | None = None, baud=115200, parent=None,
+                 serial_factory=None, replay_policy: str = REPLAY_LATEST,
+                 reset_on_connect: bool = True, ready_timeout: float = READY_TIMEOUT_S,
+                 discovery: PortDiscovery | None = None,
+                 keepalive_s: float = KEEPALIVE_S, delta: bool = False,
+                 stream_lead_s: float = STREAM_LEAD_S):
         super().__init__(parent)
         self._ser = None
         self._baud = baud
+        self._preferred = preferred_port
         self._port = preferred_port
+        self._last_good: str | None = None  # cached across reconnects
+        self._discovery = discovery  # created on first use when no port is given
+        self._backoff = Backoff()
+        self._encoder = DeltaEncoder(keepalive_s, delta)  # pump thread only
+        self.keyframes = KeyframeWindow(stream_lead_s)  # board's timed queue, see stream_keyframe()
+        self._replay_policy = check_policy(replay_policy)
+        self._reset_on_connect = reset_on_connect  # False: keep DTR low, no auto-reset
+        self._ready_timeout = ready_timeout
+        self.connect_s = 0.0  # open -> ready of the last connect, for benchmarks
+        self._link_up = threading.Event()
+        self._lost = threading.Event()
+        # serial.Serial by default; core.sim.sim_factory() for a virtual board
+        self._serial_factory = serial_factory or serial.Serial
         self._cmd_q = queue.Queue()
+        self._latest = None  # (payload, trace) from send_latest, newest wins
+        self._latest_lock = threading.Lock()
+        self._limiter: SetpointLimiter | None = None
+        self._write_lock = threading.Lock()
+        self._estop = threading.Event()
+        self.estop_write_ns = 0  # perf_counter_ns of the last E-stop byte written
         self._stop = threading.Event()
+        # replies are read on the link's SerialReader thread and handed over here
+        self._reader: SerialReader | None = None
+        self._ready_evt = threading.Event()
+        self._reply = threading.Event()
+        self._reply_line = b""
+        self._awaiting = False  # the pump waits for an ack
+        self._rejected = False  # ERR seen for the command being awaited
+        self._stream_evt = threading.Event()  # keyframe accounting moved
+        self._frames = FrameDispatcher(default=self._on_text)
+        self._frames.on(frames.READY, self._on_ready)
+        self._frames.on(frames.PONG, self._on_ready)
+        self._frames.on(frames.ACK, self._on_reply)
+        self._frames.on(frames.RESUMED, self._on_reply)
+        self._frames.on(frames.STOPPED, self._on_reply)
+        self._frames.on(frames.ERR, self._on_err)
+        self._frames.on(frames.FREE, self._on_free)
+        self._frames.on(frames.STARTED, self._on_started)
 
     def start(self):
-        self._open_serial()
-        t = threading.Thread(target=self._pump, daemon=True)
-        t.start()
+        # first attempt inline, as before; the supervisor takes over from here
+        self._connect()
+        threading.Thread(target=self._supervise, daemon=True).start()
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def set_limiter(self, limiter: SetpointLimiter | None):
+        """Shape every outgoing setpoint through ``limiter`` (None = raw)."""
+        self._limiter = limiter
+
+    def set_replay_policy(self, policy: str):
+        """What to replay after a reconnect: ``"latest"`` or ``"all"`` (core.connection)."""
+        self._replay_policy = check_policy(policy)
 
     def stop(self):
         self._stop.set()
-        if self._ser:
-            try: self._ser.close()
+        self._lost.set()
+        ser, self._ser = self._ser, None
+        self._link_up.clear()
+        self._stop_reader()
+        if ser:
+            try: ser.close()
             except: pass
             self.disconnected.emit(self._port or "")
 
-    def _detect_port(self) -> str | None:
-        if self._port: return self._port
-        for p in serial.tools.list_ports.comports():
-            if "Arduino" in p.description or "usbmodem" in p.device or "wchusbserial" in p.device:
-                return p.device
-        return None
+    # ----- connection supervisor ---------------------------------------------
+    def _candidate_ports(self) -> list[str]:
+        # cached/preferred ports first: no comports() rescan on a quick hiccup
+        ports = [p for p in (self._last_good, self._preferred) if p]
+        return list(dict.fromkeys(ports))
 
-    def _open_serial(self):
-        port = self._detect_port()
-        if not port:
-            self.error.emit("Arduino port not found")
-            return
-        try:
-            self._ser = serial.Serial(port=port, baudrate=self._baud, timeout=0.2)
+    def _connect(self, quiet: bool = False) -> bool:
+        ports = self._candidate_ports()
+        if not self._preferred:
+            if self._discovery is None:
+                self._discovery = PortDiscovery()
+            # cached enumeration; boards identified as something else are skipped
+            ports += [p for p in self._discovery.find() if p not in ports]
+        if not ports:
+            if not quiet:
+                self.error.emit("Arduino port not found")
+            return False
+        last_error = None
+        for port in ports:
+            t0 = time.monotonic()
+            try:
+                ser = open_serial(self._serial_factory, port, self._port_baud(port), 0.2,
+                                  self._reset_on_connect)
+            except Exception as e:
+                last_error = e
+                continue
+            self._ready_evt.clear()
+            self._start_reader(ser)
+            try:
+                ready = self._wait_ready(ser)
+            except Exception as e:
+                last_error = e
+                self._stop_reader()
+                try: ser.close()
+                except: pass
+                continue
+            if self._stop.is_set():
+                self._stop_reader()
+                ser.close()
+                return False
+            if not ready:
+                self.error.emit(f"No READY banner from {port} within {self._ready_timeout:.0f} s; "
+                                "sending anyway (firmware predates the handshake?)")
+            self.connect_s = time.monotonic() - t0
             self._port = port
+            self._last_good = port
             self.connected.emit(port)
-            time.sleep(1.5)  # let Arduino reset
-        except Exception as e:
-            self.error.emit(f"Serial open failed: {e}")
+            self._encoder.reset()  # fresh board (or unknown state): absolute first
+            self.keyframes.reset()
+            self._ser = ser
+            if self._estop.is_set():
+                # stopped while the link was down: make sure the board knows
+                with self._write_lock:
+                    ser.write(ESTOP_BYTE)
+            self._apply_replay_policy()
+            self._link_up.set()
+            return True
+        if not quiet:
+            self.error.emit(f"Serial open failed: {last_error}")
+        return False
+
+    def _port_baud(self, port: str) -> int:
+        # a probed board tells us its baud rate; otherwise use the configured one
+        info = self._discovery.info(port) if self._discovery is not None else None
+        return info.baud if info is not None and info.baud else self._baud
+
+    @Slot(str)
+    def set_port(self, port: str):
+        """Use ``port`` from now on; an open link to another port is dropped.
+
+        Callable from any thread; the supervisor reconnects.  An empty
+        string goes back to auto-detection.
+        """
+        port = port.strip() or None
+        self._preferred = port
+        self._last_good = None
+        self._backoff.reset()  # report the first failure on the new port
+        ser = self._ser
+        if ser is not None and port != self._port:
+            self._link_lost(ser, f"switching to {port or 'auto-detect'}")
+
+    def _wait_ready(self, ser) -> bool:
+        """Wait for the board to report ready instead of sleeping through its reset."""
+        if not self._reset_on_connect:
+            ser.write(PING_PAYLOAD)  # no reset expected: a running sketch answers PONG
+        deadline = time.monotonic() + self._ready_timeout
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            if self._ready_evt.wait(0.05):
+                return True
+        return False
+
+    def _start_reader(self, ser):
+        self._stop_reader()
+        self._reader = SerialReader(ser, self._frames, lambda e: self._link_lost(ser, f"read failed: {e}"),
+                                    name="arduino-reader").start()
+
+    def _stop_reader(self):
+        reader, self._reader = self._reader, None
+        if reader is not None:
+            reader.stop()
+
+    # ----- frame handlers (reader thread) ------------------------------------
+    def _on_ready(self, line: bytes):
+        self._ready_evt.set()
+
+    def _on_reply(self, line: bytes):
+        if self._awaiting:
+            self._reply_line = line
+            self._reply.set()
+
+    def _on_err(self, line: bytes):
+        window = self.keyframes
+        if window.outstanding:
+            # answers come in order: this one is for the oldest keyframe in flight
+            LATENCY.drop(window.answered(None))
+            self._stream_evt.set()
+            if not self._estop.is_set():
+                self.error.emit(f"Keyframe refused: {line.decode(errors='ignore')}")
+        elif self._awaiting:
+            self._rejected = True  # e.g. "ERR nobase": a delta frame the board could not apply
+
+    def _on_free(self, line: bytes):
+        trace = self.keyframes.answered(parse_slots(line, b"F"))
+        if trace is not None:
+            trace[ACK] = time.perf_counter_ns()
+            LATENCY.complete(trace)
+        self._stream_evt.set()
+
+    def _on_started(self, line: bytes):
+        self.keyframes.started()
+        self._stream_evt.set()
+
+    def _on_text(self, line: bytes):
+        self.message.emit(line.decode(errors="ignore"))
+
+    def _supervise(self):
+        backoff = self._backoff
+        backoff.next()  # start() made the first (reported) attempt
+        while not self._stop.is_set():
+            if self._link_up.is_set():
+                self._lost.wait(SUPERVISE_INTERVAL_S)
+                self._lost.clear()
+                ser = self._ser
+                if ser is not None and not getattr(ser, "is_open", True):
+                    self._link_lost(ser, "port closed")
+                continue
+            if self._connect(quiet=backoff.attempts > 0):
+                backoff.reset()
+                continue
+            self._stop.wait(backoff.next())
+
+    def _link_lost(self, ser, reason: str):
+        with self._write_lock:
+            if self._ser is not ser:
+                return  # already handled
+            self._ser = None
+            self._link_up.clear()
+        self._stop_reader()
+        try: ser.close()
+        except: pass
+        self.error.emit(f"Serial link lost ({reason}); reconnecting")
+        self.disconnected.emit(self._port or "")
+        self._lost.set()
+
+    def _apply_replay_policy(self):
+        def drop(item):
+            if item is not _LATEST:
+                if is_keyframe(item[0]):
+                    self.keyframes.dropped()
+                LATENCY.drop(item[1])
+
+        q = self._cmd_q
+        with q.mutex:
+            before = len(q.queue)
+            apply_replay_policy(q.queue, self._replay_policy,
+                                lambda item: item is not _LATEST and item[0] == RESUME_PAYLOAD, drop)
+            q.unfinished_tasks -= before - len(q.queue)
+            if _LATEST not in q.queue:
+                with self._latest_lock:
+                    latest, self._latest = self._latest, None
+                if latest is not None:
+                    LATENCY.drop(latest[1])
+
+    def _requeue_front(self, item):
+        q = self._cmd_q
+        with q.mutex:
+            q.queue.appendleft(item)
+            q.unfinished_tasks += 1
+            q.not_empty.notify()
+
+    def _settle(self, timeout: float = 1.0):
+        """Let outstanding keyframe answers arrive before a command that waits for its own."""
+        window = self.keyframes
+        if not window.supported:
+            window.reset()  # an unanswered probe: this board has no keyframe queue
+            return
+        deadline = time.monotonic() + timeout
+        while window.outstanding and time.monotonic() < deadline:
+            self._stream_evt.wait(0.05)
+            self._stream_evt.clear()
+        if window.outstanding:
+            window.reset()  # answers lost: start the count over
+
+    def _wait_room(self, ser) -> bool:
+        """Block until the board has a free keyframe slot; False on E-stop/stop/link loss."""
+        window = self.keyframes
+        quiet_since = time.monotonic()
+        while True:
+            self._stream_evt.clear()
+            if window.room:
+                return True
+            if self._stop.is_set() or self._estop.is_set() or self._ser is not ser:
+                return False
+            if not window.outstanding and time.monotonic() - quiet_since > 0.5:
+                # lost count (refused frame, missed report): ask
+                window.queried()
+                try:
+                    with self._write_lock:
+                        ser.write(FREE_QUERY)
+                except Exception:
+                    return False
+                quiet_since = time.monotonic()
+            if self._stream_evt.wait(0.05):
+                quiet_since = time.monotonic()
+
+    def _await_reply(self, payload: bytes) -> bytes | None:
+        """The ack for the command just written, or None (timeout, E-stop, refused)."""
+        deadline = time.monotonic() + ACK_TIMEOUT_S
+        while time.monotonic() < deadline:
+            if self._estop.is_set() and payload != RESUME_PAYLOAD:
+                return None
+            if self._reply.wait(0.05):
+                if self._estop.is_set() and payload != RESUME_PAYLOAD:
+                    return None
+                line = self._reply_line
+                return line if line != b"STOPPED" else None
+        return None
 
     def _pump(self):
         while not self._stop.is_set():
+            if not self._link_up.wait(0.05):
+                continue  # keep buffering; the supervisor is reconnecting
             try:
-                cmd = self._cmd_q.get(timeout=0.05)
+                item = self._cmd_q.get(timeout=0.05)
             except queue.Empty:
+                self._follow_limiter()
+                continue
+            if item is _LATEST:
+                with self._latest_lock:
+                    item, self._latest = self._latest, None
+            payload, trace = item
+            if self._estop.is_set() and payload != RESUME_PAYLOAD:
+                LATENCY.drop(trace)  # raced estop(): never write motion after a stop
                 continue
-            if not self._ser:
-                self._open_serial()
-                if not self._ser:
-                    self.error.emit("No serial; dropping command")
+            if trace is not None:
+                trace[DEQUEUE] = time.perf_counter_ns()
+            ser = self._ser
+            if ser is None:
+                self._requeue_front((payload, trace))
+                continue
+            keyframe = is_keyframe(payload)
+            streamed = keyframe or payload == FREE_QUERY  # answered asynchronously
+            if keyframe and not self._wait_room(ser):
+                self._requeue_front((payload, trace))
+                continue
+            motion = is_motion(payload)
+            if motion:
+                out = self._encoder.encode(payload)
+                if out is None:
+                    LATENCY.drop(trace)  # same wire value as the last write: nothing to send
                     continue
+            else:
+                out = payload
+                if payload == RESUME_PAYLOAD:
+                    self._encoder.reset()
             try:
-                self._ser.reset_input_buffer()
-                self._ser.write((cmd + "\n").encode())
-                # simple blocking wait for DONE/OK with timeout
-                t0 = time.time()
-                while time.time() - t0 < 1.0:
-                    line = self._ser.readline()
-                    if not line:
+                if streamed:
+                    with self._write_lock:
+                        if self._estop.is_set():
+                            LATENCY.drop(trace)
+                            continue
+                        # register first: the reader may see the answer before write() returns
+                        if keyframe:
+                            self.keyframes.written(trace)
+                        else:
+                            self.keyframes.queried()
+                        ser.write(out)
+                    if keyframe and trace is not None:
+                        trace[WRITE] = time.perf_counter_ns()
+                    continue
+                self._settle()
+                with self._write_lock:
+                    if self._estop.is_set() and payload != RESUME_PAYLOAD:
+                        LATENCY.drop(trace)
                         continue
-                    s = line.decode(errors="ignore").strip()
-                    if s in ("DONE", "OK"):
-                        self.ack.emit(s)
-                        break
+                    self._rejected = False
+                    self._reply.clear()
+                    self._awaiting = True
+                    ser.write(out)
+                if trace is not None:
+                    trace[WRITE] = time.perf_counter_ns()
+                try:
+                    line = self._await_reply(payload)
+                finally:
+                    self._awaiting = False
+                rejected = self._rejected
+                if rejected:
+                    self._encoder.rejected()
+                if line is not None:
+                    if trace is not None:
+                        trace[ACK] = time.perf_counter_ns()
+                    if motion and not rejected:
+                        self._encoder.acked()
+                    self.ack.emit(line.decode(errors="ignore"))
+                if rejected and motion and out is not payload:
+                    self._requeue_front((payload, trace))  # retry as an absolute line
+                    continue
+                LATENCY.complete(trace)
             except Exception as e:
-                self.error.emit(f"Write/read failed: {e}")
-                try: self._ser.close()
-                except: pass
-                self._ser = None
+                # absolute targets are idempotent: replay this one after reconnecting
+                self._encoder.reset()
+                self._requeue_front((payload, trace))
+                self._link_lost(ser, f"write/read failed: {e}")
+
+    @Slot()
+    def estop(self):
+        """Stop now: drop everything queued and write the E-stop byte first.
+
+        Callable from any thread (the GUI calls it directly, not through the
+        worker's event loop).  Motion stays latched off until :meth:`resume`.
+        """
+        self._estop.set()
+        with self._cmd_q.mutex:
+            dropped = list(self._cmd_q.queue)
+            self._cmd_q.queue.clear()
+        with self._latest_lock:
+            latest, self._latest = self._latest, None
+        self.keyframes.reset(queued=True)  # '!' empties the board's queue too
+        self._reply.set()  # wake a pump waiting for an ack
+        ser = self._ser
+        if ser is not None:
+            try:
+                with self._write_lock:
+                    ser.write(ESTOP_BYTE)
+                    self.estop_write_ns = time.perf_counter_ns()
+            except Exception as e:
+                self.error.emit(f"E-stop write failed: {e}")
+        for item in dropped + [latest]:
+            if item is not None and item is not _LATEST:
+                LATENCY.drop(item[1])
+        if self._limiter is not None:
+            self._limiter.halt()  # keep where the rig was sent; resume from rest
+
+    @Slot()
+    def resume(self):
+        """Re-arm after :meth:`estop`."""
+        if not self._estop.is_set():
+            return
+        self._estop.clear()
+        self._cmd_q.put((RESUME_PAYLOAD, None))
+
+    @property
+    def estopped(self) -> bool:
+        return self._estop.is_set()
+
+    @property
+    def ready(self) -> bool:
+        """The port is open and the board has reported READY."""
+        return self._link_up.is_set()
+
+    def _follow_limiter(self):
+        # queue idle but the last target was rate-limited: keep closing in on it
+        limiter = self._limiter
+        if limiter is not None and limiter.behind and not self._estop.is_set():
+            setpoint = limiter.follow()
+            if setpoint is not None:
+                self._cmd_q.put((setpoint.encode(), None))
+
+    @Slot(object)
+    def send_setpoint(self, setpoint: Setpoint, trace=None):
+        if self._estop.is_set():
+            LATENCY.drop(trace)
+            return
+        if self._limiter is not None:
+            setpoint = self._limiter.apply(setpoint)
+        # serialize once here; the pump writes the bytes as-is
+        payload = setpoint.encode()
+        if trace is None:
+            trace = LATENCY.open(ENQUEUE)
+        else:
+            trace[ENQUEUE] = time.perf_counter_ns()
+        self._cmd_q.put((payload, trace))
+
+    def send_latest(self, setpoint: Setpoint, trace=None):
+        """Like :meth:`send_setpoint`, but replaces a not-yet-written previous one.
+
+        For streaming sources (network input) where only the newest target
+        matters: at most one such setpoint ever waits in the queue.
+        """
+        if self._estop.is_set():
+            LATENCY.drop(trace)
+            return
+        if self._limiter is not None:
+            setpoint = self._limiter.apply(setpoint)
+        payload = setpoint.encode()
+        if trace is None:
+            trace = LATENCY.open(ENQUEUE)
+        else:
+            trace[ENQUEUE] = time.perf_counter_ns()
+        with self._latest_lock:
+            old, self._latest = self._latest, (payload, trace)
+        if old is None:
+            self._cmd_q.put(_LATEST)
+        else:
+            LATENCY.drop(old[1])
+
+    def supports_keyframes(self, timeout: float = PROBE_TIMEOUT_S) -> bool:
+        """Whether the board takes streamed keyframes; asks it with ``F`` once."""
+        if self.keyframes.supported:
+            return True
+        self._cmd_q.put((FREE_QUERY, None))
+        return self.keyframes.wait_supported(timeout)
+
+    def stream_keyframe(self, setpoint: Setpoint, t_s: float, dur_s: float, trace=None):
+        """Queue a keyframe ``t_s`` seconds into the current stream (core/keyframes.py).
+
+        The board runs it on its own clock; producers pace themselves on
+        ``keyframes.wants_more``.  Sequences are checked against the motion
+        envelope when they are loaded, so the live limiter is not applied
+        (the GUI plays one that failed step by step instead).
+        """
+        if self._estop.is_set():
+            LATENCY.drop(trace)
+            return
+        if trace is None:
+            trace = LATENCY.open(ENQUEUE)
+        else:
+            trace[ENQUEUE] = time.perf_counter_ns()
+        self.keyframes.queued(dur_s)
+        self._cmd_q.put((encode_keyframe(setpoint, t_s, dur_s), trace))
 
     @Slot(float, float, float)
-    def send_angles(self, a1: float, a2: float, a3: float):
-        # prepare clamped integer command once here
-        cmd = f"{int(a1)},{int(a2)},{int(a3)}"
-        self._cmd_q.put(cmd)
\ No newline at end of file
+    def send_angles(self, a1: float, a2: float, a3: float, trace=None):
+        self.send_setpoint(Setpoint.of(a1, a2, a3), trace)
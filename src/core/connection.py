@@ -0,0 +1,120 @@
+# core/connection.py
+"""Reconnect helpers shared by the serial workers.
+
+A USB hiccup should cost milliseconds, not a stalled pump: the workers'
+supervisors retry the last known-good port first with an exponential
+:class:`Backoff`, keep commands buffered while the link is down, and on
+reconnect trim that buffer with :func:`apply_replay_policy`:
+
+  ``"latest"`` -- only the newest motion command is replayed (live input:
+                  stale targets are worthless, the newest one is the state)
+  ``"all"``    -- everything is replayed in order (sequences, scripted
+                  moves), capped at ``MAX_BUFFERED`` oldest-first
+
+A port counts as usable once the board says so: both sketches print a
+``READY`` banner at the end of ``setup()``, and a board that was not reset
+answers the ``P`` probe with ``PONG``.  :func:`open_serial` can keep DTR
+deasserted so reopening the port does not reset the board at all.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Deque, Iterable
+
+REPLAY_LATEST = "latest"
+REPLAY_ALL = "all"
+REPLAY_POLICIES = (REPLAY_LATEST, REPLAY_ALL)
+
+BACKOFF_MIN_S = 0.05
+BACKOFF_MAX_S = 2.0
+MAX_BUFFERED = 500
+
+READY_BANNER = b"READY"
+READY_TIMEOUT_S = 10.0  # double_actuator retracts for 7 s before its banner
+
+
+class Backoff:
+    """Exponential retry delay: ``min_s``, 2x, 4x ... capped at ``max_s``."""
+
+    def __init__(self, min_s: float = BACKOFF_MIN_S, max_s: float = BACKOFF_MAX_S, factor: float = 2.0):
+        self.min_s = min_s
+        self.max_s = max_s
+        self.factor = factor
+        self._next = min_s
+        self.attempts = 0
+
+    def next(self) -> float:
+        delay = self._next
+        self._next = min(self.max_s, self._next * self.factor)
+        self.attempts += 1
+        return delay
+
+    def reset(self) -> None:
+        self._next = self.min_s
+        self.attempts = 0
+
+
+def open_serial(factory, port: str, baudrate: int, timeout: float, reset: bool = True):
+    """Open ``port``; with ``reset=False`` DTR stays deasserted (no auto-reset).
+
+    pyserial applies ``dtr`` on ``open()``, so the port is configured
+    unopened first.  Some OS drivers pulse DTR on open regardless; the
+    ready handshake copes with both outcomes.
+    """
+    if reset:
+        return factory(port=port, baudrate=baudrate, timeout=timeout)
+    ser = factory(baudrate=baudrate, timeout=timeout)
+    ser.port = port
+    ser.dtr = False
+    ser.open()
+    return ser
+
+
+def is_ready_line(line: bytes) -> bool:
+    """True for the end-of-setup banner or an answer to the ``P`` probe."""
+    line = line.strip()
+    # case-insensitive: older double_actuator builds print "Ready for serial commands"
+    return line.upper().startswith(READY_BANNER) or line.startswith(b"PONG")
+
+
+def check_policy(policy: str) -> str:
+    if policy not in REPLAY_POLICIES:
+        raise ValueError(f"replay policy must be one of {REPLAY_POLICIES}, not {policy!r}")
+    return policy
+
+
+def apply_replay_policy(items: Deque, policy: str, is_control: Callable[[object], bool],
+                        drop: Callable[[object], None], limit: int = MAX_BUFFERED) -> None:
+    """Trim buffered commands in place.
+
+    Control items (``is_control``) always survive, in order; ``drop`` is
+    called for every motion item removed.
+    """
+    if policy == REPLAY_LATEST:
+        last_motion = None
+        for item in reversed(items):
+            if not is_control(item):
+                last_motion = item
+                break
+        kept = [item for item in items if is_control(item) or item is last_motion]
+    else:
+        kept = list(items)
+        excess = sum(1 for item in kept if not is_control(item)) - limit
+        if excess > 0:
+            trimmed = []
+            for item in kept:
+                if excess > 0 and not is_control(item):
+                    excess -= 1
+                    continue
+                trimmed.append(item)
+            kept = trimmed
+    _drop_missing(items, kept, drop)
+    items.clear()
+    items.extend(kept)
+
+
+def _drop_missing(before: Iterable, after: list, drop: Callable[[object], None]) -> None:
+    survivors = {id(item) for item in after}
+    for item in before:
+        if id(item) not in survivors:
+            drop(item)
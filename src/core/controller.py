@@ -11,6 +11,8 @@ from typing import Dict, Optional, Tuple
 
 from PySide6.QtCore import QObject, Signal
 
+from core.latency import LATENCY, CTRL_EMIT
+
 try:  # optional dependency
     import hid  # type: ignore
 except Exception:  # pragma: no cover - keep UI responsive when missing
@@ -141,6 +143,7 @@ class ControllerWorker(QObject):
 
         self._xinput_active = False
         self._last_axes_debug = 0.0
+        self._last_report_ns = 0
         self._xinput_center: Optional[Tuple[int, int, int, int]] = None
         self._inputs_center: Dict[str, float] = {}
         self._inputs_span: Dict[str, float] = {}
@@ -195,6 +198,7 @@ class ControllerWorker(QObject):
                 continue
 
             self._set_connected(True)
+            self._last_report_ns = time.perf_counter_ns()
 
             for ev in events:
                 code = getattr(ev, "code", None)
@@ -202,43 +206,14 @@ class ControllerWorker(QObject):
                 state = getattr(ev, "state", None)
                 if code is None or etype is None or state is None:
                     continue
-
-                if etype == "Sync":
-                    continue
-
-                if etype in ("EV_ABS", "Absolute"):
-                    if code == "ABS_X":
-                        self._lx = _apply_deadzone(self._normalize_inputs_axis(state, "lx"), self._dead)
-                    elif code == "ABS_Y":
-                        self._ly = _apply_deadzone(self._normalize_inputs_axis(state, "ly"), self._dead)
-                    elif code == "ABS_RX":
-                        self._rx = _apply_deadzone(self._normalize_inputs_axis(state, "rx"), self._dead)
-                    elif code == "ABS_RY":
-                        self._ry = _apply_deadzone(self._normalize_inputs_axis(state, "ry"), self._dead)
-                    elif code == "ABS_Z":
-                        self._lt = max(-1.0, min(1.0, (state / 255.0) * 2.0 - 1.0))
-                    elif code == "ABS_RZ":
-                        self._rt = max(-1.0, min(1.0, (state / 255.0) * 2.0 - 1.0))
-
-                elif etype in ("EV_KEY", "Key"):
-                    prev = self._buttons.get(code, 0)
-                    pressed = 1 if state else 0
-                    if prev == pressed:
-                        continue
-                    self._buttons[code] = pressed
-                    if pressed:
-                        if code in ("BTN_SOUTH",):
-                            self.enableToggle.emit()
-                        elif code in ("BTN_EAST", "BTN_WEST"):
-                            self.estopRequested.emit()
-                        elif code in ("BTN_NORTH",):
-                            self.homeRequested.emit()
+                self._handle_inputs_event(etype, code, state)
 
             now = time.time()
             if self._enabled and (now - last_emit) >= (1 / 60):
                 pitch_deg = self._ly * 30.0
                 roll_deg = self._rx * 30.0
                 yaw_deg = self._lx * 30.0
+                self._begin_trace()
                 self.anglesChanged.emit(pitch_deg, roll_deg, yaw_deg)
                 last_emit = now
 
@@ -273,24 +248,14 @@ class ControllerWorker(QObject):
             if not data:
                 self._set_connected(True)
             else:
-                report = self._prepare_report(bytes(data))
-                if report:
-                    processed = self._process_report(report)
-                    if not processed and self._layout is None:
-                        self._layout = HIDLayout.from_report(report)
-                        self.debugEvent.emit(
-                            f"Using HID layout with {len(report)}-byte reports: axes={list(self._layout.axes.keys())}"
-                        )
-                        processed = self._process_report(report)
-
-                    if processed:
-                        self._set_connected(True)
+                self._handle_report(bytes(data))
 
             now = time.time()
             if self._enabled and (now - last_emit) >= (1 / 60):
                 pitch_deg = self._ly * 30.0
                 roll_deg = self._rx * 30.0
                 yaw_deg = self._lx * 30.0
+                self._begin_trace()
                 self.anglesChanged.emit(pitch_deg, roll_deg, yaw_deg)
                 last_emit = now
 
@@ -299,6 +264,65 @@ class ControllerWorker(QObject):
         self._close_device()
         self._set_connected(False)
 
+    def _handle_inputs_event(self, etype: str, code: str, state: int) -> None:
+        if etype == "Sync":
+            return
+
+        if etype in ("EV_ABS", "Absolute"):
+            if code == "ABS_X":
+                self._lx = _apply_deadzone(self._normalize_inputs_axis(state, "lx"), self._dead)
+            elif code == "ABS_Y":
+                self._ly = _apply_deadzone(self._normalize_inputs_axis(state, "ly"), self._dead)
+            elif code == "ABS_RX":
+                self._rx = _apply_deadzone(self._normalize_inputs_axis(state, "rx"), self._dead)
+            elif code == "ABS_RY":
+                self._ry = _apply_deadzone(self._normalize_inputs_axis(state, "ry"), self._dead)
+            elif code == "ABS_Z":
+                self._lt = max(-1.0, min(1.0, (state / 255.0) * 2.0 - 1.0))
+            elif code == "ABS_RZ":
+                self._rt = max(-1.0, min(1.0, (state / 255.0) * 2.0 - 1.0))
+
+        elif etype in ("EV_KEY", "Key"):
+            prev = self._buttons.get(code, 0)
+            pressed = 1 if state else 0
+            if prev == pressed:
+                return
+            self._buttons[code] = pressed
+            if pressed:
+                if code in ("BTN_SOUTH",):
+                    self.enableToggle.emit()
+                elif code in ("BTN_EAST", "BTN_WEST"):
+                    self.estopRequested.emit()
+                elif code in ("BTN_NORTH",):
+                    self.homeRequested.emit()
+
+    def _handle_report(self, data: bytes) -> bool:
+        """Decode one raw HID report, picking a layout on first use."""
+        report = self._prepare_report(data)
+        if not report:
+            return False
+        processed = self._process_report(report)
+        if not processed and self._layout is None:
+            self._layout = HIDLayout.from_report(report)
+            self.debugEvent.emit(
+                f"Using HID layout with {len(report)}-byte reports: axes={list(self._layout.axes.keys())}"
+            )
+            processed = self._process_report(report)
+
+        if processed:
+            self._last_report_ns = time.perf_counter_ns()
+            self._set_connected(True)
+        return processed
+
+    def _begin_trace(self) -> None:
+        """Open a latency trace for the emit that is about to happen."""
+        if self._last_report_ns:
+            LATENCY.begin(ns=self._last_report_ns)
+            self._last_report_ns = 0
+        else:
+            LATENCY.begin(CTRL_EMIT)
+        LATENCY.stamp(CTRL_EMIT)
+
     def _prepare_report(self, report: bytes) -> bytes:
         return report
 
@@ -0,0 +1,238 @@
+# core/cueing.py
+"""Classical washout motion cueing: vehicle telemetry in, platform angles out.
+
+Ride content recorded from a vehicle (or streamed from a game) comes as
+accelerations and rotation rates, not as the pitch/roll/yaw the rig
+takes.  :class:`WashoutFilter` turns one into the other the classical way,
+per axis:
+
+  tilt coordination  sustained acceleration, low-passed, becomes a tilt
+                     whose gravity component matches it
+                     (``asin(a / g)``), rate-limited below what the
+                     rider perceives as rotation (``tilt_rate_dps``)
+  onset              the high-passed acceleration adds a short tilt cue;
+                     the rig has no surge/sway axes to put it on
+  rotation           rotation rate, band-passed (second-order high-pass,
+                     then integrated) into an angle that washes back out
+                     to level
+
+The sum is clamped to ``max_angle_deg`` and followed no faster than
+``max_rate_dps`` and ``max_acc_dps2`` (braking in time to stop on the
+target), inside the host's default MotionLimits so the setpoint limiter
+has nothing left to cut.  Axes: x forward, y left, z up; pitch is nose-up,
+roll right-side-down, yaw to the left -- forward acceleration tilts the
+seat back, as if gravity were pushing the rider into it.
+
+The filters are Tustin-discretised biquads with the same coefficients in
+both modes:
+
+  :meth:`WashoutFilter.step`  one sample at a time with O(1) state, for
+                              live sources (:class:`~core.netinput.NetInputWorker`)
+  :func:`cue_log`             a whole log at once, filtered with
+                              ``scipy.signal.lfilter`` when SciPy is
+                              installed; the output is ``(setpoints, dts)``
+                              ready for :class:`~core.sequence.SequenceWorker`
+                              or a CSV (``seqtool.py cue``)
+
+Only the linear filters are vectorised: asin, the limits and the sum run
+per sample through the same code in both modes, since the acceleration
+limit is sequential by nature -- and sensitive enough that the two modes
+only agree when they do the same arithmetic.
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from dataclasses import dataclass
+from typing import List, NamedTuple, Sequence, Tuple
+
+from core.setpoint import Setpoint
+
+try:  # optional dependency (comes with pandas)
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - pure-Python fallback below
+    np = None  # type: ignore
+
+try:  # optional dependency
+    from scipy.signal import lfilter  # type: ignore
+except Exception:  # pragma: no cover - per-sample filtering below
+    lfilter = None  # type: ignore
+
+G = 9.80665
+TELEMETRY_CHANNELS = 6  # ax, ay, az (m/s^2), p, q, r (rad/s)
+
+
+class Telemetry(NamedTuple):
+    """One vehicle sample: body-frame acceleration (gravity excluded) and rates."""
+
+    ax: float = 0.0
+    ay: float = 0.0
+    az: float = 0.0
+    p: float = 0.0  # roll rate
+    q: float = 0.0  # pitch rate
+    r: float = 0.0  # yaw rate
+
+
+@dataclass(frozen=True)
+class CueingParams:
+    """Washout tuning; frequencies in rad/s, angles in degrees."""
+
+    accel_scale: float = 1.0
+    tilt_omega: float = 5.0
+    tilt_zeta: float = 1.0
+    tilt_rate_dps: float = 5.0
+    onset_omega: float = 2.0
+    onset_zeta: float = 1.0
+    onset_gain: float = 1.5  # degrees per m/s^2 of high-passed acceleration
+    rot_scale: float = 1.0
+    rot_omega: float = 1.0
+    rot_zeta: float = 1.0
+    max_angle_deg: float = 20.0
+    max_rate_dps: float = 50.0  # MotionLimits.max_vel is 60
+    max_acc_dps2: float = 300.0  # MotionLimits.max_acc is 400
+
+
+def _tustin(num, zeta: float, omega: float, rate_hz: float) -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+    """``(b, a)`` of ``(n0 s^2 + n1 s + n2) / (s^2 + 2 zeta omega s + omega^2)`` at ``rate_hz``."""
+    k = 2.0 * rate_hz
+    n0, n1, n2 = num
+    a1, a2 = 2.0 * zeta * omega, omega * omega
+    d0 = k * k + a1 * k + a2
+    b = ((n0 * k * k + n1 * k + n2) / d0, 2.0 * (n2 - n0 * k * k) / d0, (n0 * k * k - n1 * k + n2) / d0)
+    a = (1.0, 2.0 * (a2 - k * k) / d0, (k * k - a1 * k + a2) / d0)
+    return b, a
+
+
+def _filters(params: CueingParams, rate_hz: float) -> dict:
+    w = params.tilt_omega, params.onset_omega, params.rot_omega
+    return {
+        "tilt": _tustin((0.0, 0.0, w[0] * w[0]), params.tilt_zeta, w[0], rate_hz),  # low-pass
+        "onset": _tustin((1.0, 0.0, 0.0), params.onset_zeta, w[1], rate_hz),  # high-pass
+        "rot": _tustin((0.0, 1.0, 0.0), params.rot_zeta, w[2], rate_hz),  # high-pass, integrated
+    }
+
+
+class _Biquad:
+    """Direct form II transposed section, in the order ``lfilter`` computes it."""
+
+    __slots__ = ("b0", "b1", "b2", "a1", "a2", "z1", "z2")
+
+    def __init__(self, ba):
+        (self.b0, self.b1, self.b2), (_, self.a1, self.a2) = ba
+        self.z1 = self.z2 = 0.0
+
+    def step(self, x: float) -> float:
+        y = self.b0 * x + self.z1
+        self.z1 = self.z2 + x * self.b1 - y * self.a1
+        self.z2 = x * self.b2 - y * self.a2
+        return y
+
+
+def _follow(pos: float, vel: float, target: float, max_step: float, max_dstep: float) -> Tuple[float, float]:
+    """One sample towards ``target`` under a step (velocity) and step-change (acceleration) cap.
+
+    The step is also held to what still lets it stop on the target: from
+    a step ``v``, slowing by ``max_dstep`` a sample covers about
+    ``v^2 / (2 max_dstep) + v / 2`` more.
+    """
+    want = target - pos
+    brake = max_dstep * (math.sqrt(0.25 + 2.0 * abs(want) / max_dstep) - 0.5)
+    step = min(max_step, brake, max(-max_step, -brake, want))
+    vel += min(max_dstep, max(-max_dstep, step - vel))
+    return pos + vel, vel
+
+
+class _Output:
+    """The per-sample stage after the filters: tilt, sum, clamp and limits."""
+
+    __slots__ = ("p", "tilt_step", "step", "dstep", "tilt", "out", "vel")
+
+    def __init__(self, params: CueingParams, rate_hz: float):
+        self.p = params
+        self.tilt_step = params.tilt_rate_dps / rate_hz
+        self.step = params.max_rate_dps / rate_hz
+        self.dstep = params.max_acc_dps2 / (rate_hz * rate_hz)
+        self.tilt = [0.0, 0.0]
+        self.out = [0.0, 0.0, 0.0]
+        self.vel = [0.0, 0.0, 0.0]
+
+    def __call__(self, low, high, rot) -> List[float]:
+        """Filtered (low-passed acceleration, high-passed acceleration, angle) per axis."""
+        p, out, vel = self.p, self.out, self.vel
+        for i in range(3):
+            target = math.degrees(p.rot_scale * rot[i])
+            if i < 2:
+                tilt = math.degrees(math.asin(min(1.0, max(-1.0, low[i] / G))))
+                prev = self.tilt[i]
+                prev += min(self.tilt_step, max(-self.tilt_step, tilt - prev))
+                self.tilt[i] = prev
+                target += prev + p.onset_gain * high[i]
+            target = min(p.max_angle_deg, max(-p.max_angle_deg, target))
+            out[i], vel[i] = _follow(out[i], vel[i], target, self.step, self.dstep)
+        return out
+
+
+class WashoutFilter:
+    """Streaming washout: :meth:`step` one telemetry sample, get a pitch/roll/yaw setpoint.
+
+    Samples are taken to arrive every ``1 / rate_hz`` seconds; the state
+    is a handful of floats per axis, so a step costs the same at any point
+    of a ride.  :meth:`reset` returns to level at rest.
+    """
+
+    def __init__(self, rate_hz: float = 100.0, params: CueingParams = CueingParams()):
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        self.rate_hz = rate_hz
+        self.params = params
+        self._coeffs = _filters(params, rate_hz)
+        self.reset()
+
+    def reset(self) -> None:
+        c = self._coeffs
+        self._low = [_Biquad(c["tilt"]) for _ in range(2)]
+        self._high = [_Biquad(c["onset"]) for _ in range(2)]
+        self._rot = [_Biquad(c["rot"]) for _ in range(3)]
+        self._output = _Output(self.params, self.rate_hz)
+
+    def step(self, sample: Sequence[float]) -> Setpoint:
+        """``sample`` is ``(ax, ay, az, p, q, r)`` (a :class:`Telemetry` or any sequence)."""
+        ax, ay, _, rp, rq, rr = sample[:TELEMETRY_CHANNELS]
+        scale = self.params.accel_scale
+        ax, ay = ax * scale, ay * scale
+        low, high, rot = self._low, self._high, self._rot
+        return Setpoint(self._output((low[0].step(ax), low[1].step(ay)),
+                                     (high[0].step(ax), high[1].step(ay)),
+                                     (rot[0].step(rq), rot[1].step(rp), rot[2].step(rr))))
+
+
+def _filter_column(ba, x):
+    if lfilter is not None:
+        return lfilter(ba[0], ba[1], x).tolist()
+    step = _Biquad(ba).step
+    return [step(v) for v in x.tolist()]
+
+
+def cue_log(samples, rate_hz: float = 100.0, params: CueingParams = CueingParams()):
+    """A whole telemetry log (rows of ``(ax, ay, az, p, q, r)``) as ``(setpoints, dts)``.
+
+    Same output as feeding the rows through :meth:`WashoutFilter.step`
+    one by one from rest; every row is ``1 / rate_hz`` apart.
+    """
+    n = len(samples)
+    dts = array("d", [1.0 / rate_hz]) * n
+    if not n:
+        return [], dts
+    if np is None:
+        filt = WashoutFilter(rate_hz, params)
+        return [filt.step(s) for s in samples], dts
+
+    x = np.asarray(samples, dtype=float)[:, :TELEMETRY_CHANNELS]
+    c = _filters(params, rate_hz)
+    ax, ay = x[:, 0] * params.accel_scale, x[:, 1] * params.accel_scale
+    low = zip(_filter_column(c["tilt"], ax), _filter_column(c["tilt"], ay))
+    high = zip(_filter_column(c["onset"], ax), _filter_column(c["onset"], ay))
+    rot = zip(*(_filter_column(c["rot"], x[:, i]) for i in (4, 3, 5)))
+    output = _Output(params, rate_hz)
+    return [Setpoint(output(lo, hi, ro)) for lo, hi, ro in zip(low, high, rot)], dts
@@ -0,0 +1,109 @@
+# core/delta.py
+"""Change suppression and delta frames for the motion command stream.
+
+Input sources emit at their own pace -- the gamepad every 1/60 s, the spin
+boxes on every ``valueChanged`` -- mostly repeating the same target, and
+each repeat used to cost a write and an ack wait.  One
+:class:`DeltaEncoder` per link sits right before the write:
+
+  * a motion line whose wire value (the truncated integers of
+    ``Setpoint.encode``) equals the last one written is suppressed, unless
+    ``keepalive_s`` has passed since that write (``keepalive_s=0`` turns
+    suppression off);
+  * with ``delta=True`` a changed line goes out as ``D<d1>,<d2>,...`` --
+    the integer change against the last acknowledged command -- whenever
+    that is shorter than the absolute line.
+
+Deltas are only ever taken against a command the board acknowledged.  An
+unacknowledged write, an ``ERR`` reply, a reconnect and every
+``keyframe_every``-th frame fall back to an absolute line, so a lost frame
+cannot leave the board adding to a base the host does not know.
+Control lines (``R``, ``P``, ``@`` timed steps) pass through untouched.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import List, Optional
+
+KEEPALIVE_S = 1.0
+KEYFRAME_EVERY = 20
+DELTA_PREFIX = b"D"
+
+
+def is_motion(payload: bytes) -> bool:
+    """Absolute motion line (``Setpoint.encode``), as opposed to a control line."""
+    return bool(payload) and (payload[0] in b"0123456789-")
+
+
+def _values(payload: bytes) -> Optional[List[int]]:
+    try:
+        return [int(v) for v in payload.rstrip(b"\r\n").split(b",")]
+    except ValueError:
+        return None
+
+
+class DeltaEncoder:
+    """Per-link filter; not thread-safe (owned by the link's writer)."""
+
+    def __init__(self, keepalive_s: float = KEEPALIVE_S, delta: bool = False,
+                 keyframe_every: int = KEYFRAME_EVERY):
+        self.keepalive_s = keepalive_s
+        self.delta = delta
+        self.keyframe_every = max(1, keyframe_every)
+        self.suppressed = 0
+        self.deltas = 0
+        self.absolutes = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the board's state (reconnect, E-stop, error): next line is absolute."""
+        self._written: Optional[bytes] = None
+        self._acked: Optional[bytes] = None
+        self._acked_values: Optional[List[int]] = None
+        self._pending: Optional[bytes] = None
+        self._last_write = float("-inf")
+        self._since_key = 0
+
+    def encode(self, payload: bytes, now: Optional[float] = None) -> Optional[bytes]:
+        """Bytes to write for ``payload``, or None to skip it."""
+        if not is_motion(payload):
+            return payload
+        if now is None:
+            now = time.monotonic()
+        if payload == self._written and now - self._last_write < self.keepalive_s:
+            self.suppressed += 1
+            return None
+        if self._pending is not None:
+            # the previous write was never acknowledged: the board's base is unknown
+            self._acked = self._acked_values = None
+
+        out = payload
+        base = self._acked_values
+        if (self.delta and base is not None and payload != self._acked
+                and self._since_key < self.keyframe_every - 1):
+            values = _values(payload)
+            if values is not None and len(values) == len(base):
+                frame = DELTA_PREFIX + b",".join([b"%d" % (v - b) for v, b in zip(values, base)]) + b"\n"
+                if len(frame) < len(payload):
+                    out = frame
+        self._written = self._pending = payload
+        self._last_write = now
+        if out is payload:
+            self._since_key = 0
+            self.absolutes += 1
+        else:
+            self._since_key += 1
+            self.deltas += 1
+        return out
+
+    def acked(self) -> None:
+        """The last written motion line was acknowledged: it is the new base."""
+        if self._pending is None:
+            return
+        self._acked, self._pending = self._pending, None
+        self._acked_values = _values(self._acked) if self.delta else None
+
+    def rejected(self) -> None:
+        """The board answered ERR: stop trusting the base."""
+        self.reset()
@@ -0,0 +1,159 @@
+# core/frames.py
+"""Incremental parsing of what the firmware prints, and a reader thread for it.
+
+The sketches answer with short ASCII lines.  :class:`FrameParser` splits a
+byte stream into frames as it arrives -- bulk reads go into one reusable
+``bytearray``, frames are cut out with ``find`` and the consumed prefix is
+dropped once per feed -- so a partial line simply waits for the next read.
+:func:`classify` tags each frame with a kind without decoding it, and
+:class:`FrameDispatcher` hands it to the handlers registered for that kind.
+
+:class:`SerialReader` runs that loop on its own thread (``read(in_waiting)``,
+blocking on a single byte while the board is quiet), so the writer never
+reads, never has to flush the input buffer and no firmware output is lost.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, List, Optional
+
+# frame kinds
+ACK = "ack"  # DONE / OK: a command finished
+ERR = "err"  # ERR <reason>: a command was refused
+FREE = "free"  # F<n>: answer to a keyframe or an F query (core/keyframes.py)
+STARTED = "started"  # S<n>: the board started a queued keyframe
+PONG = "pong"  # PONG <millis>: answer to P
+READY = "ready"  # READY <sketch> banner (also older "Ready for serial commands")
+IDENT = "ident"  # ID <sketch>: answer to I
+STOPPED = "stopped"  # E-stop latched
+RESUMED = "resumed"  # R accepted
+RAN = "ran"  # RAN <due>: a timed command started
+TEXT = "text"  # anything else: human-readable firmware output
+
+MAX_FRAME = 256  # longest line kept; longer runs are noise (wrong baud) and are cut
+
+_EXACT = {b"DONE": ACK, b"OK": ACK, b"STOPPED": STOPPED, b"RESUMED": RESUMED}
+_PREFIXES = ((b"ERR", ERR), (b"PONG", PONG), (b"READY", READY), (b"ID ", IDENT), (b"RAN ", RAN))
+
+
+def classify(line: bytes) -> str:
+    """Kind of a stripped frame."""
+    kind = _EXACT.get(line)
+    if kind is not None:
+        return kind
+    head = line[:1]
+    if (head == b"F" or head == b"S") and len(line) > 1 and line[1:].isdigit():
+        return FREE if head == b"F" else STARTED
+    for prefix, kind in _PREFIXES:
+        if line.startswith(prefix):
+            return kind
+    if line[:5].upper() == b"READY":
+        return READY
+    return TEXT
+
+
+class FrameParser:
+    """Splits a byte stream into stripped, non-empty lines across partial reads."""
+
+    def __init__(self, max_frame: int = MAX_FRAME):
+        self._buf = bytearray()
+        self._max = max_frame
+        self.overruns = 0  # lines cut at max_frame
+
+    def feed(self, data: bytes) -> List[bytes]:
+        buf = self._buf
+        buf += data
+        frames = []
+        start = 0
+        while True:
+            end = buf.find(b"\n", start)
+            if end < 0:
+                break
+            line = bytes(buf[start:end]).strip()
+            if line:
+                frames.append(line)
+            start = end + 1
+        if start:
+            del buf[:start]
+        if len(buf) > self._max:
+            # no newline in sight: keep the tail, it may still end a real line
+            self.overruns += 1
+            del buf[:-self._max]
+        return frames
+
+    def clear(self) -> None:
+        self._buf.clear()
+
+    @property
+    def pending(self) -> int:
+        """Bytes of an unfinished line."""
+        return len(self._buf)
+
+
+class FrameDispatcher:
+    """Routes frames to handlers by kind; a frame with no handler goes to ``default``."""
+
+    def __init__(self, default: Optional[Callable[[bytes], None]] = None):
+        self._handlers: Dict[str, List[Callable[[bytes], None]]] = {}
+        self._default = default
+
+    def on(self, kind: str, handler: Callable[[bytes], None]) -> None:
+        self._handlers.setdefault(kind, []).append(handler)
+
+    def dispatch(self, line: bytes) -> str:
+        kind = classify(line)
+        handlers = self._handlers.get(kind)
+        if handlers:
+            for handler in handlers:
+                handler(line)
+        elif self._default is not None:
+            self._default(line)
+        return kind
+
+
+class SerialReader:
+    """Reads one open port on a daemon thread and dispatches every frame."""
+
+    def __init__(self, ser, dispatcher: FrameDispatcher,
+                 on_error: Optional[Callable[[Exception], None]] = None, name: str = "serial-reader"):
+        self._ser = ser
+        self._dispatcher = dispatcher
+        self._on_error = on_error
+        self._parser = FrameParser()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.frames = 0
+        self.reads = 0
+
+    def start(self) -> "SerialReader":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop after the current read (at most the port's timeout)."""
+        self._stop.set()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def _run(self) -> None:
+        ser = self._ser
+        dispatch = self._dispatcher.dispatch
+        while not self._stop.is_set():
+            try:
+                data = ser.read(ser.in_waiting or 1)
+            except Exception as e:
+                if not self._stop.is_set() and self._on_error is not None:
+                    self._on_error(e)
+                return
+            if not data:
+                continue
+            self.reads += 1
+            for line in self._parser.feed(data):
+                self.frames += 1
+                try:
+                    dispatch(line)
+                except Exception:
+                    pass  # a handler bug must not kill the link
@@ -0,0 +1,156 @@
+# core/hidcorpus.py
+"""Recorded controller input corpora and a hardware-free replay driver.
+
+A corpus is a JSON-lines file.  The first line is a header::
+
+    {"format": 1, "pad": "xbox_packed", "backend": "hid", "description": "..."}
+
+and every following line is one captured input with its timestamp in ms::
+
+    {"t": 16.7, "report": "00a1ff...", "expect": [lx, ly, rx, ry, lt, rt, buttons]}
+    {"t": 16.7, "event": ["Absolute", "ABS_X", 12345], "expect": [...]}
+
+``report`` lines are raw HID reports (hex) for the hidapi backend; ``event``
+lines are ``inputs`` events for the Windows backend.  ``expect`` is the
+decoded controller state after the record (buttons as a SOUTH/EAST/WEST/NORTH
+bitmask) and is optional; when present the corpus doubles as a decoding
+regression fixture.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from core.controller import ControllerWorker
+
+FORMAT_VERSION = 1
+BUTTON_ORDER = ("BTN_SOUTH", "BTN_EAST", "BTN_WEST", "BTN_NORTH")
+EXPECT_DECIMALS = 4
+
+
+@dataclass
+class CorpusRecord:
+    t_ms: float
+    report: Optional[bytes] = None
+    event: Optional[Tuple[str, str, int]] = None
+    expect: Optional[Tuple[float, ...]] = None
+
+
+@dataclass
+class HIDCorpus:
+    pad: str
+    backend: str = "hid"  # "hid" or "inputs"
+    description: str = ""
+    records: List[CorpusRecord] = field(default_factory=list)
+
+
+def load_corpus(path: Path | str) -> HIDCorpus:
+    with Path(path).open("r", encoding="utf-8") as fh:
+        header = json.loads(fh.readline())
+        if header.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported corpus format {header.get('format')!r}")
+        corpus = HIDCorpus(pad=header.get("pad", Path(path).stem),
+                           backend=header.get("backend", "hid"),
+                           description=header.get("description", ""))
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            obj = json.loads(line)
+            event = obj.get("event")
+            corpus.records.append(CorpusRecord(
+                t_ms=float(obj.get("t", 0.0)),
+                report=bytes.fromhex(obj["report"]) if "report" in obj else None,
+                event=(event[0], event[1], int(event[2])) if event else None,
+                expect=tuple(obj["expect"]) if obj.get("expect") is not None else None,
+            ))
+    return corpus
+
+
+def save_corpus(corpus: HIDCorpus, path: Path | str) -> None:
+    with Path(path).open("w", encoding="utf-8") as fh:
+        fh.write(json.dumps({"format": FORMAT_VERSION, "pad": corpus.pad,
+                             "backend": corpus.backend, "description": corpus.description}) + "\n")
+        for rec in corpus.records:
+            obj = {"t": round(rec.t_ms, 3)}
+            if rec.report is not None:
+                obj["report"] = rec.report.hex()
+            if rec.event is not None:
+                obj["event"] = list(rec.event)
+            if rec.expect is not None:
+                obj["expect"] = list(rec.expect)
+            fh.write(json.dumps(obj) + "\n")
+
+
+def decoded_state(worker: ControllerWorker) -> Tuple[float, ...]:
+    buttons = 0
+    for bit, code in enumerate(BUTTON_ORDER):
+        if worker._buttons.get(code):
+            buttons |= 1 << bit
+    axes = (worker._lx, worker._ly, worker._rx, worker._ry, worker._lt, worker._rt)
+    return tuple(round(v, EXPECT_DECIMALS) for v in axes) + (buttons,)
+
+
+def reset_worker(worker: ControllerWorker) -> None:
+    """Put the worker back in its freshly-connected state."""
+    worker._layout = None
+    worker._reset_state()
+
+
+def feed(worker: ControllerWorker, rec: CorpusRecord) -> None:
+    """Feed one record through the same entry points the live loops use."""
+    if rec.report is not None:
+        worker._handle_report(rec.report)
+    elif rec.event is not None:
+        worker._handle_inputs_event(*rec.event)
+
+
+def replay(worker: ControllerWorker, corpus: HIDCorpus) -> List[Tuple[float, ...]]:
+    """Decode a whole corpus from a clean state; returns the state after each record."""
+    reset_worker(worker)
+    states = []
+    for rec in corpus.records:
+        feed(worker, rec)
+        states.append(decoded_state(worker))
+    return states
+
+
+def check(worker: ControllerWorker, corpus: HIDCorpus, tol: float = 1e-4) -> List[str]:
+    """Replay ``corpus`` and describe every record whose decode differs from ``expect``."""
+    failures = []
+    for idx, (rec, got) in enumerate(zip(corpus.records, replay(worker, corpus))):
+        if rec.expect is None:
+            continue
+        if len(rec.expect) != len(got) or any(abs(a - b) > tol for a, b in zip(rec.expect, got)):
+            failures.append(f"{corpus.pad}[{idx}] t={rec.t_ms:.1f}ms expected {list(rec.expect)} got {list(got)}")
+    return failures
+
+
+def bless(worker: ControllerWorker, corpus: HIDCorpus) -> None:
+    """Overwrite every record's ``expect`` with the current decoder output."""
+    for rec, got in zip(corpus.records, replay(worker, corpus)):
+        rec.expect = got
+
+
+def record_hid(pad: str, seconds: float, description: str = "") -> HIDCorpus:
+    """Capture raw reports from the first matching live HID gamepad."""
+    worker = ControllerWorker()
+    worker._open_device()
+    if worker._device is None:
+        raise RuntimeError("No HID gamepad found (see MOTIONSIM_HID_* environment variables)")
+    corpus = HIDCorpus(pad=pad, backend="hid", description=description)
+    t0 = time.perf_counter()
+    try:
+        while time.perf_counter() - t0 < seconds:
+            data = worker._device.read(64, timeout_ms=10)
+            if data:
+                corpus.records.append(CorpusRecord(
+                    t_ms=(time.perf_counter() - t0) * 1000.0, report=bytes(data)
+                ))
+    finally:
+        worker._close_device()
+    return corpus
@@ -0,0 +1,159 @@
+# core/keyframes.py
+"""Streamed keyframes: fill the board's timed queue ahead of playback.
+
+Sent one step at a time, every serial round trip and every late wake-up
+of the sequence thread lands between two moves.  Instead the host streams
+``K<t_ms>,<dur_ms>,<values>`` keyframes -- ``t_ms`` counted from the start
+of the sequence -- into the firmware's timed queue, and the board runs them
+on its own ``millis()`` clock (see ``arduino_code/double_actuator``).  The
+first keyframe anchors the stream to the board clock; if the queue ever
+runs dry the next one re-anchors it, so an underrun stretches the ride
+instead of rushing the steps that were late.
+
+Flow control is credit based.  The board answers every keyframe (and an
+``F`` query) with ``F<free slots>`` and pushes ``S<free slots>`` when it
+starts one.  Keyframes are written back to back without waiting for their
+answers; :class:`KeyframeWindow` counts a slot off per write, gives one
+back per ``S`` and re-bases on every ``F`` -- which is exact, since the
+board answers in order.  It also tells the producer how many seconds of
+motion are buffered, so the queue is kept ``lead_s`` ahead of the board:
+far enough to ride out serial and scheduling jitter, short enough that an
+abort only lets that much play out.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from core.setpoint import Setpoint
+
+KEYFRAME_PREFIX = b"K"
+FREE_QUERY = b"F\n"
+KEYFRAME_SLOTS = 32  # TIMED_SLOTS in the sketch
+STREAM_LEAD_S = 0.5
+PROBE_TIMEOUT_S = 1.0
+
+
+def encode_keyframe(setpoint: Setpoint, t_s: float, dur_s: float) -> bytes:
+    return b"K%d,%d," % (round(t_s * 1000.0), round(dur_s * 1000.0)) + setpoint.encode()
+
+
+def is_keyframe(payload: bytes) -> bool:
+    return payload[:1] == KEYFRAME_PREFIX
+
+
+def parse_slots(line: bytes, prefix: bytes) -> Optional[int]:
+    """Free slots from an ``F<n>``/``S<n>`` line with the given prefix, else None."""
+    line = line.strip()
+    if line[:1] != prefix or not line[1:].isdigit():
+        return None
+    return int(line[1:])
+
+
+class KeyframeWindow:
+    """Host-side mirror of the board's keyframe queue; thread-safe."""
+
+    def __init__(self, lead_s: float = STREAM_LEAD_S, slots: int = KEYFRAME_SLOTS):
+        self.lead_s = lead_s
+        self.slots = slots
+        self._lock = threading.Lock()
+        self._supported = threading.Event()  # the board has answered F<n> once
+        self._queued: Deque[float] = deque()  # durations waiting on the host
+        self._board: Deque[float] = deque()  # durations written, not yet started
+        self._requests: Deque[Tuple[bool, object]] = deque()  # (keyframe?, trace) awaiting F<n>
+        self.free = slots
+        self.refused = 0  # keyframes the board answered with ERR
+
+    def reset(self, queued: bool = False) -> None:
+        """The board's queue is empty (reconnect); ``queued``: so is the host's (E-stop)."""
+        with self._lock:
+            self._board.clear()
+            self._requests.clear()
+            self.free = self.slots
+            if queued:
+                self._queued.clear()
+
+    @property
+    def supported(self) -> bool:
+        return self._supported.is_set()
+
+    def wait_supported(self, timeout: float) -> bool:
+        return self._supported.wait(timeout)
+
+    # ----- host queue (producer thread) -------------------------------------
+    def queued(self, dur_s: float) -> None:
+        with self._lock:
+            self._queued.append(dur_s)
+
+    def dropped(self) -> None:
+        """A queued keyframe was discarded before it was written."""
+        with self._lock:
+            if self._queued:
+                self._queued.popleft()
+
+    # ----- link (writer thread) ----------------------------------------------
+    def written(self, trace=None) -> None:
+        with self._lock:
+            self._board.append(self._queued.popleft() if self._queued else 0.0)
+            self._requests.append((True, trace))
+            self.free -= 1
+
+    def queried(self) -> None:
+        with self._lock:
+            self._requests.append((False, None))
+
+    def answered(self, free: Optional[int]):
+        """The board's answer to the oldest request: ``F<free>``, or None for ``ERR``.
+
+        Returns that request's trace (None for a query or nothing pending).
+        """
+        if free is not None:
+            self._supported.set()
+        with self._lock:
+            if not self._requests:
+                return None
+            keyframe, trace = self._requests.popleft()
+            behind = sum(1 for k, _ in self._requests if k)  # written after this one
+            if free is None:
+                if keyframe:
+                    # refused (queue full, E-stop): it will never start
+                    idx = len(self._board) - behind - 1
+                    if idx >= 0:
+                        del self._board[idx]
+                    self.refused += 1
+                    self.free = 0  # out of step; the next answer re-bases
+                return trace
+            self.free = free - behind
+            pending = self.slots - free + behind
+            while len(self._board) > pending:
+                self._board.popleft()  # started while we were not looking
+            return trace
+
+    def started(self) -> None:
+        """``S<n>``: the board started its oldest keyframe."""
+        with self._lock:
+            if self._board:
+                self._board.popleft()
+            self.free = min(self.slots, self.free + 1)
+
+    @property
+    def outstanding(self) -> int:
+        """Requests still waiting for their answer."""
+        return len(self._requests)
+
+    @property
+    def room(self) -> bool:
+        """The board has a free slot for the next keyframe."""
+        return self.free > 0
+
+    @property
+    def buffered_s(self) -> float:
+        """Seconds of motion queued on the host or the board, not yet started."""
+        with self._lock:
+            return sum(self._queued) + sum(self._board)
+
+    @property
+    def wants_more(self) -> bool:
+        return self.buffered_s < self.lead_s
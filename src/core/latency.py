@@ -0,0 +1,210 @@
+# core/latency.py
+"""Per-command latency stamps and histograms for the input -> serial path.
+
+A command picks up ``perf_counter_ns`` stamps as it moves through the
+pipeline (HID read, signal emit, GUI slot, enqueue, dequeue, serial write,
+ack).  When the command completes, the deltas between consecutive stamps are
+folded into one histogram per stage.  Commands complete on more than one
+thread -- the serial pump, the serial reader (keyframe acks) and each rig's
+workers under a RigManager -- so completions take a lock around the
+histogram updates; it is held for a few bucket increments per command.
+Readers only ever take snapshots and never lock.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Stage indices, in pipeline order.
+HID_READ = 0
+CTRL_EMIT = 1
+GUI_SLOT = 2
+ENQUEUE = 3
+DEQUEUE = 4
+WRITE = 5
+ACK = 6
+
+STAGES = ("hid_read", "ctrl_emit", "gui_slot", "enqueue", "dequeue", "write", "ack")
+
+_SUB_BITS = 3  # 8 sub-buckets per power of two -> ~12% resolution
+_SUB_COUNT = 1 << _SUB_BITS
+_MAX_US = 1 << 24  # ~16.7 s; anything slower lands in the last bucket
+
+
+def _bucket_index(us: int) -> int:
+    if us < _SUB_COUNT:
+        return us
+    shift = us.bit_length() - _SUB_BITS - 1
+    return ((shift + 1) << _SUB_BITS) + ((us >> shift) - _SUB_COUNT)
+
+
+def _bucket_upper_us(index: int) -> int:
+    if index < _SUB_COUNT:
+        return index
+    shift = (index >> _SUB_BITS) - 1
+    return ((_SUB_COUNT + (index & (_SUB_COUNT - 1)) + 1) << shift) - 1
+
+
+_BUCKETS = _bucket_index(_MAX_US) + 1
+
+
+class Histogram:
+    """Log-linear microsecond histogram; writers must be serialized (LatencyTracker's lock)."""
+
+    __slots__ = ("counts", "count", "total_us", "max_us")
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record_ns(self, ns: int) -> None:
+        us = ns // 1000
+        if us < 0:
+            us = 0
+        elif us >= _MAX_US:
+            us = _MAX_US
+        self.counts[_bucket_index(us)] += 1
+        self.count += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def percentile_us(self, pct: float, counts: Optional[List[int]] = None) -> int:
+        counts = self.counts if counts is None else counts
+        total = sum(counts)
+        if total == 0:
+            return 0
+        rank = max(1, int(round(total * pct / 100.0)))
+        seen = 0
+        for idx, n in enumerate(counts):
+            seen += n
+            if seen >= rank:
+                return min(_bucket_upper_us(idx), self.max_us)
+        return self.max_us
+
+    def summary(self) -> Dict[str, float]:
+        counts = list(self.counts)  # snapshot; the writer may keep going
+        count = self.count
+        return {
+            "count": count,
+            "mean_ms": (self.total_us / count / 1000.0) if count else 0.0,
+            "p50_ms": self.percentile_us(50, counts) / 1000.0,
+            "p95_ms": self.percentile_us(95, counts) / 1000.0,
+            "p99_ms": self.percentile_us(99, counts) / 1000.0,
+            "max_ms": self.max_us / 1000.0,
+        }
+
+
+def new_trace() -> List[int]:
+    return [0] * len(STAGES)
+
+
+class LatencyTracker:
+    """Collects stage stamps and per-stage histograms.
+
+    The controller thread opens a trace with :meth:`begin`; the GUI thread
+    stamps it and hands it on through :meth:`take`.  Only the newest trace is
+    kept in the hand-off slot, matching the newest-wins nature of gamepad
+    input.  Traces then travel with the queued command.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._lock = threading.Lock()  # serializes completions from the worker threads
+        self._pending: Optional[List[int]] = None
+        self.stages = {name: Histogram() for name in STAGES[1:]}
+        self.total = Histogram()
+        self.dropped = 0
+
+    # ----- hand-off between threads ---------------------------------------
+    def open(self, stage: int, ns: Optional[int] = None) -> Optional[List[int]]:
+        """Start a trace at ``stage`` without publishing it."""
+        if not self.enabled:
+            return None
+        trace = new_trace()
+        trace[stage] = time.perf_counter_ns() if ns is None else ns
+        return trace
+
+    def begin(self, stage: int = HID_READ, ns: Optional[int] = None) -> Optional[List[int]]:
+        """Start a trace and publish it in the hand-off slot."""
+        trace = self.open(stage, ns)
+        self._pending = trace
+        return trace
+
+    def stamp(self, stage: int) -> None:
+        trace = self._pending
+        if trace is not None:
+            trace[stage] = time.perf_counter_ns()
+
+    def take(self) -> Optional[List[int]]:
+        trace, self._pending = self._pending, None
+        return trace
+
+    # ----- completion (any worker thread) ----------------------------------
+    def complete(self, trace: Optional[List[int]]) -> None:
+        if trace is None:
+            return
+        deltas = []
+        prev = 0
+        first = 0
+        for idx, ns in enumerate(trace):
+            if not ns:
+                continue
+            if prev:
+                deltas.append((idx, ns - prev))
+            else:
+                first = ns
+            prev = ns
+        with self._lock:
+            stages = self.stages
+            for idx, ns in deltas:
+                stages[STAGES[idx]].record_ns(ns)
+            if first and prev > first:
+                self.total.record_ns(prev - first)
+
+    def drop(self, trace: Optional[List[int]]) -> None:
+        if trace is not None:
+            with self._lock:
+                self.dropped += 1
+
+    # ----- reporting -------------------------------------------------------
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        out = {name: hist.summary() for name, hist in self.stages.items()}
+        out["total"] = self.total.summary()
+        out["total"]["dropped"] = self.dropped
+        return out
+
+    def link_latency_s(self, pct: float = 50) -> float:
+        """Enqueue -> ack latency (sum of the per-stage percentiles), in seconds."""
+        us = sum(self.stages[STAGES[i]].percentile_us(pct, list(self.stages[STAGES[i]].counts))
+                 for i in (DEQUEUE, WRITE, ACK))
+        return us / 1e6
+
+    def format_table(self) -> str:
+        lines = [f"{'stage':<10} {'n':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"]
+        for name, s in self.snapshot().items():
+            lines.append(
+                f"{name:<10} {s['count']:>7} {s['p50_ms']:>8.2f} {s['p95_ms']:>8.2f} "
+                f"{s['p99_ms']:>8.2f} {s['max_ms']:>8.2f}"
+            )
+        return "\n".join(lines)
+
+    def dump_json(self, path: Path | str) -> None:
+        Path(path).write_text(json.dumps(self.snapshot(), indent=2), encoding="utf-8")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._pending = None
+            self.stages = {name: Histogram() for name in STAGES[1:]}
+            self.total = Histogram()
+            self.dropped = 0
+
+
+# Process-wide tracker shared by the workers and the GUI.
+LATENCY = LatencyTracker()
@@ -0,0 +1,229 @@
+# core/library.py
+"""Sequence library: an index of the ride CSVs and a warm cache of parsed ones.
+
+Preset buttons used to point at hard-coded paths and re-read their CSV on
+every click.  :class:`SequenceLibrary` scans a directory on a background
+thread and keeps a :class:`SequenceInfo` per file -- row count, duration,
+per-channel extents and whether it passes the motion limits -- so the GUI
+can label its presets and refuse a bad ride without touching the file.
+
+Parsed sequences stay in an LRU cache capped at ``max_bytes``; every
+lookup compares the file's ``mtime``/size with the cached entry, so an
+edited file is read again while an unchanged one costs a ``stat()``.
+Scanning parses each file once and leaves it in the cache (up to the cap),
+so the first start of a preset is as quick as the next.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from PySide6.QtCore import QObject, Signal
+
+from core.limits import MotionLimits, Violation, check_sequence
+from core.sequence import load_sequence
+from core.setpoint import DEFAULT_CHANNELS
+
+CACHE_BYTES = 64 * 1024 * 1024
+MAX_REPORTED = 5  # violations kept per file; the count is kept in full
+
+_Key = Tuple[str, float]  # (path, default dt)
+
+
+@dataclass(frozen=True)
+class SequenceInfo:
+    path: Path
+    mtime_ns: int
+    size: int
+    rows: int = 0
+    duration_s: float = 0.0
+    extents: Tuple[Tuple[float, float], ...] = ()  # (min, max) per channel
+    violations: Tuple[Violation, ...] = ()  # the first MAX_REPORTED
+    violation_count: int = 0
+    error: Optional[str] = None  # the file could not be read
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    @property
+    def valid(self) -> bool:
+        return self.error is None and self.rows > 0 and not self.violation_count
+
+    def summary(self) -> str:
+        if self.error is not None:
+            return f"{self.name}: unreadable ({self.error})"
+        minutes, seconds = divmod(self.duration_s, 60.0)
+        text = f"{self.name}: {self.rows} rows, {int(minutes)}:{seconds:04.1f}"
+        if self.extents:
+            text += ", range " + " / ".join(f"{lo:g}..{hi:g}" for lo, hi in self.extents)
+        if self.violation_count:
+            text += f", {self.violation_count} limit violation(s)"
+        elif not self.rows:
+            text += ", no data rows"
+        return text
+
+
+def _footprint(setpoints, dts) -> int:
+    """Approximate bytes held by a parsed sequence."""
+    if not setpoints:
+        return sys.getsizeof(setpoints) + sys.getsizeof(dts)
+    return (sys.getsizeof(setpoints) + len(setpoints) * sys.getsizeof(setpoints[0])
+            + sys.getsizeof(dts))
+
+
+def _extents(setpoints) -> Tuple[Tuple[float, float], ...]:
+    if not setpoints:
+        return ()
+    return tuple((min(col), max(col)) for col in zip(*setpoints))
+
+
+class SequenceLibrary(QObject):
+    """Indexed, cached view of a directory of sequences; thread-safe."""
+
+    indexed = Signal(object)  # SequenceInfo, as each file is indexed by scan_async() / info_async()
+    scanned = Signal(list)  # List[SequenceInfo], from scan_async()
+
+    def __init__(self, root=None, dt: float = 0.5, channels: int = DEFAULT_CHANNELS,
+                 limits: Optional[MotionLimits] = None, max_bytes: int = CACHE_BYTES, parent=None):
+        super().__init__(parent)
+        self.root = Path(root) if root is not None else None
+        self.dt = dt
+        self._channels = channels
+        self._limits = limits
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[_Key, tuple]" = OrderedDict()  # key -> (stamp, rows, bytes)
+        self._bytes = 0
+        self._infos: Dict[_Key, SequenceInfo] = {}
+        self.loads = 0  # files parsed
+        self.hits = 0
+
+    # ----- lookups (any thread) ------------------------------------------------
+    def get(self, path, dt: Optional[float] = None):
+        """Parsed ``(setpoints, dts)`` for ``path``, read again only if the file changed."""
+        rows, _ = self._lookup(path, self.dt if dt is None else dt)
+        return rows
+
+    def info(self, path, dt: Optional[float] = None) -> SequenceInfo:
+        """Metadata and validation status for ``path`` (indexed if new or changed)."""
+        dt = self.dt if dt is None else dt
+        info = self.indexed_info(path, dt)
+        if info is not None:
+            return info
+        key, _ = self._stamp(path, dt)
+        try:
+            _, info = self._lookup(path, dt)
+        except Exception:
+            with self._lock:
+                info = self._infos.get(key)
+        return info
+
+    def indexed_info(self, path, dt: Optional[float] = None) -> Optional[SequenceInfo]:
+        """:meth:`info` if ``path`` is indexed and unchanged, else None; never reads the file."""
+        key, stamp = self._stamp(path, self.dt if dt is None else dt)
+        with self._lock:
+            info = self._infos.get(key)
+        if info is not None and (info.mtime_ns, info.size) == stamp:
+            return info
+        return None
+
+    def info_async(self, path, dt: Optional[float] = None) -> None:
+        """:meth:`info` on a background thread; the result arrives via :attr:`indexed`."""
+        threading.Thread(target=lambda: self.indexed.emit(self.info(path, dt)), name="seq-info",
+                         daemon=True).start()
+
+    def sequences(self) -> List[SequenceInfo]:
+        """Everything indexed so far, by file name."""
+        with self._lock:
+            infos = [info for (_, dt), info in self._infos.items() if dt == self.dt]
+        return sorted(infos, key=lambda info: info.name)
+
+    def scan(self) -> List[SequenceInfo]:
+        """Index every ``*.csv`` under :attr:`root`; files that went away are forgotten."""
+        if self.root is None or not self.root.is_dir():
+            return []
+        paths = sorted(self.root.glob("*.csv"))
+        infos = []
+        for path in paths:
+            info = self.info(path)
+            infos.append(info)
+            self.indexed.emit(info)
+        present = {str(p) for p in paths}
+        with self._lock:
+            for key in [k for k in self._infos if Path(k[0]).parent == self.root and k[0] not in present]:
+                del self._infos[key]
+        return infos
+
+    def scan_async(self) -> None:
+        """:meth:`scan` on a background thread; the result arrives via :attr:`scanned`."""
+        threading.Thread(target=lambda: self.scanned.emit(self.scan()), name="seq-index",
+                         daemon=True).start()
+
+    def forget(self, path=None) -> None:
+        """Drop cached data for ``path`` (or everything)."""
+        with self._lock:
+            for key in list(self._cache):
+                if path is None or key[0] == str(Path(path)):
+                    self._bytes -= self._cache.pop(key)[2]
+            if path is None:
+                self._infos.clear()
+
+    @property
+    def cached_bytes(self) -> int:
+        return self._bytes
+
+    # ----- internals -------------------------------------------------------------
+    @staticmethod
+    def _stamp(path, dt: float):
+        path = str(Path(path))
+        try:
+            st = os.stat(path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = (0, -1)
+        return (path, float(dt)), stamp
+
+    def _lookup(self, path, dt: float):
+        key, stamp = self._stamp(path, dt)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry[1], self._infos[key]
+        try:
+            rows = load_sequence(key[0], dt, self._channels)
+        except Exception as exc:
+            with self._lock:
+                self._infos[key] = SequenceInfo(Path(key[0]), stamp[0], stamp[1], error=str(exc))
+            raise
+        info = self._index(Path(key[0]), stamp, rows)
+        size = _footprint(*rows)
+        with self._lock:
+            self.loads += 1
+            self._infos[key] = info
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._cache[key] = (stamp, rows, size)
+            self._bytes += size
+            while self._bytes > self._max_bytes and len(self._cache) > 1:
+                _, (_, _, evicted) = self._cache.popitem(last=False)
+                self._bytes -= evicted
+        return rows, info
+
+    def _index(self, path: Path, stamp, rows) -> SequenceInfo:
+        setpoints, dts = rows
+        violations: Sequence[Violation] = ()
+        if self._limits is not None:
+            violations = check_sequence(setpoints, dts, self._limits)
+        return SequenceInfo(path, stamp[0], stamp[1], rows=len(setpoints), duration_s=float(sum(dts)),
+                            extents=_extents(setpoints), violations=tuple(violations[:MAX_REPORTED]),
+                            violation_count=len(violations))
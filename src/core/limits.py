@@ -0,0 +1,227 @@
+# core/limits.py
+"""Host-side motion envelope: position, velocity and acceleration limits.
+
+:class:`SetpointLimiter` sits in front of the serial writer and shapes every
+outgoing setpoint in O(channels): position is clamped to the envelope, and
+the step from the previous output is limited so neither the implied
+velocity nor its change exceeds :class:`MotionLimits`.  When a target was
+cut short, :attr:`SetpointLimiter.behind` stays set and :meth:`follow`
+yields the next step towards it, so event-driven input (a stick that stops
+moving) still arrives -- just no faster than allowed.
+
+:func:`check_sequence` runs the same bounds over a whole sequence at load
+time (vectorized with numpy when available) and returns every violation,
+so a ride that would saturate is reported before it starts instead of
+only being clipped halfway through.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from typing import List, NamedTuple, Optional, Sequence
+
+from core.setpoint import Setpoint
+
+try:  # optional dependency (comes with pandas)
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - pure-Python fallback below
+    np = None  # type: ignore
+
+# Firmware constants (arduino_code/double_actuator): stroke and top speed.
+STROKE_IN = 12.0
+MAX_SPEED_IPS = 2.16
+
+MAX_DT_S = 1.0  # a longer gap counts as this long when limiting a step
+_EPS = 1e-9
+
+
+@dataclass(frozen=True)
+class MotionLimits:
+    """Per-setpoint-unit bounds, the same for every channel."""
+
+    pos_min: float = -30.0
+    pos_max: float = 30.0
+    max_vel: float = 60.0   # units/s
+    max_acc: float = 400.0  # units/s^2
+
+    @classmethod
+    def actuator(cls) -> "MotionLimits":
+        """Raw actuator targets in inches, as the double_actuator firmware takes them."""
+        return cls(pos_min=0.0, pos_max=STROKE_IN, max_vel=MAX_SPEED_IPS, max_acc=MAX_SPEED_IPS * 4)
+
+
+class Violation(NamedTuple):
+    row: int
+    channel: int
+    kind: str  # "pos" | "vel" | "acc"
+    value: float
+    limit: float
+
+    def __str__(self) -> str:
+        return f"row {self.row} ch {self.channel}: {self.kind} {self.value:+.2f} exceeds {self.limit:.2f}"
+
+
+class SetpointLimiter:
+    """Stateful O(1) shaper; safe to call from any thread."""
+
+    def __init__(self, limits: MotionLimits = MotionLimits(), max_dt_s: float = MAX_DT_S):
+        self.limits = limits
+        self.max_dt_s = max_dt_s
+        self._lock = threading.Lock()
+        self.clipped = {"pos": 0, "vel": 0, "acc": 0}
+        self.reset()
+
+    def reset(self) -> None:
+        self._out: Optional[List[float]] = None
+        self._vel: List[float] = []
+        self._target: Optional[Setpoint] = None
+        self._last_t = 0.0
+        self.behind = False
+
+    def halt(self) -> None:
+        """The platform was stopped (E-stop): hold the last commanded position, at rest.
+
+        Unlike :meth:`reset` the position is kept, so the first command
+        after a resume is still limited -- it starts from standstill with
+        no elapsed time to move in, and :meth:`follow` ramps up from there.
+        """
+        with self._lock:
+            self._vel = [0.0] * len(self._vel)
+            self._target = None
+            self._last_t = math.inf  # the next step gets the minimum dt
+            self.behind = False
+
+    def apply(self, setpoint: Setpoint, t: Optional[float] = None, follow: bool = True) -> Setpoint:
+        """Return the limited setpoint to send for target ``setpoint``.
+
+        ``follow=False`` for scheduled steps (``t`` = due time): the next
+        scheduled step is the catch-up, so :attr:`behind` is not raised.
+        """
+        with self._lock:
+            self._target = Setpoint(setpoint)
+            out = self._step(time.monotonic() if t is None else t)
+            if not follow:
+                self.behind = False
+            return out
+
+    def follow(self, t: Optional[float] = None) -> Optional[Setpoint]:
+        """Next step towards a target that was cut short, or None if on target."""
+        with self._lock:
+            if not self.behind or self._target is None:
+                return None
+            return self._step(time.monotonic() if t is None else t)
+
+    def _step(self, now: float) -> Setpoint:
+        lim = self.limits
+        target = self._target
+        out = Setpoint(target)
+        clipped = self.clipped
+        for i in range(len(out)):
+            v = out[i]
+            if v < lim.pos_min or v > lim.pos_max:
+                clipped["pos"] += 1
+                out[i] = min(lim.pos_max, max(lim.pos_min, v))
+
+        if self._out is None or len(self._out) != len(out):
+            # first command: nothing to limit against
+            self._out = list(out)
+            self._vel = [0.0] * len(out)
+            self._last_t = now
+            self.behind = False
+            return out
+
+        dt = min(max(now - self._last_t, 1e-3), self.max_dt_s)
+        self._last_t = now
+        dv_max = lim.max_acc * dt
+        behind = False
+        for i in range(len(out)):
+            prev = self._out[i]
+            want = (out[i] - prev) / dt
+            vel = want
+            v_prev = self._vel[i]
+            if vel > v_prev + dv_max or vel < v_prev - dv_max:
+                clipped["acc"] += 1
+                vel = min(v_prev + dv_max, max(v_prev - dv_max, vel))
+            if vel > lim.max_vel or vel < -lim.max_vel:
+                clipped["vel"] += 1
+                vel = min(lim.max_vel, max(-lim.max_vel, vel))
+            if abs(vel - want) > _EPS:
+                behind = True
+            out[i] = prev + vel * dt
+            self._out[i] = out[i]
+            self._vel[i] = vel
+        self.behind = behind
+        return out
+
+
+def check_sequence(setpoints: Sequence[Sequence[float]], dts: Sequence[float],
+                   limits: MotionLimits = MotionLimits()) -> List[Violation]:
+    """All envelope violations of a sequence; ``dts[i]`` is the time from row i to i+1.
+
+    Velocity between rows i and i+1 is reported on row i+1; acceleration on
+    the row where the velocity changes.
+    """
+    if not len(setpoints):
+        return []
+    if np is not None:
+        return _check_numpy(setpoints, dts, limits)
+    return _check_python(setpoints, dts, limits)
+
+
+def _as_matrix(setpoints):
+    width = len(setpoints[0])
+    if all(isinstance(sp, Setpoint) and len(sp) == width for sp in setpoints):
+        # array('d') rows: one memcpy instead of boxing every float
+        return np.frombuffer(b"".join(setpoints), dtype=float).reshape(-1, width)
+    return np.asarray(setpoints, dtype=float)
+
+
+def _check_numpy(setpoints, dts, limits: MotionLimits) -> List[Violation]:
+    pos = _as_matrix(setpoints)
+    dt = np.maximum(np.frombuffer(dts, dtype=float) if isinstance(dts, array)
+                    else np.asarray(dts, dtype=float), 1e-3)[: len(pos) - 1, None]
+    out: List[Violation] = []
+
+    def report(kind, values, limit, bad, row_offset):
+        rows, chans = np.nonzero(bad)
+        out.extend(Violation(int(r) + row_offset, int(c), kind, float(values[r, c]), limit)
+                   for r, c in zip(rows, chans))
+
+    report("pos", pos, limits.pos_max, pos > limits.pos_max, 0)
+    report("pos", pos, limits.pos_min, pos < limits.pos_min, 0)
+    if len(pos) > 1:
+        vel = np.diff(pos, axis=0) / dt
+        report("vel", vel, limits.max_vel, np.abs(vel) > limits.max_vel, 1)
+        if len(vel) > 1:
+            acc = np.diff(vel, axis=0) / dt[1:]
+            report("acc", acc, limits.max_acc, np.abs(acc) > limits.max_acc, 1)
+    out.sort(key=lambda v: (v.row, v.channel))
+    return out
+
+
+def _check_python(setpoints, dts, limits: MotionLimits) -> List[Violation]:
+    out: List[Violation] = []
+    prev_vel = None
+    for r, sp in enumerate(setpoints):
+        vel = None
+        if r:
+            dt = max(float(dts[r - 1]), 1e-3)
+            vel = [(sp[c] - setpoints[r - 1][c]) / dt for c in range(len(sp))]
+        for c, p in enumerate(sp):
+            if p > limits.pos_max:
+                out.append(Violation(r, c, "pos", p, limits.pos_max))
+            elif p < limits.pos_min:
+                out.append(Violation(r, c, "pos", p, limits.pos_min))
+            if vel is not None and abs(vel[c]) > limits.max_vel:
+                out.append(Violation(r, c, "vel", vel[c], limits.max_vel))
+            if vel is not None and prev_vel is not None:
+                acc = (vel[c] - prev_vel[c]) / dt
+                if abs(acc) > limits.max_acc:
+                    out.append(Violation(r - 1, c, "acc", acc, limits.max_acc))
+        prev_vel = vel
+    out.sort(key=lambda v: (v.row, v.channel))
+    return out
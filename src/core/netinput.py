@@ -0,0 +1,191 @@
+# core/netinput.py
+"""UDP setpoint endpoint so a game or physics engine can drive the rig.
+
+Packet (little-endian, one datagram per setpoint)::
+
+    magic  b"MS"     2 bytes
+    version          uint8   (PACKET_VERSION)
+    channels         uint8   (N)
+    seq              uint32  (increments per packet, wraps)
+    values           N x float32
+
+Datagrams that are malformed or older than the newest accepted sequence
+number (serial-number arithmetic, so wrap-around is fine) are dropped.
+After ``SENDER_IDLE_S`` without traffic any sequence number is accepted
+again, so a restarted sender is picked up without restarting the app.
+
+Whatever is queued in the socket is drained before delivering, and only
+the newest setpoint is handed to the sink -- normally
+``ArduinoWorker.send_latest`` -- straight from the listener thread, so a
+burst never builds a backlog and the GUI thread is never involved.  An
+optional :class:`SetpointPredictor` sits in front of the sink to hide the
+serial latency; the listener settles it when the stream goes quiet.
+
+With a :class:`~core.cueing.WashoutFilter` the packets carry vehicle
+telemetry (``ax, ay, az, p, q, r``) at the filter's rate instead of
+platform angles.  Every accepted packet steps the filter -- it needs them
+all -- and the newest output is what gets delivered.
+"""
+
+from __future__ import annotations
+
+import socket
+import struct
+import time
+from typing import Callable, Optional, Tuple
+
+from PySide6.QtCore import QObject, Signal
+
+from core.cueing import TELEMETRY_CHANNELS, WashoutFilter
+from core.predict import SetpointPredictor
+from core.setpoint import Setpoint
+
+DEFAULT_PORT = 4560
+PACKET_MAGIC = b"MS"
+PACKET_VERSION = 1
+MAX_CHANNELS = 16
+SENDER_IDLE_S = 1.0
+
+_HEADER = struct.Struct("<2sBBI")
+_SEQ_MOD = 1 << 32
+
+
+def encode_packet(seq: int, setpoint) -> bytes:
+    n = len(setpoint)
+    return _HEADER.pack(PACKET_MAGIC, PACKET_VERSION, n, seq % _SEQ_MOD) + struct.pack(f"<{n}f", *setpoint)
+
+
+def decode_packet(data: bytes) -> Tuple[int, Setpoint]:
+    """Return ``(seq, setpoint)``; raises ValueError on anything malformed."""
+    if len(data) < _HEADER.size:
+        raise ValueError("short packet")
+    magic, version, n, seq = _HEADER.unpack_from(data)
+    if magic != PACKET_MAGIC or version != PACKET_VERSION:
+        raise ValueError("bad magic/version")
+    if not 0 < n <= MAX_CHANNELS or len(data) != _HEADER.size + 4 * n:
+        raise ValueError("bad channel count")
+    return seq, Setpoint(struct.unpack_from(f"<{n}f", data, _HEADER.size))
+
+
+def seq_newer(seq: int, last: int) -> bool:
+    """True if ``seq`` follows ``last`` (RFC 1982 style, 32-bit)."""
+    diff = (seq - last) % _SEQ_MOD
+    return 0 < diff < _SEQ_MOD // 2
+
+
+class NetInputWorker(QObject):
+    listening = Signal(str)
+    error = Signal(str)
+
+    def __init__(self, sink: Callable[[Setpoint], None], host: str = "0.0.0.0",
+                 port: int = DEFAULT_PORT, predictor: Optional[SetpointPredictor] = None,
+                 cueing: Optional[WashoutFilter] = None, parent=None):
+        super().__init__(parent)
+        self._sink = sink
+        self._predictor = predictor
+        self._cueing = cueing
+        self._timeout = 0.1 if predictor is None else min(0.1, predictor.settle_s / 2)
+        self._host = host
+        self._port = port
+        self._sock: Optional[socket.socket] = None
+        self._running = False
+        self._enabled = True
+        self._last_seq: Optional[int] = None
+        self._last_rx = 0.0
+        self.received = 0
+        self.delivered = 0
+        self.stale = 0
+        self.malformed = 0
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._sock.getsockname() if self._sock is not None else (self._host, self._port)
+
+    def bind(self) -> bool:
+        if self._sock is not None:
+            return True
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self._host, self._port))
+        except OSError as e:
+            self.error.emit(f"UDP bind {self._host}:{self._port} failed: {e}")
+            return False
+        sock.settimeout(self._timeout)
+        self._sock = sock
+        host, port = sock.getsockname()
+        self.listening.emit(f"{host}:{port}")
+        return True
+
+    def start(self) -> None:
+        self._running = True
+        if not self.bind():
+            return
+        try:
+            self._loop()
+        finally:
+            self._sock.close()
+            self._sock = None
+
+    def stop(self) -> None:
+        self._running = False
+
+    def set_enabled(self, on: bool) -> None:
+        """While disabled, packets are consumed and counted but not delivered."""
+        self._enabled = bool(on)
+
+    def _loop(self) -> None:
+        sock = self._sock
+        while self._running:
+            try:
+                data = sock.recv(512)
+            except socket.timeout:
+                self._settle()
+                continue
+            except OSError as e:
+                self.error.emit(f"UDP receive failed: {e}")
+                break
+            newest = self._accept(data)
+            # drain the backlog without blocking; newest wins
+            sock.setblocking(False)
+            try:
+                while True:
+                    data = sock.recv(512)
+                    newest = self._accept(data) or newest
+            except (BlockingIOError, InterruptedError):
+                pass
+            finally:
+                sock.settimeout(self._timeout)
+            if newest is not None and self._enabled:
+                self.delivered += 1
+                if self._predictor is not None:
+                    newest = self._predictor.update(newest)
+                self._sink(newest)
+
+    def _settle(self) -> None:
+        predictor = self._predictor
+        if predictor is not None and predictor.due_to_settle():
+            setpoint = predictor.settle()
+            if setpoint is not None and self._enabled:
+                self._sink(setpoint)
+
+    def _accept(self, data: bytes) -> Optional[Setpoint]:
+        self.received += 1
+        try:
+            seq, setpoint = decode_packet(data)
+        except (ValueError, struct.error):
+            self.malformed += 1
+            return None
+        if self._cueing is not None and len(setpoint) < TELEMETRY_CHANNELS:
+            self.malformed += 1
+            return None
+        now = time.monotonic()
+        if (self._last_seq is not None and now - self._last_rx < SENDER_IDLE_S
+                and not seq_newer(seq, self._last_seq)):
+            self.stale += 1
+            return None
+        self._last_seq = seq
+        self._last_rx = now
+        if self._cueing is not None:
+            return self._cueing.step(setpoint)
+        return setpoint
@@ -0,0 +1,202 @@
+# core/playback.py
+"""One long-lived playback thread for every sequence the GUI runs.
+
+Starting a sequence used to mean a new ``QThread`` and worker, six signal
+connections, a fresh CSV read and -- when one was already running -- up to
+two seconds waiting for the old thread to wind down.  :class:`PlaybackEngine`
+keeps a single thread for the whole session and takes commands from any
+thread:
+
+  load(path, dt)        read a sequence in the background, keep it ready
+  play(path, dt)        stop whatever is playing and start this one now
+  queue_next(path, dt)  play this one as soon as the current one ends
+  abort()               stop the current sequence and forget queued ones
+  set_speed(factor)     play faster or slower, from the next step on
+
+Sequences are read on a separate loader thread as soon as they are named,
+so the next one is in memory while the current one plays; parsed ones are
+kept by a :class:`~core.library.SequenceLibrary`.  The engine
+hands the rows to a *player* built by ``player_factory(path, rows, t0)``
+-- a :class:`~core.sequence.SequenceWorker` or :class:`~core.sync.SyncPlayer`
+-- and runs it on its own thread.  ``t0`` is where the previous player's
+keyframe stream ended (its ``stream_t``), so a queued sequence continues on
+the board's clock instead of starting over at zero.
+
+Rows reach the player through a :class:`~core.timescale.ScaledPlayback`,
+which resamples them at the engine's current speed (1x plays them as
+read) and keeps a sped-up ride under ``max_vel``, in setpoint units per
+second -- the limiter's ``MotionLimits.max_vel``.  A sequence that takes
+over from another -- queued behind it, or played over it -- is
+crossfaded in over ``fade_s`` (:func:`~core.timescale.crossfade`) from
+where the outgoing one was heading, rather than snapping to its first row.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+from PySide6.QtCore import QObject, Qt, Signal
+
+from core.library import SequenceLibrary
+from core.limits import MotionLimits
+from core.setpoint import DEFAULT_CHANNELS
+from core.timescale import FADE_S, TICK_S, ScaledPlayback, clamp_speed, crossfade
+
+_PLAY = "play"
+_NEXT = "next"
+
+
+class PlaybackEngine(QObject):
+    """Persistent sequence player driven by a thread-safe command queue."""
+
+    started = Signal(str)  # sequence name
+    finished = Signal(str)
+    aborted = Signal(str)
+    idle = Signal()  # a sequence ended and nothing is queued after it
+    stepEmitted = Signal(object)  # Setpoint
+    error = Signal(str)
+
+    def __init__(self, player_factory: Callable, channels: int = DEFAULT_CHANNELS,
+                 library: Optional[SequenceLibrary] = None, max_vel: float = MotionLimits.max_vel,
+                 tick_s: float = TICK_S, fade_s: float = FADE_S):
+        super().__init__()
+        self._factory = player_factory
+        self.library = library if library is not None else SequenceLibrary(channels=channels)
+        self._cmds: "queue.Queue[tuple]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped by play()/abort(): older queued commands are void
+        self._pending = 0  # play/next commands not yet done with
+        self._player = None
+        self._stream_t = 0.0
+        self._speed = 1.0
+        self.max_vel = max_vel
+        self.tick_s = tick_s
+        self.fade_s = fade_s  # crossfade into a sequence that follows another; 0 = cut
+        self._outgoing: Optional[ScaledPlayback] = None  # the run just handed over from
+        self._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="seq-load")
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="playback", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        self.abort()
+        self._cmds.put(None)
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        self._loader.shutdown(wait=False, cancel_futures=True)
+
+    # ----- commands (any thread) ---------------------------------------------
+    def load(self, path, dt: float) -> Future:
+        """Read ``path`` in the background; the future resolves to ``(setpoints, dts)``.
+
+        An unchanged file already in the library resolves at once.
+        """
+        return self._loader.submit(self.library.get, path, dt)
+
+    def play(self, path, dt: float) -> None:
+        future = self.load(path, dt)
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            if self._player is not None:
+                self._player.stop()
+            self._pending += 1
+        self._cmds.put((_PLAY, path, future, generation))
+
+    def queue_next(self, path, dt: float) -> None:
+        future = self.load(path, dt)
+        with self._lock:
+            generation = self._generation
+            self._pending += 1
+        self._cmds.put((_NEXT, path, future, generation))
+
+    def abort(self) -> bool:
+        """Stop the current sequence and drop queued ones; False if nothing was playing."""
+        with self._lock:
+            self._generation += 1
+            player = self._player
+            if player is not None:
+                player.stop()
+        return player is not None
+
+    def set_speed(self, factor: float) -> float:
+        """Playback speed (1.0 = as written), clamped; takes effect on the next step."""
+        self._speed = clamp_speed(factor)
+        return self._speed
+
+    @property
+    def speed(self) -> float:
+        return self._speed
+
+    @property
+    def busy(self) -> bool:
+        """A sequence is playing or queued."""
+        return self._pending > 0
+
+    # ----- engine thread -------------------------------------------------------
+    def _loop(self):
+        while not self._stop.is_set():
+            cmd = self._cmds.get()
+            if cmd is None:
+                continue
+            _, path, future, generation = cmd
+            if generation == self._generation:
+                self._run(Path(path), future, generation)
+            with self._lock:
+                self._pending -= 1
+                done = self._pending == 0
+            if done:
+                self._outgoing = None  # nothing follows: the next play starts fresh
+                if not self._stop.is_set():
+                    self.idle.emit()
+
+    def _tail(self):
+        """Where the outgoing sequence would go on, ``t`` wall seconds after the handoff."""
+        prev = self._outgoing
+        if prev is None:
+            return None
+        start = prev.position_s
+        return lambda t: prev.sample(start + t * self._speed)
+
+    def _run(self, path: Path, future: Future, generation: int):
+        try:
+            rows = future.result()
+        except Exception as exc:
+            self.error.emit(f"{path.name}: CSV read error: {exc}")
+            return
+        timeline = ScaledPlayback(*rows, speed=lambda: self._speed, tick_s=self.tick_s,
+                                  max_vel=self.max_vel)
+        player = self._factory(path, crossfade(self._tail(), timeline, self.fade_s, self.max_vel),
+                               self._stream_t)
+        ended, moved = [], []
+        player.stepEmitted.connect(self.stepEmitted.emit, Qt.DirectConnection)
+        player.stepEmitted.connect(lambda _: moved or moved.append(True), Qt.DirectConnection)
+        player.error.connect(self.error.emit, Qt.DirectConnection)
+        player.aborted.connect(lambda: ended.append(True), Qt.DirectConnection)
+        with self._lock:
+            if generation != self._generation:
+                return  # aborted or replaced while it was loading
+            self._player = player
+        self.started.emit(path.name)
+        try:
+            player.run()
+        except Exception as exc:
+            self.error.emit(f"{path.name}: {exc}")
+            ended.append(True)
+        finally:
+            with self._lock:
+                self._player = None
+        self._stream_t = getattr(player, "stream_t", 0.0)
+        if moved:
+            self._outgoing = timeline
+        if ended:
+            self.aborted.emit(path.name)
+        else:
+            self.finished.emit(path.name)
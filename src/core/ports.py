@@ -0,0 +1,213 @@
+# core/ports.py
+"""Serial port discovery: enumerate once, probe in parallel, remember boards.
+
+``comports()`` is slow on some hosts and says nothing about what a board
+runs.  :class:`PortDiscovery` caches the enumeration for ``ENUM_TTL_S`` and
+keeps an identity per board keyed by USB VID/PID and serial number, so a
+board that re-enumerates on another device path (``ttyACM0`` -> ``ttyACM1``
+after a replug) is recognised without probing it again.
+
+A probe opens the port with DTR low (no auto-reset), sends ``I`` and reads
+until the sketch answers ``ID <name>`` -- or prints its ``READY <name>``
+banner if the open reset it after all -- trying each baud rate in turn.
+All unidentified ports are probed at once on a thread pool, so a host with
+several boards costs one probe round, not one per board.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import serial
+import serial.tools.list_ports
+from PySide6.QtCore import QObject, Signal
+
+from core.connection import READY_BANNER, open_serial
+
+IDENTIFY_PAYLOAD = b"I\n"
+# double_actuator first: its parseFloat() would swallow the next probe while
+# chewing on wrong-baud noise for seconds; arduino.txt drops noise at once
+BAUDRATES = (9600, 115200)
+PROBE_TIMEOUT_S = 1.0  # per baud rate
+ENUM_TTL_S = 2.0
+
+# USB bridges found on Arduino-compatible boards
+USB_IDS = {
+    0x2341: "Arduino",
+    0x2A03: "Arduino",
+    0x1A86: "CH340",
+    0x0403: "FTDI",
+    0x10C4: "CP210x",
+}
+
+
+def is_arduino_port(p) -> bool:
+    return "Arduino" in (p.description or "") or "usbmodem" in p.device or "wchusbserial" in p.device
+
+
+def is_candidate(p) -> bool:
+    return is_arduino_port(p) or getattr(p, "vid", None) in USB_IDS
+
+
+def parse_identity(line: bytes) -> Optional[str]:
+    """Sketch name from an ``ID``/``READY`` line, "" for an unnamed answer, else None."""
+    words = line.strip().split()
+    if not words:
+        return None
+    head = words[0].upper()
+    if head == b"ID" or head == READY_BANNER:
+        return words[1].decode(errors="ignore") if len(words) > 1 else ""
+    if head == b"READY":  # "Ready for serial commands" -- double_actuator before the banner
+        return "double_actuator" if b"serial commands" in line else ""
+    if head == b"PONG":
+        return ""
+    return None
+
+
+@dataclass(frozen=True)
+class PortInfo:
+    device: str
+    description: str = ""
+    vid: Optional[int] = None
+    pid: Optional[int] = None
+    serial_number: Optional[str] = None
+    firmware: Optional[str] = None  # sketch name; "" = answered but unnamed, None = unknown
+    baud: Optional[int] = None  # baud rate the probe got an answer at
+
+    @property
+    def key(self) -> Tuple:
+        # clones without a serial number fall back to the device path
+        return (self.vid, self.pid, self.serial_number or self.device)
+
+    @property
+    def identified(self) -> bool:
+        return self.firmware is not None
+
+    def label(self) -> str:
+        what = self.firmware or ("unknown firmware" if self.firmware == "" else "not probed")
+        return f"{self.device} — {what}" + (f" @ {self.baud}" if self.baud else "")
+
+
+def probe_port(device: str, factory=serial.Serial, baudrates: Sequence[int] = BAUDRATES,
+               timeout: float = PROBE_TIMEOUT_S) -> Tuple[Optional[str], Optional[int]]:
+    """Ask the board on ``device`` what it runs; returns ``(firmware, baud)``."""
+    for baud in baudrates:
+        try:
+            ser = open_serial(factory, device, baud, 0.05, reset=False)
+        except Exception:
+            return None, None  # busy or gone: no other baud will help
+        try:
+            ser.write(IDENTIFY_PAYLOAD)
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                line = ser.readline()
+                if line:
+                    name = parse_identity(line)
+                    if name is not None:
+                        return name, baud
+        except Exception:
+            pass
+        finally:
+            try: ser.close()
+            except: pass
+    return None, None
+
+
+class PortDiscovery(QObject):
+    """Cached, parallel-probing view of the attached boards; thread-safe."""
+
+    scanned = Signal(list)  # List[PortInfo], from scan_async()
+
+    def __init__(self, serial_factory=None, lister: Optional[Callable[[], list]] = None,
+                 baudrates: Sequence[int] = BAUDRATES, probe_timeout: float = PROBE_TIMEOUT_S,
+                 enum_ttl: float = ENUM_TTL_S, parent=None):
+        super().__init__(parent)
+        self._factory = serial_factory or serial.Serial
+        self._lister = lister or serial.tools.list_ports.comports
+        self._baudrates = tuple(baudrates)
+        self._probe_timeout = probe_timeout
+        self._enum_ttl = enum_ttl
+        self._lock = threading.Lock()
+        self._enum: List[PortInfo] = []
+        self._enum_t = float("-inf")
+        self._known: Dict[Tuple, PortInfo] = {}  # key -> identified board, survives replugs
+        self.enumerations = 0
+        self.probes = 0
+
+    def ports(self, refresh: bool = False) -> List[PortInfo]:
+        """Candidate ports (cached enumeration), with any identity already known."""
+        with self._lock:
+            if refresh or time.monotonic() - self._enum_t > self._enum_ttl:
+                self._enum = [PortInfo(p.device, p.description or "", getattr(p, "vid", None),
+                                       getattr(p, "pid", None), getattr(p, "serial_number", None))
+                              for p in self._lister() if is_candidate(p)]
+                self._enum_t = time.monotonic()
+                self.enumerations += 1
+            out = []
+            for info in self._enum:
+                known = self._known.get(info.key)
+                out.append(replace(info, firmware=known.firmware, baud=known.baud) if known else info)
+            return out
+
+    def scan(self, refresh: bool = True, reprobe: bool = False, probe: bool = True,
+             exclude: Sequence[str] = ()) -> List[PortInfo]:
+        """Enumerate and probe every unidentified port concurrently.
+
+        Ports in ``exclude`` (e.g. the one a worker has open) are not touched.
+        """
+        infos = self.ports(refresh)
+        todo = [info for info in infos if probe and info.device not in exclude
+                and (reprobe or not info.identified)]
+        if todo:
+            self.probes += len(todo)
+            with ThreadPoolExecutor(max_workers=len(todo), thread_name_prefix="probe") as pool:
+                results = list(pool.map(self._probe, todo))
+            with self._lock:
+                for info, (firmware, baud) in zip(todo, results):
+                    if firmware is not None:
+                        self._known[info.key] = replace(info, firmware=firmware, baud=baud)
+                    else:
+                        self._known.pop(info.key, None)
+            infos = self.ports()
+        return infos
+
+    def scan_async(self, **scan_kwargs) -> None:
+        """:meth:`scan` on a background thread; the result arrives via :attr:`scanned`."""
+        threading.Thread(target=lambda: self.scanned.emit(self.scan(**scan_kwargs)), daemon=True).start()
+
+    def find(self, firmware: Optional[str] = None, baud: Optional[int] = None) -> List[str]:
+        """Devices worth trying: matching identified boards first, then unknown ones.
+
+        Boards identified as running other firmware (or at another baud) are left out.
+        """
+        matched, unknown = [], []
+        for info in self.ports():
+            if not info.identified:
+                unknown.append(info.device)
+            elif (firmware is None or info.firmware == firmware) and (baud is None or info.baud == baud):
+                matched.append(info.device)
+        return matched + unknown
+
+    def info(self, device: str) -> Optional[PortInfo]:
+        for info in self.ports():
+            if info.device == device:
+                return info
+        return None
+
+    def forget(self, device: Optional[str] = None) -> None:
+        """Drop cached identities (all, or the board on ``device``)."""
+        with self._lock:
+            if device is None:
+                self._known.clear()
+            else:
+                for key, info in list(self._known.items()):
+                    if info.device == device:
+                        del self._known[key]
+            self._enum_t = float("-inf")
+
+    def _probe(self, info: PortInfo) -> Tuple[Optional[str], Optional[int]]:
+        return probe_port(info.device, self._factory, self._baudrates, self._probe_timeout)
@@ -0,0 +1,121 @@
+# core/predict.py
+"""Latency-hiding setpoint extrapolation for live input.
+
+Between the firmware's blocking moves and the serial worker's ack wait,
+the platform trails the stick by the link latency.  :class:`SetpointPredictor`
+tracks position, velocity and acceleration of every channel with an
+alpha-beta-gamma filter (robust to the uneven spacing of input events) and
+commands where the input is expected to be one link latency from now.
+
+The horizon comes from the measured enqueue -> ack latency
+(:meth:`LatencyTracker.link_latency_s`) unless fixed, and is capped at
+``max_horizon_s``.  The extrapolated lead is clamped to ``max_lead`` per
+channel and the output to ``bounds``, so a noisy burst can never command
+more than a small overshoot.  Input is event driven, so once it goes quiet
+for ``settle_s`` the owner calls :meth:`settle` to send the true last value
+and take back any lead.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Callable, Optional, Tuple
+
+from core.latency import LATENCY
+from core.setpoint import Setpoint
+
+MAX_HORIZON_S = 0.2
+MAX_LEAD = 10.0  # same units as the setpoint (degrees)
+SETTLE_S = 0.1
+HORIZON_REFRESH_S = 0.5
+
+
+class SetpointPredictor:
+    """Per-channel alpha-beta-gamma tracker + clamped extrapolation."""
+
+    def __init__(self, horizon_s: Optional[float] = None, max_horizon_s: float = MAX_HORIZON_S,
+                 max_lead: float = MAX_LEAD, bounds: Optional[Tuple[float, float]] = None,
+                 alpha: float = 0.8, beta: float = 0.4, gamma: float = 0.05,
+                 settle_s: float = SETTLE_S,
+                 latency_source: Callable[[], float] = LATENCY.link_latency_s):
+        self.fixed_horizon_s = horizon_s
+        self.max_horizon_s = max_horizon_s
+        self.max_lead = max_lead
+        self.bounds = bounds
+        self.alpha, self.beta, self.gamma = alpha, beta, gamma
+        self.settle_s = settle_s
+        self._latency_source = latency_source
+        self._horizon_s = 0.0 if horizon_s is None else min(horizon_s, max_horizon_s)
+        self._next_refresh = 0.0
+        self.reset()
+
+    @property
+    def horizon_s(self) -> float:
+        return self._horizon_s
+
+    def reset(self) -> None:
+        self._x: Optional[list] = None
+        self._v: list = []
+        self._a: list = []
+        self._last_t = 0.0
+        self._last_raw: Optional[Setpoint] = None
+        self._leading = False
+
+    def update(self, setpoint: Setpoint, t: Optional[float] = None) -> Setpoint:
+        """Feed a raw setpoint; returns the setpoint to command."""
+        now = time.monotonic() if t is None else t
+        self._refresh_horizon(now)
+        raw = list(setpoint)
+        self._last_raw = Setpoint(setpoint)
+        if self._x is None or len(raw) != len(self._x) or now - self._last_t > self.settle_s:
+            # first sample, or the input was idle: restart from rest
+            self._x = raw
+            self._v = [0.0] * len(raw)
+            self._a = [0.0] * len(raw)
+            self._last_t = now
+            self._leading = False
+            return self._clamp(Setpoint(raw))
+
+        dt = max(now - self._last_t, 1e-4)
+        self._last_t = now
+        alpha, beta, gamma = self.alpha, self.beta, self.gamma
+        h = self._horizon_s
+        out = Setpoint(raw)
+        for i, z in enumerate(raw):
+            a = self._a[i]
+            v = self._v[i] + a * dt
+            x = self._x[i] + self._v[i] * dt + 0.5 * a * dt * dt
+            r = z - x
+            x += alpha * r
+            v += beta * r / dt
+            a += 2.0 * gamma * r / (dt * dt)
+            self._x[i], self._v[i], self._a[i] = x, v, a
+            lead = v * h + 0.5 * a * h * h
+            lead = min(self.max_lead, max(-self.max_lead, lead))
+            out[i] = z + lead
+        self._leading = h > 0
+        return self._clamp(out)
+
+    def due_to_settle(self, t: Optional[float] = None) -> bool:
+        now = time.monotonic() if t is None else t
+        return self._leading and now - self._last_t >= self.settle_s
+
+    def settle(self) -> Optional[Setpoint]:
+        """The last raw setpoint (no lead), once; None if nothing to take back."""
+        if not self._leading or self._last_raw is None:
+            return None
+        self._leading = False
+        return self._clamp(Setpoint(self._last_raw))
+
+    def _refresh_horizon(self, now: float) -> None:
+        if self.fixed_horizon_s is not None or now < self._next_refresh:
+            return
+        self._next_refresh = now + HORIZON_REFRESH_S
+        self._horizon_s = min(self.max_horizon_s, max(0.0, self._latency_source()))
+
+    def _clamp(self, setpoint: Setpoint) -> Setpoint:
+        if self.bounds is not None:
+            lo, hi = self.bounds
+            for i in range(len(setpoint)):
+                setpoint[i] = min(hi, max(lo, setpoint[i]))
+        return setpoint
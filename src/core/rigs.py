@@ -0,0 +1,561 @@
+# core/rigs.py
+"""Drive several rigs (one serial board per seat) from a single process.
+
+:class:`RigManager` is a drop-in replacement for :class:`ArduinoWorker` in
+the GUI (same signals, ``send_setpoint``/``send_angles`` slots) that owns
+one link per port.  Setpoints are broadcast to every rig, or routed to one,
+after applying that rig's per-channel calibration (``value * scale +
+offset``).  All links are served by one I/O thread multiplexed with
+``selectors`` -- reads are non-blocking and each link keeps its own
+one-command-in-flight/ack state -- so adding a seat adds a few objects,
+not two more threads.
+
+For synchronized playback each link also keeps a clock estimate of its
+board (see core/sync.py) and :meth:`RigManager.send_timed` stamps steps
+with the board-local due time.
+"""
+
+from __future__ import annotations
+
+import json
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Deque, List, Optional
+
+import serial
+from PySide6.QtCore import QObject, Signal, Slot
+
+from core import frames
+from core.arduino import ESTOP_BYTE, RESUME_PAYLOAD
+from core.connection import (READY_TIMEOUT_S, REPLAY_LATEST, Backoff, apply_replay_policy,
+                             check_policy, open_serial)
+from core.delta import KEEPALIVE_S, DeltaEncoder, is_motion
+from core.frames import FrameParser
+from core.latency import LATENCY, ACK, DEQUEUE, ENQUEUE, WRITE
+from core.limits import SetpointLimiter
+from core.ports import PortDiscovery
+from core.setpoint import Setpoint
+from core.sync import PING_PAYLOAD, ClockEstimator
+
+ACK_TIMEOUT_S = 1.0
+POLL_INTERVAL_S = 0.002  # for links without a selectable fd (e.g. core.sim)
+FOLLOW_INTERVAL_S = 0.05  # limiter catch-up steps while no new input arrives
+
+
+@dataclass
+class RigConfig:
+    port: str
+    name: str = ""
+    offset: List[float] = field(default_factory=list)
+    scale: List[float] = field(default_factory=list)
+    baud: int = 115200
+
+    @property
+    def label(self) -> str:
+        return self.name or self.port
+
+    @property
+    def calibrated(self) -> bool:
+        return bool(self.offset or self.scale)
+
+    def calibrate(self, setpoint: Setpoint) -> Setpoint:
+        if not self.calibrated:
+            return setpoint
+        out = Setpoint(setpoint)
+        for i in range(len(out)):
+            scale = self.scale[i] if i < len(self.scale) else 1.0
+            offset = self.offset[i] if i < len(self.offset) else 0.0
+            out[i] = out[i] * scale + offset
+        return out
+
+
+def load_rig_configs(path: Path | str) -> List[RigConfig]:
+    """Read a JSON list of ``{"port", "name", "offset", "scale", "baud"}`` objects."""
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    return [RigConfig(**item) for item in data]
+
+
+def rig_configs_from_ports(spec: str, discovery: Optional[PortDiscovery] = None) -> List[RigConfig]:
+    """``"auto"`` for every detected Arduino, else a comma-separated port list.
+
+    ``"auto"`` probes all candidate ports in one round and takes each
+    board's baud rate from its answer.
+    """
+    if spec.strip().lower() == "auto":
+        infos = (discovery or PortDiscovery()).scan()
+        return [RigConfig(port=info.device, baud=info.baud) if info.baud else RigConfig(port=info.device)
+                for info in infos]
+    ports = [p.strip() for p in spec.split(",") if p.strip()]
+    return [RigConfig(port=p) for p in ports]
+
+
+class _RigLink:
+    """Per-port state owned by the I/O thread (``pending`` is shared, under ``lock``)."""
+
+    def __init__(self, config: RigConfig):
+        self.config = config
+        self.ser = None
+        self.fd: Optional[int] = None
+        self.pending: Deque = deque()
+        self.lock = threading.Lock()  # producers append to ``pending`` from any thread
+        self.latest = None  # (payload, trace) from send_latest, newest wins
+        self.inflight = None  # (payload, trace)
+        self.inflight_delta = False  # it went out as a D frame
+        self.rejected = False  # ERR seen for the in-flight command
+        self.encoder = DeltaEncoder()
+        self.limiter: Optional[SetpointLimiter] = None  # this rig's own motion history
+        self.deadline = 0.0
+        self.ready = False  # READY banner / PONG seen since the port opened
+        self.ready_deadline = 0.0
+        self.next_open = 0.0
+        self.backoff = Backoff()
+        self.rx = FrameParser()
+        self.clock = ClockEstimator()
+        self.ping_sent = 0.0
+
+
+class RigManager(QObject):
+    connected = Signal(str)
+    disconnected = Signal(str)
+    ack = Signal(str)
+    error = Signal(str)
+    message = Signal(str)  # firmware output that is not a reply
+
+    def __init__(self, configs: List[RigConfig], serial_factory=None,
+                 ack_timeout: float = ACK_TIMEOUT_S, replay_policy: str = REPLAY_LATEST,
+                 reset_on_connect: bool = True, ready_timeout: float = READY_TIMEOUT_S,
+                 keepalive_s: float = KEEPALIVE_S, delta: bool = False, parent=None):
+        super().__init__(parent)
+        self._replay_policy = check_policy(replay_policy)
+        self._reset_on_connect = reset_on_connect
+        self._ready_timeout = ready_timeout
+        self._links = [_RigLink(c) for c in configs]
+        for link in self._links:
+            link.encoder = DeltaEncoder(keepalive_s, delta)
+        self._by_port = {link.config.port: link for link in self._links}
+        self._serial_factory = serial_factory or serial.Serial
+        self._ack_timeout = ack_timeout
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._latest_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._estop = threading.Event()
+        self.estop_write_ns = 0
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+
+    @property
+    def ports(self) -> List[str]:
+        return [link.config.port for link in self._links]
+
+    def set_limiter(self, limiter: Optional[SetpointLimiter]):
+        """Shape every outgoing setpoint (before calibration) through ``limiter``.
+
+        Each rig gets its own copy, so it is limited against where that rig
+        was last sent, not against whichever rig was routed to last.
+        """
+        for link in self._links:
+            link.limiter = None if limiter is None else SetpointLimiter(limiter.limits, limiter.max_dt_s)
+
+    def set_replay_policy(self, policy: str):
+        """What to replay after a reconnect: ``"latest"`` or ``"all"`` (core.connection)."""
+        self._replay_policy = check_policy(policy)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(2.0)
+        for link in self._links:
+            self._close(link, emit=True)
+
+    # ----- producers (any thread) ------------------------------------------
+    @Slot(object)
+    def send_setpoint(self, setpoint: Setpoint, trace=None):
+        """Broadcast to every rig; only the first carries the latency trace."""
+        if self._estop.is_set():
+            LATENCY.drop(trace)
+            return
+        if trace is None:
+            trace = LATENCY.open(ENQUEUE)
+        else:
+            trace[ENQUEUE] = time.perf_counter_ns()
+        for link in self._links:
+            payload = self._encode_for(link, setpoint)
+            with link.lock:
+                link.pending.append((payload, trace))
+            trace = None
+        self._wake()
+
+    def send_latest(self, setpoint: Setpoint, trace=None):
+        """Broadcast, replacing any not-yet-written ``send_latest`` setpoint per rig."""
+        if self._estop.is_set():
+            LATENCY.drop(trace)
+            return
+        if trace is None:
+            trace = LATENCY.open(ENQUEUE)
+        else:
+            trace[ENQUEUE] = time.perf_counter_ns()
+        for link in self._links:
+            payload = self._encode_for(link, setpoint)
+            with self._latest_lock:
+                old, link.latest = link.latest, (payload, trace)
+            if old is not None:
+                LATENCY.drop(old[1])
+            trace = None
+        self._wake()
+
+    @staticmethod
+    def _encode_for(link: _RigLink, setpoint: Setpoint, t: Optional[float] = None, follow: bool = True) -> bytes:
+        """What ``link`` is sent for ``setpoint``: through its own limiter, then its calibration."""
+        if link.limiter is not None:
+            setpoint = link.limiter.apply(setpoint, t, follow)
+        return (link.config.calibrate(setpoint) if link.config.calibrated else setpoint).encode()
+
+    def _take_latest(self, link: _RigLink):
+        with self._latest_lock:
+            item, link.latest = link.latest, None
+        return item
+
+    @Slot(float, float, float)
+    def send_angles(self, a1: float, a2: float, a3: float, trace=None):
+        self.send_setpoint(Setpoint.of(a1, a2, a3), trace)
+
+    def route(self, port: str, setpoint: Setpoint, trace=None) -> bool:
+        link = self._by_port.get(port)
+        if link is None or self._estop.is_set():
+            LATENCY.drop(trace)
+            return False
+        if trace is None:
+            trace = LATENCY.open(ENQUEUE)
+        else:
+            trace[ENQUEUE] = time.perf_counter_ns()
+        payload = self._encode_for(link, setpoint)
+        with link.lock:
+            link.pending.append((payload, trace))
+        self._wake()
+        return True
+
+    # ----- E-stop ---------------------------------------------------------
+    @Slot()
+    def estop(self):
+        """Drop every queued command and write the E-stop byte to every rig now.
+
+        Callable from any thread; motion stays latched off until :meth:`resume`.
+        """
+        self._estop.set()
+        for link in self._links:
+            with link.lock:
+                dropped = list(link.pending)
+                link.pending.clear()
+            with self._latest_lock:
+                latest, link.latest = link.latest, None
+            ser = link.ser
+            if ser is not None:
+                try:
+                    with self._write_lock:
+                        ser.write(ESTOP_BYTE)
+                        self.estop_write_ns = time.perf_counter_ns()
+                except Exception as e:
+                    self.error.emit(f"{link.config.label}: E-stop write failed: {e}")
+            for item in dropped + [latest]:
+                if item is not None:
+                    LATENCY.drop(item[1])
+        for link in self._links:
+            if link.limiter is not None:
+                link.limiter.halt()  # keep where the rig was sent; resume from rest
+        self._wake()
+
+    @Slot()
+    def resume(self):
+        if not self._estop.is_set():
+            return
+        self._estop.clear()
+        for link in self._links:
+            with link.lock:
+                link.pending.append((RESUME_PAYLOAD, None))
+        self._wake()
+
+    @property
+    def estopped(self) -> bool:
+        return self._estop.is_set()
+
+    @property
+    def ready(self) -> bool:
+        """Every link is open and its board has reported READY."""
+        return all(link.ser is not None and link.ready for link in self._links)
+
+    # ----- master clock ---------------------------------------------------
+    def ping_all(self):
+        for link in self._links:
+            with link.lock:
+                link.pending.append((PING_PAYLOAD, None))
+        self._wake()
+
+    def sync_clocks(self, pings: int = 8, timeout_s: float = 3.0) -> bool:
+        """Ping every rig ``pings`` times; True once every clock estimate is ready."""
+        for _ in range(pings):
+            self.ping_all()
+        deadline = time.monotonic() + timeout_s
+        while time.monotonic() < deadline:
+            if all(link.clock.samples >= pings for link in self._links):
+                break
+            time.sleep(0.01)
+        return all(link.clock.ready for link in self._links)
+
+    def send_timed(self, setpoint: Setpoint, due_s: float, duration_s: float):
+        """Queue ``setpoint`` to run on every rig at host monotonic time ``due_s``."""
+        if self._estop.is_set():
+            return
+        dur_ms = max(0, int(duration_s * 1000.0))
+        for link in self._links:
+            values = self._encode_for(link, setpoint, t=due_s, follow=False)
+            if link.clock.ready:
+                payload = b"@%d,%d," % (link.clock.to_device_ms(due_s), dur_ms) + values
+            else:
+                payload = values
+            with link.lock:
+                link.pending.append((payload, None))
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    # ----- I/O thread ------------------------------------------------------
+    def _loop(self):
+        sel = selectors.DefaultSelector()
+        sel.register(self._wake_r, selectors.EVENT_READ, None)
+        self._sel = sel
+        try:
+            while not self._stop.is_set():
+                self._follow_limiter()
+                timeout = self._service(time.monotonic())
+                if any(link.limiter is not None and link.limiter.behind for link in self._links):
+                    timeout = FOLLOW_INTERVAL_S if timeout is None else min(timeout, FOLLOW_INTERVAL_S)
+                if any(link.ser is not None and link.fd is None for link in self._links):
+                    timeout = POLL_INTERVAL_S if timeout is None else min(timeout, POLL_INTERVAL_S)
+                for key, _ in sel.select(timeout):
+                    if key.data is None:
+                        try:
+                            while self._wake_r.recv(4096):
+                                pass
+                        except (BlockingIOError, OSError):
+                            pass
+        finally:
+            sel.close()
+
+    def _follow_limiter(self):
+        # a link idle but its last target was rate-limited: keep closing in on it
+        if self._estop.is_set():
+            return
+        for link in self._links:
+            limiter = link.limiter
+            if (limiter is None or not limiter.behind or link.pending or link.latest is not None
+                    or link.inflight is not None):
+                continue
+            setpoint = limiter.follow()
+            if setpoint is not None:
+                payload = (link.config.calibrate(setpoint) if link.config.calibrated else setpoint).encode()
+                with link.lock:
+                    link.pending.append((payload, None))
+
+    def _service(self, now: float) -> Optional[float]:
+        wake_at = None
+        for link in self._links:
+            try:
+                at = self._service_link(link, now)
+            except Exception as e:
+                self.error.emit(f"{link.config.label}: Write/read failed: {e}; reconnecting")
+                if link.inflight is not None:
+                    # absolute targets are idempotent: replay it after reconnecting
+                    if link.inflight[0] is not PING_PAYLOAD:
+                        with link.lock:
+                            link.pending.appendleft(link.inflight)
+                    link.inflight = None
+                self._close(link, emit=True)
+                link.next_open = now + link.backoff.next()
+                at = link.next_open
+            if at is not None:
+                wake_at = at if wake_at is None else min(wake_at, at)
+        return None if wake_at is None else max(0.0, wake_at - time.monotonic())
+
+    def _service_link(self, link: _RigLink, now: float) -> Optional[float]:
+        if link.ser is None:
+            if now < link.next_open:
+                return link.next_open
+            opened = self._open(link, now)
+            self._apply_replay_policy(link)
+            if not opened:
+                return link.next_open
+
+        ser = link.ser
+        waiting = ser.in_waiting
+        if waiting:
+            self._drain_lines(link, link.rx.feed(ser.read(waiting)))
+
+        if link.inflight is not None and now >= link.deadline:
+            if not self._retry_rejected(link):
+                LATENCY.complete(link.inflight[1])  # no ack; count up to the write
+            link.inflight = None
+
+        if not link.ready:
+            if now < link.ready_deadline:
+                return link.ready_deadline
+            link.ready = True
+            self.error.emit(f"{link.config.label}: no READY banner within {self._ready_timeout:.0f} s; "
+                            "sending anyway (firmware predates the handshake?)")
+
+        item = None
+        if link.inflight is None:
+            with link.lock:
+                if link.pending:
+                    item = link.pending.popleft()
+            if item is None:
+                item = self._take_latest(link)
+        if item is not None:
+            payload, trace = item
+            if trace is not None:
+                trace[DEQUEUE] = time.perf_counter_ns()
+            if payload is PING_PAYLOAD:
+                link.ping_sent = time.monotonic()
+            out = payload
+            if is_motion(payload):
+                out = link.encoder.encode(payload, now)
+                if out is None:
+                    LATENCY.drop(trace)  # same wire value as the last write: nothing to send
+                    return now if link.pending or link.latest is not None else None
+            elif payload == RESUME_PAYLOAD:
+                link.encoder.reset()
+            with self._write_lock:
+                if self._estop.is_set() and payload is not PING_PAYLOAD and payload != RESUME_PAYLOAD:
+                    LATENCY.drop(trace)  # raced estop(): never write motion after a stop
+                    return now if link.pending else None
+                ser.write(out)
+            if trace is not None:
+                trace[WRITE] = time.perf_counter_ns()
+            link.inflight = (payload, trace)
+            link.inflight_delta = out is not payload
+            link.rejected = False
+            link.deadline = now + self._ack_timeout
+
+        if link.inflight is not None:
+            return link.deadline
+        if link.pending or link.latest is not None:
+            return now
+        return None
+
+    def _drain_lines(self, link: _RigLink, lines: List[bytes]) -> None:
+        for line in lines:
+            kind = frames.classify(line)
+            if kind == frames.READY or kind == frames.PONG:
+                link.ready = True
+            if kind == frames.PONG and link.ping_sent:
+                self._on_pong(link, line)
+            elif kind == frames.STOPPED and link.inflight is not None:
+                LATENCY.drop(link.inflight[1])  # the command it was running got cut short
+                link.inflight = None
+            elif kind == frames.ERR and link.inflight is not None:
+                link.rejected = True  # e.g. "ERR nobase": a D frame the board could not apply
+                link.encoder.rejected()
+            elif kind == frames.ACK and link.inflight is not None:
+                payload, trace = link.inflight
+                if not self._retry_rejected(link):
+                    if is_motion(payload) and not link.rejected:
+                        link.encoder.acked()
+                    if trace is not None:
+                        trace[ACK] = time.perf_counter_ns()
+                    LATENCY.complete(trace)
+                link.inflight = None
+                self.ack.emit(f"{link.config.label}: {line.decode()}")
+            elif kind == frames.TEXT or kind == frames.IDENT:
+                self.message.emit(f"{link.config.label}: {line.decode(errors='ignore')}")
+
+    def _retry_rejected(self, link: _RigLink) -> bool:
+        # a refused D frame is sent again as an absolute line (the encoder was reset)
+        if link.rejected and link.inflight_delta:
+            with link.lock:
+                link.pending.appendleft(link.inflight)
+            return True
+        return False
+
+    def _on_pong(self, link: _RigLink, line: bytes) -> None:
+        recv = time.monotonic()
+        try:
+            device_ms = int(line.split()[1])
+        except (IndexError, ValueError):
+            return
+        # request "P\n" vs reply "PONG <ms>\r\n": correct the midpoint for the longer reply
+        asym = (len(line) + 2 - len(PING_PAYLOAD)) * 10.0 / link.config.baud / 2.0
+        link.clock.add_sample(link.ping_sent, device_ms, recv, asym)
+        link.ping_sent = 0.0
+        if link.inflight is not None and link.inflight[0] is PING_PAYLOAD:
+            link.inflight = None
+
+    def _apply_replay_policy(self, link: _RigLink) -> None:
+        with link.lock:
+            if link.pending:
+                apply_replay_policy(link.pending, self._replay_policy,
+                                    lambda item: item[0] == RESUME_PAYLOAD,
+                                    lambda item: LATENCY.drop(item[1]))
+        if self._estop.is_set() and link.ser is not None:
+            with self._write_lock:
+                link.ser.write(ESTOP_BYTE)  # stopped while the link was down
+
+    def _open(self, link: _RigLink, now: float) -> bool:
+        cfg = link.config
+        try:
+            link.ser = open_serial(self._serial_factory, cfg.port, cfg.baud, 0, self._reset_on_connect)
+        except Exception as e:
+            if not link.backoff.attempts:  # once per outage
+                self.error.emit(f"{cfg.label}: Serial open failed: {e}")
+            link.ser = None
+            link.next_open = now + link.backoff.next()
+            return False
+        link.backoff.reset()
+        link.rx.clear()
+        link.encoder.reset()
+        link.clock = ClockEstimator()  # the board reset, so did its clock
+        link.ready = False
+        link.ready_deadline = now + self._ready_timeout
+        if not self._reset_on_connect:
+            link.ping_sent = time.monotonic()
+            link.ser.write(PING_PAYLOAD)  # no reset expected: a running sketch answers PONG
+        fileno = getattr(link.ser, "fileno", None)
+        if fileno is not None:
+            try:
+                link.fd = fileno()
+                self._sel.register(link.fd, selectors.EVENT_READ, link)
+            except Exception:
+                link.fd = None
+        self.connected.emit(cfg.port)
+        return True
+
+    def _close(self, link: _RigLink, emit: bool) -> None:
+        if link.ser is None:
+            return
+        if link.fd is not None:
+            try:
+                self._sel.unregister(link.fd)
+            except Exception:
+                pass
+            link.fd = None
+        try:
+            link.ser.close()
+        except Exception:
+            pass
+        link.ser = None
+        if emit:
+            self.disconnected.emit(link.config.port)
@@ -1,62 +1,171 @@
 # core/sequence.py
 from PySide6.QtCore import QObject, Signal
-import time, csv, pathlib
+import csv, pathlib, threading
+from array import array
+
+from core.setpoint import DEFAULT_CHANNELS, Setpoint, parse_row
+
+
+def iter_rows(csv_path, dt=0.5, channels: int = DEFAULT_CHANNELS, stats=None):
+    """Yield ``(setpoint, dt)`` per data row; rows that do not parse (headers) are skipped.
+
+    ``stats``, if given, is a dict whose ``skipped`` and ``default_dt``
+    counters are increased for every skipped row and every row that fell
+    back to the default ``dt``.
+    """
+    with pathlib.Path(csv_path).open("r", newline="") as f:
+        for row in csv.reader(f):
+            try:
+                setpoint = parse_row(row, channels)
+            except (ValueError, IndexError):
+                # Not a valid data row (maybe header), skip
+                if stats is not None and row:
+                    stats["skipped"] = stats.get("skipped", 0) + 1
+                continue
+            # Per-row dt (column after the channels). Fallback to default if missing/invalid.
+            row_dt = None
+            if len(row) > channels and row[channels].strip():
+                try:
+                    row_dt = float(row[channels])
+                except ValueError:
+                    pass
+            if row_dt is None:
+                row_dt = dt
+                if stats is not None:
+                    stats["default_dt"] = stats.get("default_dt", 0) + 1
+            yield setpoint, row_dt
+
+
+def load_sequence(csv_path, dt=0.5, channels: int = DEFAULT_CHANNELS, stats=None):
+    """Read a whole sequence as ``(setpoints, dts)``, with the same row rules as the worker."""
+    setpoints = []
+    dts = array("d")
+    for setpoint, row_dt in iter_rows(csv_path, dt, channels, stats):
+        setpoints.append(setpoint)
+        dts.append(row_dt)
+    return setpoints, dts
+
+
+def row_pairs(rows):
+    """``(setpoint, dt)`` pairs from ``(setpoints, dts)`` or from any iterable of pairs."""
+    if isinstance(rows, tuple):
+        return zip(*rows)
+    return iter(rows)
+
+
+def resample(setpoints, dts, step: float):
+    """Linear resampling onto a uniform ``step`` grid, as ``(setpoints, dts)``.
+
+    Row ``i`` is reached ``sum(dts[:i])`` after the start.  Every row of the
+    result but the last is ``step`` apart (the one before it may be
+    shorter, to land on the original last row); the last row keeps its own
+    hold, so the duration is unchanged.
+    """
+    if step <= 0:
+        raise ValueError("step must be positive")
+    n = len(setpoints)
+    if n < 2:
+        return [Setpoint(sp) for sp in setpoints], array("d", dts)
+    times = array("d", [0.0])
+    for i in range(n - 1):
+        times.append(times[-1] + max(0.0, dts[i]))
+    t_end = times[-1]
+    out, out_dts = [], array("d")
+    j = 0
+    k = 0
+    t = 0.0
+    while t < t_end - 1e-9:
+        while times[j + 1] <= t:
+            j += 1
+        a, b = setpoints[j], setpoints[j + 1]
+        f = (t - times[j]) / (times[j + 1] - times[j])
+        out.append(Setpoint([x + (y - x) * f for x, y in zip(a, b)]))
+        k += 1
+        t = k * step
+        out_dts.append(min(t, t_end) - (k - 1) * step)
+    out.append(Setpoint(setpoints[-1]))
+    out_dts.append(dts[-1])
+    return out, out_dts
+
 
 class SequenceWorker(QObject):
+    """Plays a CSV one row per ``dt``.
+
+    With ``stream`` (an ArduinoWorker) the worker delivers the steps itself:
+    as keyframes that fill the board's queue ``keyframes.lead_s`` ahead
+    (core/keyframes.py) when the board takes them, else one step per row
+    as before.  ``stepEmitted`` then fires as a step is handed over.
+
+    ``rows`` is a sequence already read with :func:`load_sequence`, or any
+    iterable of ``(setpoint, dt)`` pairs (a :class:`~core.timescale.ScaledPlayback`
+    at some speed); the CSV is then not opened again.  ``t0`` is the stream time of the first
+    keyframe, so a sequence can follow the previous one on the board's
+    clock; ``stream_t`` is where this one ended.
+    """
+
     started = Signal()
     finished = Signal()
-    stepEmitted = Signal(float, float, float)
+    stepEmitted = Signal(object)  # Setpoint
     aborted = Signal()
+    error = Signal(str)
 
-    def __init__(self, csv_path: str, dt=0.5):
+    def __init__(self, csv_path: str, dt=0.5, channels: int = DEFAULT_CHANNELS, stream=None,
+                 rows=None, t0: float = 0.0):
         super().__init__()
         self._path = pathlib.Path(csv_path)
         self._dt = dt
-        self._stop = False
+        self._channels = channels
+        self._stream = stream
+        self._rows = rows
+        self._stop = threading.Event()
+        self.stream_t = t0  # stream time of the next keyframe
 
     def _sleep_responsive(self, seconds: float) -> bool:
-        """Sleep in small chunks so aborts are responsive.
+        """Sleep on the stop event so aborts are responsive.
         Returns True if aborted during sleep.
         """
-        end = time.monotonic() + max(0.0, seconds)
-        while time.monotonic() < end:
-            if self._stop:
+        return self._stop.wait(max(0.0, seconds))
+
+    def _wait_for_room(self) -> bool:
+        """Wait until the board's keyframe queue wants more; True if aborted."""
+        window = self._stream.keyframes
+        while not window.wants_more:
+            if self._stop.wait(0.005):
                 return True
-            # sleep in short bursts (10ms)
-            time.sleep(min(0.01, end - time.monotonic()))
-        return False
+        return self._stop.is_set()
 
     def stop(self):
-        self._stop = True
+        self._stop.set()
 
     def run(self):
         self.started.emit()
+        stream = self._stream
+        keyframes = False
+        if stream is not None:
+            keyframes = stream.supports_keyframes()
+            if not keyframes:
+                self.error.emit("Board does not take keyframes; sending one step at a time")
+        rows = row_pairs(self._rows) if self._rows is not None else iter_rows(self._path, self._dt, self._channels)
         try:
-            with self._path.open("r", newline="") as f:
-                reader = csv.reader(f)
-                for row in reader:
-                    if self._stop:
-                        self.aborted.emit()
-                        break
-                    try:
-                        a1, a2, a3 = map(float, row[:3])
-                    except (ValueError, IndexError):
-                        # Not a valid data row (maybe header), skip
-                        continue
-
-                        # Per-row dt (4th column). Fallback to default if missing/invalid.
-                    dt = self._dt
-                    if len(row) >= 4 and row[3].strip():
-                        try:
-                            dt = float(row[3])
-                        except ValueError:
-                            pass
-
-                    self.stepEmitted.emit(a1, a2, a3)
-
-                    # Sleep, but allow responsive abort
-                    if self._sleep_responsive(dt):
+            for setpoint, dt in rows:
+                if self._stop.is_set():
+                    self.aborted.emit()
+                    break
+                if keyframes:
+                    if self._wait_for_room():
                         self.aborted.emit()
                         break
+                    stream.stream_keyframe(setpoint, self.stream_t, dt)
+                    self.stream_t += dt
+                    self.stepEmitted.emit(setpoint)
+                    continue
+                if stream is not None:
+                    stream.send_setpoint(setpoint)
+                self.stepEmitted.emit(setpoint)
+
+                # Sleep, but allow responsive abort
+                if self._sleep_responsive(dt):
+                    self.aborted.emit()
+                    break
         finally:
             self.finished.emit()
\ No newline at end of file
@@ -0,0 +1,48 @@
+# core/setpoint.py
+"""N-channel setpoint vector used from input sources down to the serial link."""
+
+from __future__ import annotations
+
+from array import array
+from typing import Iterable, Sequence
+
+DEFAULT_CHANNELS = 3  # pitch, roll, yaw
+
+
+class Setpoint(array):
+    """Compact array('d')-backed setpoint with one value per actuator channel.
+
+    Works anywhere a sequence of floats does; :meth:`encode` produces the
+    wire line in a single pass.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, values: Iterable[float] = ()):
+        return super().__new__(cls, "d", values)
+
+    @classmethod
+    def of(cls, *values: float) -> "Setpoint":
+        return cls(values)
+
+    @classmethod
+    def zeros(cls, channels: int = DEFAULT_CHANNELS) -> "Setpoint":
+        return cls([0.0] * channels)
+
+    @property
+    def channels(self) -> int:
+        return len(self)
+
+    def encode(self) -> bytes:
+        """Wire format: truncated integers, comma separated, newline terminated."""
+        return b",".join([b"%d" % v for v in self]) + b"\n"
+
+    def __repr__(self) -> str:
+        return f"Setpoint({list(self)!r})"
+
+
+def parse_row(row: Sequence[str], channels: int) -> Setpoint:
+    """Parse the first ``channels`` CSV fields; raises ValueError/IndexError on bad rows."""
+    if len(row) < channels:
+        raise IndexError("row has fewer fields than channels")
+    return Setpoint(map(float, row[:channels]))
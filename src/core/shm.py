@@ -0,0 +1,324 @@
+# core/shm.py
+"""Shared-memory setpoint ring for producers on the same host.
+
+A game plugin or physics process on this machine can skip the UDP stack
+(core/netinput.py) and write setpoints straight into a
+``multiprocessing.shared_memory`` segment that :class:`ShmInputWorker`
+watches.  Layout (little-endian, every field 8-byte aligned)::
+
+    header   64 bytes
+      magic        b"MSSR"  4 bytes
+      version      uint8    (RING_VERSION)
+      reserved     uint8
+      channels     uint16   (values a slot can hold)
+      slots        uint32
+      reserved     uint32
+      write_seq    uint64   at offset 16: newest published slot, 0 = none
+    slots    ``slots`` x slot_size (a multiple of 64)
+      begin        uint64   sequence number, written first
+      count        uint32   values in use (1..channels)
+      reserved     uint32
+      values       channels x float64
+      end          uint64   sequence number, written last
+
+Sequence ``s`` goes to slot ``(s - 1) % slots``.  The writer stores
+``begin``, the values, ``end`` and then ``write_seq``; a reader takes
+``write_seq``, reads ``end``, the values and ``begin`` in that order and
+keeps the slot only if both match -- anything else was overwritten while
+it read (the writer lapped the ring), and it takes the newest one again.
+Neither side ever waits for the other or copies through the kernel.
+
+There is one writer at a time.  The motion core creates the segment
+(:meth:`SetpointRing.create`, reusing a compatible one left behind) and
+removes it on exit; producers :meth:`SetpointRing.attach` by name and
+continue from the published ``write_seq``, so a restarted producer is
+picked up without restarting the app.  A non-Python producer only needs
+the layout above.
+
+Like the UDP endpoint, the reader is newest-wins: whatever was published
+since its last look collapses to the newest setpoint, which goes to the
+sink -- normally ``ArduinoWorker.send_latest`` -- from the reader's own
+thread.  It spins (yielding the GIL and the CPU) for ``spin_s`` after
+each setpoint and then polls every ``poll_s``, so a live stream is picked
+up within microseconds while an idle ring costs next to nothing;
+``spin_s=0`` only polls.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import time
+from typing import Callable, Optional, Tuple
+
+from multiprocessing import shared_memory
+
+from PySide6.QtCore import QObject, Signal
+
+from core.predict import SetpointPredictor
+from core.setpoint import Setpoint
+
+DEFAULT_NAME = "motionsim_setpoints"
+RING_MAGIC = b"MSSR"
+RING_VERSION = 1
+RING_SLOTS = 64
+MAX_CHANNELS = 16
+SPIN_S = 0.02
+POLL_S = 0.001
+READ_RETRIES = 4
+
+_HEADER = struct.Struct("<4sBxHI4x")
+_U64 = struct.Struct("<Q")
+_U32 = struct.Struct("<I")
+HEADER_SIZE = 64
+_WRITE_SEQ = 16
+
+
+def _yield() -> None:
+    time.sleep(0)  # lets the app's other threads have the GIL
+    if hasattr(os, "sched_yield"):
+        os.sched_yield()  # and the producer the core, on a busy machine
+
+
+def slot_size(channels: int) -> int:
+    raw = 8 + 8 + 8 * channels + 8
+    return (raw + 63) // 64 * 64
+
+
+def ring_size(slots: int, channels: int) -> int:
+    return HEADER_SIZE + slots * slot_size(channels)
+
+
+def _open_untracked(name: str) -> shared_memory.SharedMemory:
+    """Attach without the resource tracker, which would remove the segment when this process exits."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SetpointRing:
+    """One side of the ring: :meth:`write` for producers, :meth:`poll` for the reader."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        self._shm = shm
+        self._buf = shm.buf
+        magic, version, channels, slots = _HEADER.unpack_from(self._buf)
+        if magic != RING_MAGIC or version != RING_VERSION:
+            raise ValueError(f"{shm.name} is not a setpoint ring (version {RING_VERSION})")
+        if not 0 < channels <= MAX_CHANNELS or slots <= 0 or shm.size < ring_size(slots, channels):
+            raise ValueError(f"{shm.name}: bad ring layout")
+        self.channels = channels
+        self.slots = slots
+        self._slot = slot_size(channels)
+        self._end = 16 + 8 * channels
+        self._values = [struct.Struct(f"<{n}d") for n in range(channels + 1)]
+        self._seq = self.latest()
+        self.owner = owner
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @classmethod
+    def create(cls, name: str = DEFAULT_NAME, slots: int = RING_SLOTS,
+               channels: int = MAX_CHANNELS) -> "SetpointRing":
+        """A new ring, or the one already under ``name`` if its layout matches."""
+        if slots <= 0 or not 0 < channels <= MAX_CHANNELS:
+            raise ValueError("bad ring size")
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=ring_size(slots, channels))
+        except FileExistsError:
+            # left behind by a run that did not exit cleanly
+            shm = shared_memory.SharedMemory(name=name)
+            try:
+                ring = cls(shm, owner=True)
+            except ValueError:
+                shm.close()
+                raise
+            if (ring.slots, ring.channels) != (slots, channels):
+                ring.owner = False
+                ring.close()
+                raise ValueError(f"{name} exists with another layout "
+                                 f"({ring.slots} slots x {ring.channels} channels)")
+            return ring
+        shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        _HEADER.pack_into(shm.buf, 0, RING_MAGIC, RING_VERSION, channels, slots)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str = DEFAULT_NAME) -> "SetpointRing":
+        """The ring the motion core created; FileNotFoundError if it is not running."""
+        shm = _open_untracked(name)
+        try:
+            return cls(shm)
+        except ValueError:
+            shm.close()
+            raise
+
+    def latest(self) -> int:
+        """Sequence number of the newest published slot (0 before the first)."""
+        return _U64.unpack_from(self._buf, _WRITE_SEQ)[0]
+
+    def write(self, setpoint) -> int:
+        """Publish ``setpoint``; returns its sequence number."""
+        n = len(setpoint)
+        if not 0 < n <= self.channels:
+            raise ValueError(f"setpoint has {n} values, the ring takes 1..{self.channels}")
+        buf = self._buf
+        seq = self._seq + 1
+        off = HEADER_SIZE + (seq - 1) % self.slots * self._slot
+        _U64.pack_into(buf, off, seq)
+        _U32.pack_into(buf, off + 8, n)
+        self._values[n].pack_into(buf, off + 16, *setpoint)
+        _U64.pack_into(buf, off + self._end, seq)
+        _U64.pack_into(buf, _WRITE_SEQ, seq)
+        self._seq = seq
+        return seq
+
+    def read(self, seq: int) -> Optional[Setpoint]:
+        """Slot ``seq`` if it still holds it whole, else None; ValueError if malformed."""
+        buf = self._buf
+        off = HEADER_SIZE + (seq - 1) % self.slots * self._slot
+        if _U64.unpack_from(buf, off + self._end)[0] != seq:
+            return None
+        n = _U32.unpack_from(buf, off + 8)[0]
+        values = self._values[n].unpack_from(buf, off + 16) if 0 < n <= self.channels else None
+        if _U64.unpack_from(buf, off)[0] != seq:
+            return None
+        if values is None:
+            raise ValueError(f"slot {seq} claims {n} values")
+        return Setpoint(values)
+
+    def poll(self, after: int) -> Tuple[int, Optional[Setpoint], int]:
+        """``(seq, setpoint, torn)`` for the newest slot past ``after``.
+
+        ``setpoint`` is None when nothing new was published, or when the
+        writer kept lapping the ring for ``READ_RETRIES`` reads (``torn``
+        counts the discarded reads).
+        """
+        torn = 0
+        seq = self.latest()
+        for _ in range(READ_RETRIES):
+            if seq == after:
+                return seq, None, torn
+            setpoint = self.read(seq)
+            if setpoint is not None:
+                return seq, setpoint, torn
+            torn += 1
+            seq = self.latest()
+        return seq, None, torn
+
+    def close(self) -> None:
+        """Detach; the creating side also removes the segment."""
+        self._buf = None
+        self._shm.close()
+        if self.owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class ShmInputWorker(QObject):
+    listening = Signal(str)
+    error = Signal(str)
+
+    def __init__(self, sink: Callable[[Setpoint], None], name: str = DEFAULT_NAME,
+                 slots: int = RING_SLOTS, predictor: Optional[SetpointPredictor] = None,
+                 spin_s: float = SPIN_S, poll_s: float = POLL_S, parent=None):
+        super().__init__(parent)
+        self._sink = sink
+        self._predictor = predictor
+        self._name = name
+        self._slots = slots
+        self._spin_s = spin_s
+        self._poll_s = poll_s
+        self._ring: Optional[SetpointRing] = None
+        self._running = False
+        self._enabled = True
+        self.received = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.torn = 0
+        self.malformed = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def open(self) -> bool:
+        if self._ring is not None:
+            return True
+        try:
+            self._ring = SetpointRing.create(self._name, self._slots)
+        except (OSError, ValueError) as e:
+            self.error.emit(f"shared memory {self._name} failed: {e}")
+            return False
+        self.listening.emit(f"{self._name} ({self._slots} slots)")
+        return True
+
+    def start(self) -> None:
+        self._running = True
+        if not self.open():
+            return
+        try:
+            self._loop()
+        finally:
+            self._ring.close()
+            self._ring = None
+
+    def stop(self) -> None:
+        self._running = False
+
+    def set_enabled(self, on: bool) -> None:
+        """While disabled, setpoints are consumed and counted but not delivered."""
+        self._enabled = bool(on)
+
+    def _loop(self) -> None:
+        ring = self._ring
+        last = ring.latest()  # what was there before we started is stale
+        last_rx = time.perf_counter()
+        while self._running:
+            try:
+                seq, setpoint, torn = ring.poll(last)
+            except ValueError as e:
+                self.malformed += 1
+                self.error.emit(f"shared memory {self._name}: {e}")
+                last = ring.latest()
+                continue
+            self.torn += torn
+            if seq == last:
+                if time.perf_counter() - last_rx < self._spin_s:
+                    _yield()
+                else:
+                    self._settle()
+                    time.sleep(self._poll_s)
+                continue
+            new = max(1, seq - last)
+            self.received += new
+            last = seq
+            last_rx = time.perf_counter()
+            if setpoint is None:
+                self.coalesced += new
+                continue
+            self.coalesced += new - 1
+            if self._enabled:
+                self.delivered += 1
+                if self._predictor is not None:
+                    setpoint = self._predictor.update(setpoint)
+                self._sink(setpoint)
+
+    def _settle(self) -> None:
+        predictor = self._predictor
+        if predictor is not None and predictor.due_to_settle():
+            setpoint = predictor.settle()
+            if setpoint is not None and self._enabled:
+                self._sink(setpoint)
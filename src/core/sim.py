@@ -0,0 +1,861 @@
+# core/sim.py
+"""Virtual serial device running Python emulations of the Arduino sketches.
+
+:class:`SimSerial` is a drop-in stand-in for ``serial.Serial`` (``write``,
+``readline``, ``read``, ``in_waiting``, ``reset_input_buffer``, ``close``,
+``dtr``).  Behind it a device thread runs a :class:`SimFirmware` subclass
+written in the same shape as the sketch it mirrors -- ``setup()`` once,
+then ``loop()`` forever -- against a tiny Arduino-like API (``available``,
+``parse_float``, ``read_string_until``, ``println``, ``delay``, ``millis``).
+
+Bytes travel over a :class:`_Wire` that charges 10 bit times per byte at the
+firmware's baud rate, so link occupancy shows up in benchmarks as it would
+on hardware.  ``parse_delay`` adds a fixed per-command processing cost and
+``motion_scale`` scales every motion/reset ``delay()`` in the sketch.
+
+:func:`unplug` simulates a USB hiccup: the port's I/O raises and it cannot
+be reopened until the given time has passed.
+
+Boards behave like a Uno's auto-reset circuit: opening the port with DTR
+asserted (pyserial's default) reboots the sketch, while a port opened with
+``dtr = False`` set beforehand attaches to the sketch that is already
+running -- unless the board lost power (was unplugged) in between.  The
+factories from :func:`sim_factory` keep one board per port name so a
+reopen finds the same board.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Optional, Tuple
+
+
+_FLOAT_RE = re.compile(r"[-+]?(\d+\.?\d*|\.\d+)")
+
+_UNPLUGGED: dict = {}  # port -> monotonic time it comes back
+_POWER_CYCLES: dict = {}  # port -> number of unplugs so far
+
+
+def unplug(port: str, seconds: float) -> None:
+    """Make ``port`` vanish for ``seconds`` (open and I/O raise OSError)."""
+    _UNPLUGGED[port] = time.monotonic() + seconds
+    _POWER_CYCLES[port] = _POWER_CYCLES.get(port, 0) + 1
+
+
+def _is_unplugged(port: Optional[str]) -> bool:
+    return port is not None and _UNPLUGGED.get(port, 0.0) > time.monotonic()
+
+
+class _Halt(Exception):
+    """Raised inside the device thread to unwind the firmware on close/reset."""
+
+
+class _Wire:
+    """One direction of a serial link with per-byte transmission delay."""
+
+    def __init__(self, baud: int):
+        self._bit_time = 10.0 / float(baud)
+        self._cond = threading.Condition()
+        self._chunks: Deque[Tuple[float, bytes]] = deque()
+        self._buf = bytearray()
+        self._free_at = 0.0
+        self._closed = False
+
+    # ----- sender side -----------------------------------------------------
+    def write(self, data: bytes) -> None:
+        with self._cond:
+            now = time.monotonic()
+            start = max(now, self._free_at)
+            done = start + len(data) * self._bit_time
+            self._free_at = done
+            self._chunks.append((done, bytes(data)))
+            self._cond.notify_all()
+
+    # ----- receiver side ---------------------------------------------------
+    def _collect(self, now: float) -> Optional[float]:
+        while self._chunks and self._chunks[0][0] <= now:
+            self._buf += self._chunks.popleft()[1]
+        return self._chunks[0][0] if self._chunks else None
+
+    def _wait(self, ready: Callable[[], bool], timeout: Optional[float]) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            next_ready = self._collect(now)
+            if ready():
+                return True
+            if self._closed:
+                return False
+            wake = deadline
+            if next_ready is not None:
+                wake = next_ready if wake is None else min(wake, next_ready)
+            if wake is None:
+                self._cond.wait()
+            else:
+                if deadline is not None and now >= deadline:
+                    return False
+                self._cond.wait(max(0.0, wake - now))
+
+    def in_waiting(self) -> int:
+        with self._cond:
+            self._collect(time.monotonic())
+            return len(self._buf)
+
+    def wait_any(self, timeout: Optional[float]) -> bool:
+        with self._cond:
+            return self._wait(lambda: bool(self._buf), timeout)
+
+    def read(self, size: int, timeout: Optional[float]) -> bytes:
+        with self._cond:
+            self._wait(lambda: len(self._buf) >= size, timeout)
+            out = bytes(self._buf[:size])
+            del self._buf[:size]
+            return out
+
+    def read_until(self, delim: bytes, timeout: Optional[float]) -> bytes:
+        with self._cond:
+            self._wait(lambda: delim in self._buf, timeout)
+            idx = self._buf.find(delim)
+            end = len(self._buf) if idx < 0 else idx + len(delim)
+            out = bytes(self._buf[:end])
+            del self._buf[:end]
+            return out
+
+    def peek(self) -> int:
+        with self._cond:
+            self._collect(time.monotonic())
+            return self._buf[0] if self._buf else -1
+
+    def clear(self) -> None:
+        with self._cond:
+            self._chunks.clear()
+            self._buf.clear()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class SimFirmware:
+    """Base class for firmware emulations; subclasses mirror one sketch."""
+
+    name = "sim"
+    baud = 115200
+
+    def __init__(self, parse_delay: float = 0.0, motion_scale: float = 1.0,
+                 parse_timeout: float = 1.0, ack: Optional[str] = None):
+        self.parse_delay = float(parse_delay)
+        self.motion_scale = float(motion_scale)
+        self.parse_timeout = float(parse_timeout)  # Serial.setTimeout()
+        self.ack = ack  # extra line printed after each command, if set
+        self._rx: Optional[_Wire] = None
+        self._tx: Optional[_Wire] = None
+        self._halt = threading.Event()
+        self._boot_t = 0.0
+        self.rx_bytes = 0  # bytes the host wrote to this board, for benchmarks
+        self.tx_lines = 0  # non-empty lines the board printed, for benchmarks
+        self._line = ""  # print()ed so far on the current line
+        # set by SimSerial: the running sketch outlives a port opened with DTR low
+        self._thread: Optional[threading.Thread] = None
+        self._wires: Optional[Tuple[_Wire, _Wire]] = None
+        self._power = 0
+
+    # ----- Arduino-like API (device thread) --------------------------------
+    def millis(self) -> int:
+        return int((time.monotonic() - self._boot_t) * 1000.0)
+
+    def delay(self, seconds: float) -> None:
+        if seconds > 0 and self._halt.wait(seconds):
+            raise _Halt()
+
+    def motion_delay(self, seconds: float) -> None:
+        self.delay(seconds * self.motion_scale)
+
+    def available(self) -> int:
+        # Idle-wait briefly instead of spinning like the real loop() does.
+        if not self._rx.wait_any(0.001) and self._halt.is_set():
+            raise _Halt()
+        return self._rx.in_waiting()
+
+    def read(self) -> int:
+        data = self._rx.read(1, 0)
+        return data[0] if data else -1
+
+    def peek(self) -> int:
+        return self._rx.peek()
+
+    def read_string_until(self, ch: str) -> str:
+        data = self._rx.read_until(ch.encode(), self.parse_timeout)
+        if data.endswith(ch.encode()):
+            data = data[:-1]
+        return data.decode(errors="ignore")
+
+    def parse_float(self) -> float:
+        """Stream.parseFloat(): skip junk, read a number, 0.0 on timeout."""
+        text = ""
+        deadline = time.monotonic() + self.parse_timeout
+        while True:
+            if self._halt.is_set():
+                raise _Halt()
+            c = self._rx.peek()
+            if c < 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._rx.wait_any(remaining):
+                    break
+                continue
+            ch = chr(c)
+            if ch.isdigit() or ch == "." or (ch == "-" and not text):
+                text += ch
+                self._rx.read(1, 0)
+                deadline = time.monotonic() + self.parse_timeout
+            elif text:
+                break
+            else:
+                self._rx.read(1, 0)
+        try:
+            return float(text)
+        except ValueError:
+            return 0.0
+
+    def parse_int(self) -> int:
+        return int(self.parse_float())
+
+    def println(self, text: str = "") -> None:
+        self._line += str(text)
+        if self._line.strip():
+            self.tx_lines += 1
+        self._line = ""
+        self._tx.write((str(text) + "\r\n").encode())
+
+    def print(self, text) -> None:
+        self._line += str(text)
+        self._tx.write(str(text).encode())
+
+    def acknowledge(self) -> None:
+        if self.ack:
+            self.println(self.ack)
+
+    # ----- sketch ----------------------------------------------------------
+    def setup(self) -> None:
+        pass
+
+    def loop(self) -> None:
+        raise NotImplementedError
+
+    # ----- device thread ---------------------------------------------------
+    def run(self, rx: _Wire, tx: _Wire) -> None:
+        self._rx, self._tx = rx, tx
+        self._boot_t = time.monotonic()
+        try:
+            self.setup()
+            while not self._halt.is_set():
+                self.loop()
+        except _Halt:
+            pass
+
+
+class DoubleActuatorFirmware(SimFirmware):
+    """Emulates ``arduino_code/double_actuator/double_actuator.ino``."""
+
+    name = "double_actuator"
+    baud = 9600
+    MAX_SPEED_IPS = 2.16
+    STROKE_IN = 12.0
+    RESET_S = 7.0
+
+    TIMED_SLOTS = 32
+    ESTOP_BYTE = ord("!")
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.pos1_in = 0.0
+        self.pos2_in = 0.0
+        self.timed: Deque[Tuple[int, int, float, float, bool]] = deque()
+        self.ran: list[Tuple[int, int]] = []  # (due_ms, actual millis) for skew checks
+        self.keyframes_ran: list[Tuple[int, int, float, float]] = []  # (due_ms, millis, t1, t2)
+        self.underruns = 0  # keyframes that found the queue dry and re-anchored the stream
+        self.moves: list[Tuple[float, float, float, float]] = []  # (monotonic start, t1, t2, move_time)
+        self.streaming = False
+        self.stream_origin_ms = 0
+        self.estopped = False
+        self.moving = False
+        self._move: Optional[tuple] = None  # running non-blocking move, see start_move()
+        self.stopped_ns: list[int] = []  # perf_counter_ns of each E-stop, for benchmarks
+        self.last_cmd: Optional[Tuple[float, float, float, float]] = None  # delta-frame base
+
+    def setup(self) -> None:
+        # globals start over on every reset
+        self.timed.clear()
+        self.streaming = False
+        self.estopped = False
+        self.moving = False
+        self._move = None
+        self.last_cmd = None
+        self.println("System starting...")
+        self.reset_actuators()
+        self.println("READY double_actuator pos1,pos2,pos3[,time]")
+
+    def reset_actuators(self) -> None:
+        self.println("Resetting actuators (full retract)…")
+        self.motion_delay(self.RESET_S)
+        self.pos1_in = 0.0
+        self.pos2_in = 0.0
+        self.println("Reset complete. Both actuators set to 0 inches.")
+
+    def eat_line(self) -> None:
+        while self.available() > 0:
+            c = self.read()
+            if c in (ord("\n"), ord("\r")):
+                break
+
+    def estop_requested(self) -> bool:
+        return self.peek() == self.ESTOP_BYTE
+
+    def handle_estop(self) -> None:
+        self.stopped_ns.append(time.perf_counter_ns())
+        if self._move is not None:
+            self.finish_move(interrupted=True)
+        while self.available() > 0:
+            self.read()
+        self.timed.clear()
+        self.streaming = False
+        self.estopped = True
+        self.println("STOPPED")
+
+    def handle_resume(self) -> None:
+        self.eat_line()
+        self.estopped = False
+        self.println("RESUMED")
+
+    def report_free(self, tag: str = "F") -> None:
+        self.println(f"{tag}{self.TIMED_SLOTS - len(self.timed)}")
+
+    def read_line(self) -> Optional[str]:
+        """``readLine()``: the rest of the line, or None if it held an E-stop byte (handled)."""
+        line = self.read_string_until("\n")
+        if chr(self.ESTOP_BYTE) in line:
+            self.handle_estop()
+            return None
+        return line.strip()
+
+    @staticmethod
+    def parse_setpoint(fields: list) -> Optional[Tuple[float, float, float]]:
+        """``parseSetpoint()``: the three positions leading ``fields``, None if there are fewer."""
+        if len(fields) < 3:
+            return None
+        return _to_float(fields[0]), _to_float(fields[1]), _to_float(fields[2])
+
+    def parse_timed(self) -> Optional[Tuple[int, int, float, float]]:
+        self.read()  # '@' or 'K'
+        line = self.read_line()
+        if line is None:
+            return None
+        fields = line.split(",")
+        time_ms, dur_ms = _to_int(fields[0]), _to_int(fields[1] if len(fields) > 1 else "")
+        setpoint = self.parse_setpoint(fields[2:])  # a time_s field is ignored: dur_ms is the move time
+        if setpoint is None:
+            self.println("ERR fields")
+            return None
+        target1, target2, _ = setpoint
+        if self.estopped:
+            self.println("ERR estop")
+            return None
+        if len(self.timed) >= self.TIMED_SLOTS:
+            self.println("ERR queue full")
+            return None
+        return time_ms, dur_ms, target1, target2
+
+    def queue_timed(self, due_ms: int, dur_ms: int, target1: float, target2: float, keyframe: bool) -> None:
+        self.timed.append((due_ms, dur_ms,
+                           min(max(target1, 0.0), self.STROKE_IN),
+                           min(max(target2, 0.0), self.STROKE_IN), keyframe))
+
+    def handle_timed_command(self) -> None:
+        parsed = self.parse_timed()
+        if parsed is None:
+            return
+        self.queue_timed(*parsed, keyframe=False)
+        self.println("OK")
+
+    def handle_keyframe(self) -> None:
+        parsed = self.parse_timed()
+        if parsed is None:
+            return
+        t_ms, dur_ms, target1, target2 = parsed
+        if not self.streaming:
+            if self.keyframes_ran:
+                self.underruns += 1
+            self.stream_origin_ms = self.millis() - t_ms
+            self.streaming = True
+        self.queue_timed(self.stream_origin_ms + t_ms, dur_ms, target1, target2, keyframe=True)
+        self.report_free()
+
+    def run_due_timed_command(self) -> None:
+        if not self.timed or self.millis() < self.timed[0][0]:
+            return
+        due_ms, dur_ms, target1, target2, keyframe = self.timed.popleft()
+        self.start_move(target1, target2, dur_ms / 1000.0 if dur_ms > 0 else 0.001, quiet=keyframe)
+        if keyframe:
+            self.keyframes_ran.append((due_ms, self.millis(), target1, target2))
+            self.report_free("S")
+        else:
+            self.ran.append((due_ms, self.millis()))
+            self.println(f"RAN {due_ms}")
+
+    def loop(self) -> None:
+        self.service_move()
+        self.run_due_timed_command()
+        if self.streaming and not self.timed and self._move is None:
+            self.streaming = False  # ran dry: the next keyframe re-anchors
+        if self.available() <= 0:
+            return
+        first = self.peek()
+        if first == self.ESTOP_BYTE:
+            self.handle_estop()
+            return
+        if first == ord("R"):
+            self.handle_resume()
+            return
+        if first == ord("P"):
+            self.eat_line()
+            self.println(f"PONG {self.millis()}")
+            return
+        if first == ord("I"):
+            self.eat_line()
+            self.println(f"ID {self.name}")
+            return
+        if first == ord("@"):
+            self.handle_timed_command()
+            return
+        if first == ord("K"):
+            self.handle_keyframe()
+            return
+        if first == ord("F"):
+            self.eat_line()
+            self.report_free()
+            return
+
+        is_delta = first == ord("D")
+        if is_delta:
+            self.read()  # 'D'
+        line = self.read_line()
+        if not line:
+            return  # E-stopped, or a blank line
+        fields = line.split(",")
+        setpoint = self.parse_setpoint(fields)
+        self.delay(self.parse_delay)
+        if setpoint is None:
+            self.println("ERR fields")
+            self.println("DONE")
+            self.acknowledge()
+            return
+        target1, target2, target3 = setpoint  # target3 is only kept as delta base
+        has_time = len(fields) > 3
+        move_time = _to_float(fields[3]) if has_time else 0.0
+
+        if is_delta:
+            if self.last_cmd is None:
+                self.println("ERR nobase")
+                self.println("DONE")
+                self.acknowledge()
+                return
+            base = self.last_cmd
+            target1, target2, target3 = target1 + base[0], target2 + base[1], target3 + base[2]
+            if has_time:
+                move_time += base[3]
+        self.last_cmd = (target1, target2, target3, move_time)
+
+        if self.estopped:
+            self.println("ERR estop")
+            self.println("DONE")
+            self.acknowledge()
+            return
+
+        if has_time and move_time <= 0:
+            self.println("Error: time must be > 0")
+            self.println("DONE")
+            self.acknowledge()
+            return
+
+        target1 = min(max(target1, 0.0), self.STROKE_IN)
+        target2 = min(max(target2, 0.0), self.STROKE_IN)
+        if not has_time:
+            # no move time given: as fast as the longer travel allows
+            move_time = max(abs(target1 - self.pos1_in), abs(target2 - self.pos2_in)) / self.MAX_SPEED_IPS
+            if move_time <= 0:
+                move_time = 0.001
+        self.println(f"Command received: {target1:.2f} in, {target2:.2f} in, {move_time:.2f} s")
+        self.move_actuators_to_targets(target1, target2, move_time)
+        self.println("DONE")
+        self.acknowledge()
+
+    def start_move(self, target1: float, target2: float, move_time: float, quiet: bool = False) -> None:
+        """Non-blocking move; :meth:`service_move` ends it after ``move_time``."""
+        if self._move is not None:
+            # taking over a move cut short: it ends where the elapsed time got it
+            self.finish_move(interrupted=time.monotonic() < self._move[1])
+        delta1 = target1 - self.pos1_in
+        delta2 = target2 - self.pos2_in
+        if delta1 == 0 and delta2 == 0:
+            if not quiet:
+                self.println("No movement required.")
+            return
+        req1 = abs(delta1) / move_time
+        req2 = abs(delta2) / move_time
+        if not quiet and (req1 > self.MAX_SPEED_IPS or req2 > self.MAX_SPEED_IPS):
+            self.println("Warning: requested move is faster than max speed.")
+            self.println("Actuators will run at max speed and may not reach targets in the given time.")
+        start = time.monotonic()
+        self.moves.append((start, target1, target2, move_time))
+        self._move = (start, start + move_time * self.motion_scale, move_time,
+                      target1, target2, delta1, delta2, req1, req2, quiet)
+        self.moving = True
+
+    def service_move(self) -> None:
+        if self._move is not None and time.monotonic() >= self._move[1]:
+            self.finish_move()
+
+    def finish_move(self, interrupted: bool = False) -> None:
+        start, _, move_time, target1, target2, delta1, delta2, req1, req2, quiet = self._move
+        self._move = None
+        self.moving = False
+        scale = self.motion_scale
+        ran = min(move_time, (time.monotonic() - start) / scale if scale > 0 else 0.0) if interrupted else move_time
+        self.pos1_in = self._advance(self.pos1_in, target1, delta1, req1, ran, interrupted)
+        self.pos2_in = self._advance(self.pos2_in, target2, delta2, req2, ran, interrupted)
+        if not quiet:
+            self.println(f"New estimated positions: A1 = {self.pos1_in:.2f} in, A2 = {self.pos2_in:.2f} in")
+
+    def move_actuators_to_targets(self, target1: float, target2: float, move_time: float) -> None:
+        self.start_move(target1, target2, move_time)
+        # block until the move is done, but watch for an E-stop byte
+        while self._move is not None:
+            if self.estop_requested():
+                self.handle_estop()
+                return
+            self.delay(min(0.001, max(0.0, self._move[1] - time.monotonic())))
+            self.service_move()
+
+    def _advance(self, pos: float, target: float, delta: float, req: float, move_time: float,
+                 interrupted: bool = False) -> float:
+        if req <= self.MAX_SPEED_IPS and not interrupted:
+            return target
+        step = (1 if delta > 0 else -1) * min(req, self.MAX_SPEED_IPS) * move_time
+        return min(max(pos + step, 0.0), self.STROKE_IN)
+
+
+def _to_float(text: str) -> float:
+    """String.toFloat(): leading number, 0.0 if there is none."""
+    match = _FLOAT_RE.match(text.strip())
+    return float(match.group(0)) if match else 0.0
+
+
+def _to_int(text: str) -> int:
+    """String.toInt(): leading integer, 0 if there is none."""
+    text = text.strip()
+    end = 1 if text[:1] in ("-", "+") else 0
+    while end < len(text) and text[end].isdigit():
+        end += 1
+    try:
+        return int(text[:end])
+    except ValueError:
+        return 0
+
+
+class SingleActuatorFirmware(SimFirmware):
+    """Emulates ``arduino_code/arduino.txt`` (one actuator, timed runs)."""
+
+    name = "arduino"
+    baud = 115200
+    ESTOP_BYTE = ord("!")
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("parse_timeout", 0.05)  # Serial.setTimeout(50)
+        super().__init__(**kwargs)
+        self.prev1 = 0
+        self.prev = None  # (val1, val2, val3) delta-frame base
+        self.estopped = False
+        self.commands: list[Tuple[int, int, int]] = []  # every command as applied, for benchmarks
+        self.stopped_ns: list[int] = []  # perf_counter_ns of each E-stop, for benchmarks
+
+    def setup(self) -> None:
+        self.prev1 = 0
+        self.prev = None
+        self.estopped = False
+        self.println("READY arduino")
+
+    def run_for(self, seconds: float) -> bool:
+        """``runFor()``: wait out a run, True if an E-stop byte cut it short."""
+        deadline = time.monotonic() + seconds * self.motion_scale
+        while True:
+            if self.available() > 0 and self.peek() == self.ESTOP_BYTE:
+                self.handle_estop()
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self.delay(min(remaining, 0.001))
+
+    def handle_estop(self) -> None:
+        self.stopped_ns.append(time.perf_counter_ns())
+        while self.available() > 0:
+            self.read()
+        self.estopped = True
+        self.prev = None  # the run it cut short never reached its target
+        self.println("STOPPED")
+
+    def loop(self) -> None:
+        if self.available() <= 0:
+            return
+        if self.peek() == self.ESTOP_BYTE:
+            self.handle_estop()
+            return
+        line = self.read_string_until("\n")
+        if line.startswith("R"):
+            self.estopped = False
+            self.println("RESUMED")
+            return
+        if line.startswith("P"):
+            self.println(f"PONG {self.millis()}")
+            return
+        if line.startswith("I"):
+            self.println(f"ID {self.name}")
+            return
+        is_delta = line.startswith("D")
+        if is_delta:
+            if self.prev is None:
+                self.println("ERR nobase")
+                self.acknowledge()
+                return
+            line = line[1:]
+        if not line or not (line[0].isdigit() or line[0] == "-"):
+            return  # not a command (line noise, wrong baud)
+        if self.estopped:
+            self.println("ERR estop")
+            self.acknowledge()
+            return
+        self.delay(self.parse_delay)
+        parts = (line.split(",") + ["", ""])[:3]
+        vals = [_to_int(part) for part in parts]
+        if is_delta:
+            vals = [v + b for v, b in zip(vals, self.prev)]
+        self.prev = tuple(vals)
+        self.commands.append(self.prev)
+        val1 = vals[0]
+        change = val1 - self.prev1
+        self.println("Extending at speed: 200")
+        if self.run_for(min(20 * abs(change), 5000) / 1000.0):
+            return
+        if self.run_for(1.0):  # pause before reversing
+            return
+        self.prev1 = val1
+        self.acknowledge()
+
+
+FIRMWARES = {
+    DoubleActuatorFirmware.name: DoubleActuatorFirmware,
+    SingleActuatorFirmware.name: SingleActuatorFirmware,
+}
+
+
+class SimSerial:
+    """``serial.Serial`` look-alike wired to an emulated firmware."""
+
+    def __init__(self, port: Optional[str] = None, baudrate: int = 115200,
+                 timeout: Optional[float] = None, firmware: Optional[SimFirmware] = None,
+                 board: Optional[Callable[[Optional[str]], SimFirmware]] = None,
+                 **_ignored):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self._board = board  # port -> firmware, resolved on open()
+        self.firmware = firmware
+        self.is_open = False
+        self._dtr = True
+        self._thread: Optional[threading.Thread] = None
+        self._to_dev: Optional[_Wire] = None
+        self._to_host: Optional[_Wire] = None
+        if port is not None:
+            self.open()
+
+    # ----- lifecycle -------------------------------------------------------
+    def open(self) -> None:
+        if self.is_open:
+            return
+        if _is_unplugged(self.port):
+            raise OSError(f"could not open port {self.port}: device not present")
+        if self.firmware is None:
+            self.firmware = self._board(self.port) if self._board else DoubleActuatorFirmware()
+        self.is_open = True
+        if not self._attach():
+            self._boot()
+
+    def _attach(self) -> bool:
+        # DTR held low and the board kept power: talk to the running sketch
+        fw = self.firmware
+        if (self._dtr or fw._thread is None or not fw._thread.is_alive()
+                or fw._power != _POWER_CYCLES.get(self.port, 0)):
+            return False
+        self._thread = fw._thread
+        self._to_dev, self._to_host = fw._wires
+        self._to_host.clear()
+        return True
+
+    def _boot(self) -> None:
+        self._halt()
+        fw = self.firmware
+        self._to_dev = _Wire(fw.baud)
+        self._to_host = _Wire(fw.baud)
+        fw._halt.clear()
+        fw._wires = (self._to_dev, self._to_host)
+        fw._power = _POWER_CYCLES.get(self.port, 0)
+        self._thread = fw._thread = threading.Thread(
+            target=fw.run, args=(self._to_dev, self._to_host), daemon=True
+        )
+        self._thread.start()
+
+    def _halt(self) -> None:
+        fw = self.firmware
+        fw._halt.set()
+        for wire in fw._wires or ():
+            wire.close()
+        if fw._thread is not None:
+            fw._thread.join(1.0)
+        fw._thread = fw._wires = None
+        self._thread = None
+
+    def close(self) -> None:
+        if not self.is_open:
+            return
+        self.is_open = False
+        if self._dtr:
+            self._halt()
+        # else: DTR low -- the board keeps running for the next open
+
+    @property
+    def dtr(self) -> bool:
+        return self._dtr
+
+    @dtr.setter
+    def dtr(self, value: bool) -> None:
+        # Asserting DTR on an open port pulses reset on a real Uno.
+        value = bool(value)
+        if value and not self._dtr and self.is_open:
+            self._halt()
+            self._boot()
+        self._dtr = value
+
+    # ----- pyserial API ----------------------------------------------------
+    def _check_open(self) -> None:
+        if not self.is_open:
+            raise OSError("SimSerial port is closed")
+        if _is_unplugged(self.port):
+            raise OSError(f"{self.port}: device disconnected")
+
+    @property
+    def _baud_mismatch(self) -> bool:
+        return self.baudrate != self.firmware.baud
+
+    def write(self, data: bytes) -> int:
+        self._check_open()
+        self.firmware.rx_bytes += len(data)
+        self._to_dev.write(_garble(data) if self._baud_mismatch else data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def readline(self) -> bytes:
+        self._check_open()
+        if self._baud_mismatch:
+            return _garble(self._to_host.read_until(b"\n", self.timeout))
+        return self._to_host.read_until(b"\n", self.timeout)
+
+    def read(self, size: int = 1) -> bytes:
+        self._check_open()
+        data = self._to_host.read(size, self.timeout)
+        return _garble(data) if self._baud_mismatch else data
+
+    @property
+    def in_waiting(self) -> int:
+        self._check_open()
+        return self._to_host.in_waiting()
+
+    def reset_input_buffer(self) -> None:
+        self._check_open()
+        self._to_host.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _garble(data: bytes) -> bytes:
+    # wrong baud rate: framing garbage, never a digit or a line end
+    return bytes(b | 0x80 for b in data)
+
+
+def sim_factory(protocol: str = DoubleActuatorFirmware.name, **firmware_kwargs):
+    """Return a ``serial.Serial``-compatible factory for :class:`ArduinoWorker`.
+
+    Each port name gets one board, reused across reopens.
+    """
+    firmware_cls = FIRMWARES[protocol]
+    boards: dict = {}
+
+    def board(port):
+        fw = boards.get(port)
+        if fw is None:
+            fw = boards[port] = firmware_cls(**firmware_kwargs)
+        return fw
+
+    def factory(port=None, baudrate=115200, timeout=None, **kwargs):
+        return SimSerial(port=port, baudrate=baudrate, timeout=timeout, board=board, **kwargs)
+
+    factory.boards = boards
+    return factory
+
+
+class SimPortInfo:
+    """``ListPortInfo`` look-alike for :func:`sim_bus` boards (as seen by comports())."""
+
+    def __init__(self, device: str, description: str = "Arduino Uno (sim)",
+                 vid: int = 0x2341, pid: int = 0x0043, serial_number: Optional[str] = None):
+        self.device = device
+        self.description = description
+        self.vid = vid
+        self.pid = pid
+        self.serial_number = serial_number
+        self.hwid = f"USB VID:PID={vid:04X}:{pid:04X} SER={serial_number or ''}"
+
+
+def sim_bus(boards: dict, **firmware_kwargs):
+    """Factory for a host with several virtual boards: ``{port: protocol}``.
+
+    ``factory.comports()`` lists them like ``serial.tools.list_ports.comports``.
+    Opening a port that is not in ``boards`` raises OSError.
+    """
+    made: dict = {}
+
+    def board(port):
+        if port not in boards:
+            raise OSError(f"could not open port {port}: no such device")
+        fw = made.get(port)
+        if fw is None:
+            fw = made[port] = FIRMWARES[boards[port]](**firmware_kwargs)
+        return fw
+
+    def factory(port=None, baudrate=115200, timeout=None, **kwargs):
+        return SimSerial(port=port, baudrate=baudrate, timeout=timeout, board=board, **kwargs)
+
+    def comports():
+        return [SimPortInfo(port, serial_number=f"SIM{i:04d}") for i, port in enumerate(boards)]
+
+    factory.comports = comports
+    return factory
@@ -0,0 +1,140 @@
+# core/sync.py
+"""Master-clock sequence playback across several rigs.
+
+Every rig's firmware keeps its own ``millis()`` clock.  :class:`ClockEstimator`
+maps the host's ``time.monotonic()`` onto one such clock from ``P`` ->
+``PONG <millis>`` exchanges: only low round-trip samples are trusted (their
+midpoint error is at most RTT/2), and once they span a few seconds a line
+is fitted so resonator drift is tracked too.
+
+:class:`SyncPlayer` schedules a whole sequence against one host clock and
+hands each step to :meth:`RigManager.send_timed` ``lead_s`` ahead of time;
+the firmware holds it in its timed queue and runs it when its own clock
+reaches the converted due time.  Seat-to-seat skew is therefore bounded by
+the clock estimate, not by each link's serial latency.
+"""
+
+from __future__ import annotations
+
+import pathlib
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+from PySide6.QtCore import QObject, Signal
+
+from core.sequence import iter_rows, row_pairs
+from core.setpoint import DEFAULT_CHANNELS
+
+PING_PAYLOAD = b"P\n"
+RESYNC_INTERVAL_S = 2.0
+
+
+class ClockEstimator:
+    """Host monotonic seconds -> device millis, from ping samples."""
+
+    def __init__(self, window: int = 32, min_span_s: float = 5.0):
+        self._samples: Deque[Tuple[float, float, float]] = deque(maxlen=window)  # (host_mid_s, device_ms, rtt_s)
+        self._min_span_s = min_span_s
+        self._offset_ms = 0.0  # device_ms - host_ms at _ref_s
+        self._ref_s = 0.0
+        self._rate = 1.0
+        self.ready = False
+
+    def add_sample(self, sent_s: float, device_ms: float, recv_s: float, asym_s: float = 0.0) -> None:
+        """``asym_s``: (reply wire time - request wire time) / 2, if known."""
+        rtt = recv_s - sent_s
+        if rtt < 0:
+            return
+        self._samples.append(((sent_s + recv_s) / 2.0 - asym_s, float(device_ms), rtt))
+        self._refit()
+
+    @property
+    def samples(self) -> int:
+        return len(self._samples)
+
+    @property
+    def best_rtt_s(self) -> Optional[float]:
+        return min((s[2] for s in self._samples), default=None)
+
+    def _refit(self) -> None:
+        best = min(s[2] for s in self._samples)
+        good = [s for s in self._samples if s[2] <= best * 1.5 + 0.002]
+        ref = good[-1][0]
+        if len(good) >= 3 and good[-1][0] - good[0][0] >= self._min_span_s:
+            n = len(good)
+            mx = sum(s[0] for s in good) / n
+            my = sum(s[1] for s in good) / n
+            sxx = sum((s[0] - mx) ** 2 for s in good)
+            sxy = sum((s[0] - mx) * (s[1] - my) for s in good)
+            rate = (sxy / sxx) / 1000.0 if sxx > 0 else 1.0
+            # a real resonator is within a percent; anything else is noise
+            self._rate = min(1.01, max(0.99, rate))
+            self._ref_s = mx
+            self._offset_ms = my - mx * 1000.0
+        else:
+            offsets = sorted(s[1] - s[0] * 1000.0 for s in good)
+            self._rate = 1.0
+            self._ref_s = ref
+            self._offset_ms = offsets[len(offsets) // 2]
+        self.ready = True
+
+    def to_device_ms(self, host_s: float) -> int:
+        ref_ms = self._ref_s * 1000.0
+        return int(round(ref_ms + self._offset_ms + (host_s - self._ref_s) * 1000.0 * self._rate))
+
+
+class SyncPlayer(QObject):
+    """Plays one CSV on the host clock, sending timed steps to every rig."""
+
+    started = Signal()
+    finished = Signal()
+    stepEmitted = Signal(object)  # Setpoint, emitted as the step is handed to the rigs
+    aborted = Signal()
+    error = Signal(str)
+
+    def __init__(self, rigs, csv_path: str, dt=0.5, channels: int = DEFAULT_CHANNELS,
+                 lead_s: float = 0.25, sync_timeout_s: float = 3.0, rows=None):
+        super().__init__()
+        self._rigs = rigs
+        self._path = pathlib.Path(csv_path)
+        self._dt = dt
+        self._channels = channels
+        self._rows = rows  # (setpoints, dts) or (setpoint, dt) pairs, else read the CSV
+        self._lead = lead_s
+        self._sync_timeout = sync_timeout_s
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def _sleep_until(self, t: float) -> bool:
+        """Sleep on the stop event until monotonic time ``t``; returns True if aborted."""
+        return self._stop.wait(max(0.0, t - time.monotonic()))
+
+    def run(self):
+        self.started.emit()
+        try:
+            if not self._rigs.sync_clocks(timeout_s=self._sync_timeout):
+                self.error.emit("Clock sync incomplete; unsynced rigs will run steps on arrival")
+            t0 = time.monotonic() + self._lead
+            elapsed = 0.0
+            next_resync = time.monotonic() + RESYNC_INTERVAL_S
+            if self._rows is not None:
+                rows = row_pairs(self._rows)
+            else:
+                rows = iter_rows(self._path, self._dt, self._channels)
+            for setpoint, dt in rows:
+                due = t0 + elapsed
+                if self._sleep_until(due - self._lead):
+                    self.aborted.emit()
+                    break
+                self._rigs.send_timed(setpoint, due, dt)
+                if time.monotonic() >= next_resync:
+                    self._rigs.ping_all()
+                    next_resync = time.monotonic() + RESYNC_INTERVAL_S
+                elapsed += dt
+                self.stepEmitted.emit(setpoint)
+        finally:
+            self.finished.emit()
@@ -0,0 +1,310 @@
+# core/telemetry.py
+"""Chunked import of large telemetry logs into sequences.
+
+Exports from sims and data loggers run to gigabytes and dozens of
+columns, of which a ride needs a handful.  :func:`import_log` reads such a
+log a chunk at a time -- with pandas (``read_csv(usecols=..., chunksize=...)``)
+when it is installed, else with the ``csv`` module row by row -- keeps
+only the columns a :class:`ColumnMap` names, resamples them onto a
+uniform ``step`` grid with :class:`Resampler` and writes sequence rows
+(channels + dt, core/sequence.py's format) as they come.  Nothing holds
+more than one chunk, so memory stays flat however big the log is.
+
+With ``cue`` the mapped columns are vehicle telemetry (``ax, ay, az, p,
+q, r``) and each resampled row goes through a streaming
+:class:`~core.cueing.WashoutFilter`, so the output is a pitch/roll/yaw
+ride.
+
+A column map is JSON::
+
+    {"time": "Time_ms", "time_scale": 0.001,
+     "columns": {"ax": "LongAccel", "ay": {"source": "LatAccel", "scale": 9.80665},
+                 "q": {"source": "PitchRate_dps", "scale": 0.0174533}}}
+
+Each output channel is ``value * scale + offset`` of its source column.
+Without a ``time`` column rows are taken to be ``rate_hz`` apart.  Rows
+with a missing or non-numeric value are skipped; so are rows whose time
+does not move forward.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from core.cueing import CueingParams, Telemetry, WashoutFilter
+
+try:  # optional dependency (comes with pandas)
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - pure-Python fallback below
+    np = None  # type: ignore
+
+try:  # optional dependency (requirements.txt)
+    import pandas as pd  # type: ignore
+except Exception:  # pragma: no cover - csv-module fallback below
+    pd = None  # type: ignore
+
+CHUNK_ROWS = 65536
+
+
+@dataclass(frozen=True)
+class Column:
+    name: str  # output channel
+    source: str  # column header in the log
+    scale: float = 1.0
+    offset: float = 0.0
+
+
+@dataclass(frozen=True)
+class ColumnMap:
+    """Which log columns become which output channels, and how time is read."""
+
+    columns: Tuple[Column, ...]
+    time: Optional[str] = None  # timestamp column; None = rows rate_hz apart
+    time_scale: float = 1.0  # to seconds, e.g. 0.001 for milliseconds
+    rate_hz: Optional[float] = None
+    delimiter: str = ","
+
+    @property
+    def names(self) -> List[str]:
+        return [c.name for c in self.columns]
+
+    @property
+    def sources(self) -> List[str]:
+        """Log columns to read, each once."""
+        wanted = [c.source for c in self.columns] + ([self.time] if self.time else [])
+        return list(dict.fromkeys(wanted))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ColumnMap":
+        columns = []
+        for name, spec in data.get("columns", {}).items():
+            if isinstance(spec, str):
+                spec = {"source": spec}
+            columns.append(Column(name, spec["source"], float(spec.get("scale", 1.0)),
+                                  float(spec.get("offset", 0.0))))
+        if not columns:
+            raise ValueError("column map names no columns")
+        rate = data.get("rate_hz")
+        return cls(tuple(columns), data.get("time"), float(data.get("time_scale", 1.0)),
+                   float(rate) if rate is not None else None, data.get("delimiter", ","))
+
+    @classmethod
+    def load(cls, path) -> "ColumnMap":
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    @classmethod
+    def identity(cls, names, time: Optional[str] = None, rate_hz: Optional[float] = None) -> "ColumnMap":
+        """Columns read under their own names."""
+        return cls(tuple(Column(n, n) for n in names), time, rate_hz=rate_hz)
+
+
+def iter_chunks(path, mapping: ColumnMap, chunk_rows: int = CHUNK_ROWS,
+                stats: Optional[dict] = None) -> Iterator[Tuple[Optional[list], list]]:
+    """Yield ``(times, rows)`` per chunk of the log, mapped and scaled.
+
+    ``times`` is None without a time column.  With pandas both are numpy
+    arrays (``rows`` is rows x channels), else lists.  ``stats`` counts
+    ``read`` and ``skipped`` rows.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("read", 0)
+    stats.setdefault("skipped", 0)
+    if pd is not None:
+        yield from _chunks_pandas(path, mapping, chunk_rows, stats)
+    else:
+        yield from _chunks_csv(path, mapping, chunk_rows, stats)
+
+
+def _chunks_pandas(path, mapping: ColumnMap, chunk_rows: int, stats: dict):
+    wanted = set(mapping.sources)
+    reader = pd.read_csv(path, usecols=lambda name: name.strip() in wanted, chunksize=chunk_rows,
+                         sep=mapping.delimiter, encoding_errors="replace")
+    for frame in reader:
+        frame.columns = frame.columns.str.strip()
+        missing = wanted.difference(frame.columns)
+        if missing:
+            raise ValueError(f"not in the log's header: {', '.join(sorted(missing))}")
+        n = len(frame)
+        frame = frame.apply(pd.to_numeric, errors="coerce").dropna()
+        stats["read"] += n
+        stats["skipped"] += n - len(frame)
+        if frame.empty:
+            continue
+        rows = np.column_stack([frame[c.source].to_numpy(dtype=float) * c.scale + c.offset
+                                for c in mapping.columns])
+        times = frame[mapping.time].to_numpy(dtype=float) * mapping.time_scale if mapping.time else None
+        yield times, rows
+
+
+def _chunks_csv(path, mapping: ColumnMap, chunk_rows: int, stats: dict):
+    with Path(path).open("r", newline="", encoding="utf-8", errors="replace") as f:
+        reader = csv.reader(f, delimiter=mapping.delimiter)
+        header = [h.strip() for h in next(reader, [])]
+        index = {name: i for i, name in enumerate(header)}
+        missing = [s for s in mapping.sources if s not in index]
+        if missing:
+            raise ValueError(f"not in the log's header: {', '.join(missing)}")
+        cols = [(index[c.source], c.scale, c.offset) for c in mapping.columns]
+        t_col = index[mapping.time] if mapping.time else None
+        t_scale = mapping.time_scale
+        times: Optional[list] = [] if t_col is not None else None
+        rows: list = []
+        for raw in reader:
+            stats["read"] += 1
+            try:
+                values = [float(raw[i]) * scale + offset for i, scale, offset in cols]
+                t = float(raw[t_col]) * t_scale if t_col is not None else 0.0
+            except (ValueError, IndexError):
+                stats["skipped"] += 1
+                continue
+            if t != t or any(v != v for v in values):  # NaN
+                stats["skipped"] += 1
+                continue
+            rows.append(values)
+            if times is not None:
+                times.append(t)
+            if len(rows) >= chunk_rows:
+                yield times, rows
+                times = [] if t_col is not None else None
+                rows = []
+        if rows:
+            yield times, rows
+
+
+class Resampler:
+    """Linear resampling of timestamped rows onto a ``step`` grid, chunk by chunk.
+
+    The grid starts at the first sample; only the last sample is carried
+    between chunks.  Samples whose time does not move forward are dropped
+    (counted in :attr:`dropped`).
+    """
+
+    def __init__(self, step: float):
+        if step <= 0:
+            raise ValueError("step must be positive")
+        self.step = step
+        self._t0: Optional[float] = None
+        self._k = 0  # next grid index
+        self._prev_t = -math.inf
+        self._prev: Optional[list] = None
+        self.dropped = 0
+
+    def push(self, times, rows) -> list:
+        """Grid rows (lists) reached by this chunk."""
+        if not len(rows):
+            return []
+        if np is not None and isinstance(rows, np.ndarray):
+            return self._push_numpy(np.asarray(times, dtype=float), rows)
+        out = []
+        step = self.step
+        for t, values in zip(times, rows):
+            if t <= self._prev_t:
+                self.dropped += 1
+                continue
+            if self._t0 is None:
+                self._t0 = t
+            prev_t, prev = self._prev_t, self._prev
+            g = self._t0 + self._k * step
+            while g <= t:
+                if prev is None or g == t:
+                    out.append(list(values))
+                else:
+                    f = (g - prev_t) / (t - prev_t)
+                    out.append([a + (b - a) * f for a, b in zip(prev, values)])
+                self._k += 1
+                g = self._t0 + self._k * step
+            self._prev_t, self._prev = t, values
+        return out
+
+    def _push_numpy(self, times, rows) -> list:
+        keep = times > np.maximum.accumulate(np.concatenate(([self._prev_t], times[:-1])))
+        self.dropped += int(len(times) - keep.sum())
+        times, rows = times[keep], rows[keep]
+        if not len(times):
+            return []
+        if self._t0 is None:
+            self._t0 = float(times[0])
+        if self._prev is not None:
+            times = np.concatenate(([self._prev_t], times))
+            rows = np.vstack((self._prev, rows))
+        k_end = int(math.floor((times[-1] - self._t0) / self.step)) + 1
+        grid = self._t0 + np.arange(self._k, k_end) * self.step
+        grid = grid[grid <= times[-1]]
+        out = np.column_stack([np.interp(grid, times, rows[:, c]) for c in range(rows.shape[1])])
+        self._k += len(grid)
+        self._prev_t, self._prev = float(times[-1]), rows[-1].copy()
+        return out.tolist()
+
+
+def _fmt(v: float) -> str:
+    return f"{v:.10g}"
+
+
+def import_log(path, out_path, mapping: ColumnMap, step: float, cue: Optional[CueingParams] = None,
+               chunk_rows: int = CHUNK_ROWS, rate_hz: Optional[float] = None) -> dict:
+    """Read ``path`` a chunk at a time and write it resampled to ``out_path``; returns a report.
+
+    The output is written next to ``out_path`` and moved into place at
+    the end, so a half-written file never appears under its name.
+    """
+    rate_hz = mapping.rate_hz or rate_hz
+    if mapping.time is None and not rate_hz:
+        raise ValueError("column map has no time column and no rate_hz")
+    filt = None
+    names = mapping.names
+    if cue is not None:
+        order = [names.index(f) if f in names else None for f in Telemetry._fields]
+        if all(i is None for i in order):
+            raise ValueError(f"cueing needs telemetry columns ({', '.join(Telemetry._fields)})")
+        filt = WashoutFilter(1.0 / step, cue)
+        names = ["pitch", "roll", "yaw"]
+
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+    stats: dict = {}
+    resampler = Resampler(step)
+    written = chunks = seen = 0
+    lo = [math.inf] * len(names)
+    hi = [-math.inf] * len(names)
+    dt = _fmt(step)
+    try:
+        with tmp.open("w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(names + ["dt"])
+            for times, rows in iter_chunks(path, mapping, chunk_rows, stats):
+                chunks += 1
+                if times is None:
+                    times = [(seen + i) / rate_hz for i in range(len(rows))]
+                seen += len(rows)
+                for values in resampler.push(times, rows):
+                    if filt is not None:
+                        values = filt.step([values[i] if i is not None else 0.0 for i in order])
+                    for c, v in enumerate(values):
+                        if v < lo[c]:
+                            lo[c] = v
+                        if v > hi[c]:
+                            hi[c] = v
+                    writer.writerow([_fmt(v) for v in values] + [dt])
+                    written += 1
+        os.replace(tmp, out_path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return {
+        "reader": "pandas" if pd is not None else "csv",
+        "chunks": chunks,
+        "rows_read": stats.get("read", 0),
+        "skipped_rows": stats.get("skipped", 0),
+        "out_of_order_rows": resampler.dropped,
+        "rows": written,
+        "duration_s": round(written * step, 6),
+        "extents": [[a, b] for a, b in zip(lo, hi)] if written else [],
+        "channels": names,
+    }
@@ -0,0 +1,214 @@
+# core/timescale.py
+"""Playback at a speed factor, by resampling the trajectory.
+
+Shortening every sleep by the speed factor plays a sequence faster, but
+at 4x a 10 ms ride floods the link with 2.5 ms steps and at 0.25x a 1 s
+ride lurches once every four seconds.  :class:`ScaledPlayback` instead
+walks the sequence's own time axis ("ride time") at ``speed`` ride seconds
+per wall second and samples it on a fixed wall ``tick_s``, interpolating
+linearly between rows -- the player sees ``(setpoint, dt)`` pairs exactly
+like rows read from the CSV, with ``dt`` in wall time.
+
+The speed is read on every step, so it can change while a sequence plays.
+At 1x the original rows come out untouched; a ride switched back to 1x
+finishes the segment it is in and then continues row by row.
+
+Faster than 1x, a step is stretched in wall time when it would move a
+channel faster than ``max_vel`` (setpoint units per second: the GUI's
+``MotionLimits.max_vel`` in deg/s by default; ``MAX_SPEED_IPS`` for rides
+of raw actuator inches).  The cap never drops below the speed the
+same stretch has at 1x, so a ride is never slowed below its own speed --
+a speed-up only adds velocity up to the limit.
+
+:func:`crossfade` joins two rides without a snap: over a short window the
+output slides from where the outgoing ride would have gone to the
+incoming one, one step at a time as the player asks for it, and never
+faster than ``max_vel``.
+"""
+
+from __future__ import annotations
+
+from array import array
+from itertools import chain
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from core.limits import MotionLimits
+from core.setpoint import Setpoint
+
+TICK_S = 0.05
+FADE_S = 1.0
+MIN_SPEED = 0.1
+MAX_SPEED = 8.0
+
+
+def clamp_speed(speed: float) -> float:
+    return min(MAX_SPEED, max(MIN_SPEED, float(speed)))
+
+
+def _smoothstep(x: float) -> float:
+    x = min(1.0, max(0.0, x))
+    return x * x * (3.0 - 2.0 * x)
+
+
+def crossfade(tail: Optional[Callable[[float], Setpoint]], head: Iterable, fade_s: float = FADE_S,
+              max_vel: float = MotionLimits.max_vel) -> Iterator[Tuple[Setpoint, float]]:
+    """``head``'s ``(setpoint, dt)`` pairs, blended in from ``tail`` over ``fade_s``.
+
+    ``tail(t)`` is where the outgoing motion would be ``t`` wall seconds
+    after the handoff.  Each step mixes it with the incoming setpoint by a
+    smoothstep weight taken when the step is sent, so the first one is
+    still the outgoing position; steps keep their ``dt``.  The window
+    grows if the jump between the two would otherwise be covered faster
+    than ``max_vel`` (setpoint units per second, like
+    :class:`ScaledPlayback`'s; the blend peaks at 1.5x its mean speed),
+    and no blended step moves a channel faster than that: the rides' own
+    motion can add to the blend's, so a step that would is cut short and
+    the next ones catch up.  Only a ride that is itself at or over
+    ``max_vel`` keeps its own speed (and catches up at twice it).  Without
+    a tail or window the pairs pass through unchanged.
+    """
+    head = iter(head)
+    first = next(head, None)
+    if first is None:
+        return
+    if tail is None or fade_s <= 0:
+        yield first
+        yield from head
+        return
+    gap = max((abs(a - b) for a, b in zip(tail(0.0), first[0])), default=0.0)
+    window = max(fade_s, 1.5 * gap / max_vel) if max_vel > 0 else fade_s
+    elapsed, last_dt = 0.0, 0.0
+    out = outgoing = incoming = None
+    pairs = chain([first], head)
+    for setpoint, dt in pairs:
+        alpha = _smoothstep(elapsed / window)
+        was_out, was_in = outgoing, incoming
+        outgoing, incoming = tail(elapsed), setpoint
+        if alpha >= 1.0:
+            mixed = list(setpoint)
+        else:
+            mixed = [a + (b - a) * alpha for a, b in zip(outgoing, setpoint)]
+        clipped = False
+        if out is not None and max_vel > 0:
+            own = max(_speed(was_out, outgoing, last_dt), _speed(was_in, incoming, last_dt))
+            cap = max_vel if own < max_vel else 2.0 * own
+            room = cap * last_dt
+            step = []
+            for p, m in zip(out, mixed):
+                if abs(m - p) > room:
+                    m = p + (room if m > p else -room)
+                    clipped = True
+                step.append(m)
+            mixed = step + mixed[len(step):]
+        out = mixed
+        yield Setpoint(out), dt
+        elapsed += dt
+        last_dt = dt
+        if alpha >= 1.0 and not clipped:
+            break
+    yield from pairs
+
+
+def _speed(a, b, dt: float) -> float:
+    """Fastest channel between two setpoints ``dt`` apart (0 without both or a dt)."""
+    if a is None or b is None or dt <= 0:
+        return 0.0
+    return max((abs(y - x) for x, y in zip(a, b)), default=0.0) / dt
+
+
+class ScaledPlayback:
+    """Iterable of ``(setpoint, wall dt)`` for a sequence played at a live speed.
+
+    ``speed`` is a callable read before every step (e.g. the engine's
+    current setting); ``None`` means 1x.  :attr:`position_s` is the ride
+    time of the last step handed out and :attr:`limited` counts the steps
+    that were stretched to stay under ``max_vel``.
+    """
+
+    def __init__(self, setpoints, dts, speed: Optional[Callable[[], float]] = None,
+                 tick_s: float = TICK_S, max_vel: float = MotionLimits.max_vel):
+        if tick_s <= 0:
+            raise ValueError("tick_s must be positive")
+        self._setpoints = setpoints
+        self._dts = dts
+        self._speed = speed or (lambda: 1.0)
+        self.tick_s = tick_s
+        self.max_vel = max_vel
+        self._times = array("d", [0.0])
+        for dt in dts[:-1]:
+            self._times.append(self._times[-1] + max(0.0, dt))
+        self.position_s = 0.0
+        self.limited = 0
+        self._cursor = 0
+
+    @property
+    def duration_s(self) -> float:
+        """Ride time from the first row to the last one."""
+        return self._times[-1]
+
+    def sample(self, t_s: float) -> Setpoint:
+        """Setpoint at ride time ``t_s``; the last row from the end on.
+
+        Meant for increasing ``t_s`` (e.g. a :func:`crossfade` tail): the
+        search picks up from the previous call.
+        """
+        t_s = min(max(0.0, t_s), self._times[-1])
+        if t_s < self._times[self._cursor]:
+            self._cursor = 0
+        setpoint, self._cursor = self._at(t_s, self._cursor)
+        return setpoint
+
+    def _at(self, tau: float, k: int) -> Tuple[Setpoint, int]:
+        """Setpoint at ride time ``tau``, with ``k`` the segment to search from."""
+        times = self._times
+        n = len(times)
+        while k + 1 < n and times[k + 1] <= tau:
+            k += 1
+        if k + 1 >= n:
+            return Setpoint(self._setpoints[-1]), n - 1
+        a, b = self._setpoints[k], self._setpoints[k + 1]
+        f = (tau - times[k]) / (times[k + 1] - times[k])
+        return Setpoint([x + (y - x) * f for x, y in zip(a, b)]), k
+
+    def __iter__(self) -> Iterator[Tuple[Setpoint, float]]:
+        setpoints, dts, times = self._setpoints, self._dts, self._times
+        n = len(setpoints)
+        t_end = times[-1]
+        k, tau = 0, 0.0
+        while k < n:
+            speed = clamp_speed(self._speed())
+            self.position_s = tau
+            if speed == 1.0 and tau == times[k]:
+                # on a row at 1x: the row itself, zero-length rows included
+                yield setpoints[k], dts[k]
+                k += 1
+                if k < n:
+                    tau = times[k]
+                continue
+            setpoint, k = self._at(tau, k)
+            if k == n - 1:
+                yield setpoint, dts[-1] / speed
+                return
+            if speed == 1.0:
+                nxt = times[k + 1]  # back onto the rows
+                wall = nxt - tau
+            else:
+                nxt = tau + speed * self.tick_s
+                wall = self.tick_s
+                if nxt >= t_end:
+                    nxt = t_end
+                    wall = (t_end - tau) / speed
+                if speed > 1.0 and wall > 0.0:
+                    wall = self._limit(setpoint, tau, nxt, wall, k)
+            yield setpoint, wall
+            tau = nxt
+
+    def _limit(self, setpoint: Setpoint, tau: float, nxt: float, wall: float, k: int) -> float:
+        """Wall time for the step ``tau -> nxt`` that keeps it under the velocity cap."""
+        target, _ = self._at(nxt, k)
+        travel = max((abs(b - a) for a, b in zip(setpoint, target)), default=0.0)
+        cap = max(self.max_vel, travel / (nxt - tau))
+        if travel > cap * wall:
+            self.limited += 1
+            return travel / cap
+        return wall
@@ -0,0 +1,282 @@
+# seqtool.py
+"""Batch tooling for sequence CSVs: validate, normalize, resample, convert, cue, import.
+
+Runs over files and whole directories on a process pool (one worker per
+core by default), prints progress as files finish and writes a JSON report
+per file.  Rows are read with the same rules the player uses
+(core/sequence.py): header and malformed rows are dropped, a missing or
+bad dt falls back to ``--dt``.
+
+  validate   report rows, duration, extents, motion-limit violations and
+             actuator saturation/speed (core/util.py kinematics); exits 1
+             if any file fails the limits
+  normalize  write each file back without dropped rows and with every dt
+             filled in
+  resample   write each file on a uniform ``--step`` grid (linear)
+  convert    write actuator targets (act1, act2, dt) from pitch/roll via
+             core/util.py's kinematics
+  cue        read vehicle telemetry (ax, ay, az in m/s^2, p, q, r in
+             rad/s, optional dt) and write the pitch/roll/yaw sequence the
+             washout filter makes of it (core/cueing.py)
+  import     stream a large telemetry/logger export through a ``--map``
+             column map onto the ``--step`` grid, a chunk at a time
+             (core/telemetry.py); with ``--cue`` through the washout
+             filter as well.  Reports what was read, not the limit checks
+             (the library runs those when it indexes the result)
+
+Every command reports the same checks on its input (cue: on its output);
+the others exit 1
+only if a file could not be read or written.
+
+Examples (from src/):
+    python seqtool.py validate sequences/
+    python seqtool.py normalize sequences/ -o /tmp/clean --jobs 8
+    python seqtool.py resample sequences/ride.csv -o /tmp/grid --step 0.02
+    python seqtool.py cue logs/lap.csv -o sequences/ --rate-hz 100
+    python seqtool.py import exports/ -o sequences/ --map lapmap.json --cue
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+THIS_FILE = Path(__file__).resolve()
+APP_ROOT = THIS_FILE.parent
+if str(APP_ROOT) not in sys.path:
+    sys.path.insert(0, str(APP_ROOT))
+
+from core.cueing import TELEMETRY_CHANNELS, CueingParams, cue_log  # noqa: E402
+from core.limits import MAX_SPEED_IPS, MotionLimits, check_sequence  # noqa: E402
+from core.sequence import load_sequence, resample  # noqa: E402
+from core.setpoint import DEFAULT_CHANNELS  # noqa: E402
+from core.telemetry import CHUNK_ROWS, ColumnMap, import_log  # noqa: E402
+from core.util import kinematics_angles_to_actuators  # noqa: E402
+
+COMMANDS = ("validate", "normalize", "resample", "convert", "cue", "import")
+MAX_ACT_MM = 9.0  # kinematics_angles_to_actuators() default clamp
+MAX_ACT_SPEED_MM_S = MAX_SPEED_IPS * 25.4
+MAX_REPORTED = 5
+
+
+def parse_args(argv: list[str] | None = None):
+    p = argparse.ArgumentParser(description="Validate and transform sequence CSVs in bulk")
+    p.add_argument("command", choices=COMMANDS)
+    p.add_argument("paths", nargs="+", help="CSV files and/or directories of CSVs")
+    p.add_argument("-o", "--out", type=str, default="",
+                   help="Output directory (every command but validate)")
+    p.add_argument("--report-dir", type=str, default="",
+                   help="Where per-file JSON reports go (default: <out>/reports, or ./seqtool-reports)")
+    p.add_argument("--dt", type=float, default=0.5, help="dt for rows without one (the GUI's default)")
+    p.add_argument("--channels", type=int, default=DEFAULT_CHANNELS)
+    p.add_argument("--step", type=float, default=0.02, help="resample/import: grid step in seconds")
+    p.add_argument("--rate-hz", type=float, default=100.0,
+                   help="cue: telemetry sample rate for rows without a dt; "
+                        "import: row rate of logs without a time column")
+    p.add_argument("--map", type=str, default="", help="import: JSON column map (see core/telemetry.py)")
+    p.add_argument("--cue", action="store_true", help="import: run the columns through the washout filter")
+    p.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="import: rows read at a time")
+    p.add_argument("--recursive", action="store_true", help="Descend into subdirectories")
+    p.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--pos-min", type=float, default=MotionLimits.pos_min)
+    p.add_argument("--pos-max", type=float, default=MotionLimits.pos_max)
+    p.add_argument("--max-vel", type=float, default=MotionLimits.max_vel)
+    p.add_argument("--max-acc", type=float, default=MotionLimits.max_acc)
+    p.add_argument("-q", "--quiet", action="store_true", help="Only print failures and the summary")
+    args = p.parse_args(argv)
+    if args.command != "validate" and not args.out:
+        p.error(f"{args.command} needs -o/--out")
+    if args.command == "import" and not args.map:
+        p.error("import needs --map")
+    return args
+
+
+def collect(paths, recursive: bool = False) -> list:
+    files = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            files.extend(sorted(path.rglob("*.csv") if recursive else path.glob("*.csv")))
+        else:
+            files.append(path)
+    return files
+
+
+def actuator_stats(setpoints, dts) -> dict:
+    """Saturated rows and peak speed of the two actuators (pitch/roll -> mm)."""
+    saturated = overspeed = 0
+    peak = 0.0
+    prev = None
+    for i, sp in enumerate(setpoints):
+        pitch, roll = (list(sp[:2]) + [0.0, 0.0])[:2]
+        act = kinematics_angles_to_actuators(pitch, roll)
+        if any(abs(a) >= MAX_ACT_MM for a in act):
+            saturated += 1
+        if prev is not None:
+            dt = max(dts[i - 1], 1e-3)
+            speed = max(abs(a - b) for a, b in zip(act, prev)) / dt
+            peak = max(peak, speed)
+            if speed > MAX_ACT_SPEED_MM_S:
+                overspeed += 1
+        prev = act
+    return {"saturated": saturated, "overspeed": overspeed, "peak_speed_mm_s": round(peak, 3)}
+
+
+def _fmt(v: float) -> str:
+    return f"{v:.10g}"
+
+
+def write_rows(path: Path, rows, header=None) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(header)
+        for values, dt in rows:
+            writer.writerow([_fmt(v) for v in values] + [_fmt(dt)])
+    os.replace(tmp, path)
+
+
+def process_file(task: dict) -> dict:
+    """One file, in a worker process; never raises (errors go in the report)."""
+    t0 = time.perf_counter()
+    src = Path(task["path"])
+    report = {"file": str(src), "command": task["command"], "ok": False}
+    try:
+        if task["command"] == "import":
+            out = (Path(task["out"]) / task["rel"]).with_suffix(".csv")
+            report.update(import_log(src, out, task["map"], task["step"],
+                                     cue=CueingParams() if task["cue"] else None,
+                                     chunk_rows=task["chunk_rows"], rate_hz=task["rate_hz"]))
+            report["output"] = str(out)
+            report["valid"] = report["ok"] = report["rows"] > 0
+            if not report["rows"]:
+                report["error"] = "no data rows"
+            report["seconds"] = round(time.perf_counter() - t0, 6)
+            return report
+        stats = {}
+        if task["command"] == "cue":
+            samples, sample_dts = load_sequence(src, 1.0 / task["rate_hz"], TELEMETRY_CHANNELS, stats)
+            # the filter runs at one rate: the log's mean sample spacing
+            rate_hz = len(sample_dts) / sum(sample_dts) if samples and sum(sample_dts) > 0 else task["rate_hz"]
+            setpoints, dts = cue_log(samples, rate_hz)
+            report["rate_hz"] = round(rate_hz, 6)
+        else:
+            setpoints, dts = load_sequence(src, task["dt"], task["channels"], stats)
+        limits = MotionLimits(**task["limits"])
+        violations = check_sequence(setpoints, dts, limits)
+        report.update({
+            "rows": len(setpoints),
+            "skipped_rows": stats.get("skipped", 0),
+            "default_dt_rows": stats.get("default_dt", 0),
+            "duration_s": round(float(sum(dts)), 6),
+            "extents": [[min(col), max(col)] for col in zip(*setpoints)] if setpoints else [],
+            "violations": len(violations),
+            "first_violations": [str(v) for v in violations[:MAX_REPORTED]],
+            "actuators": actuator_stats(setpoints, dts),
+        })
+        report["valid"] = bool(setpoints) and not violations
+        if not setpoints:
+            report["error"] = "no data rows"
+
+        command = task["command"]
+        if command != "validate" and setpoints:
+            out = Path(task["out"]) / task["rel"]
+            if command == "normalize":
+                write_rows(out, zip(setpoints, dts))
+            elif command == "resample":
+                grid, grid_dts = resample(setpoints, dts, task["step"])
+                write_rows(out, zip(grid, grid_dts))
+                report["resampled_rows"] = len(grid)
+            elif command == "cue":
+                write_rows(out, zip(setpoints, dts), header=["pitch", "roll", "yaw", "dt"])
+            elif command == "convert":
+                acts = (kinematics_angles_to_actuators(*(list(sp[:2]) + [0.0, 0.0])[:2]) for sp in setpoints)
+                write_rows(out, zip(acts, dts), header=["act1_mm", "act2_mm", "dt"])
+            report["output"] = str(out)
+        report["ok"] = report["valid"] if command == "validate" else "error" not in report
+    except Exception as exc:
+        report["error"] = f"{type(exc).__name__}: {exc}"
+    report["seconds"] = round(time.perf_counter() - t0, 6)
+    return report
+
+
+def _report_path(report_dir: Path, rel: str) -> Path:
+    return report_dir / (rel.replace(os.sep, "__") + ".json")
+
+
+def _describe(r: dict) -> str:
+    if "error" in r:
+        return f"FAIL {r['error']}"
+    text = f"{r['rows']} rows, {r['duration_s']:.1f} s"
+    if "rows_read" in r:
+        text = f"{r['rows_read']} rows read in {r['chunks']} chunk(s) ({r['reader']}) -> " + text
+    if r["skipped_rows"]:
+        text += f", {r['skipped_rows']} dropped"
+    if r.get("out_of_order_rows"):
+        text += f", {r['out_of_order_rows']} out of time order"
+    if r.get("violations"):
+        text += f", {r['violations']} limit violation(s)"
+    act = r.get("actuators", {})
+    if act.get("saturated") or act.get("overspeed"):
+        text += f", actuators saturated {act['saturated']} / too fast {act['overspeed']}"
+    if not r["valid"]:
+        text += " (invalid)"
+    return ("ok   " if r["ok"] else "FAIL ") + text
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    files = collect(args.paths, args.recursive)
+    if not files:
+        print("no CSV files found", file=sys.stderr)
+        return 1
+    report_dir = Path(args.report_dir) if args.report_dir else (
+        Path(args.out) / "reports" if args.out else Path("seqtool-reports"))
+    report_dir.mkdir(parents=True, exist_ok=True)
+    limits = {"pos_min": args.pos_min, "pos_max": args.pos_max, "max_vel": args.max_vel, "max_acc": args.max_acc}
+    mapping = None
+    if args.command == "import":
+        try:
+            mapping = ColumnMap.load(args.map)
+        except (OSError, ValueError, KeyError) as exc:
+            print(f"bad column map {args.map}: {exc}", file=sys.stderr)
+            return 1
+
+    tasks = []
+    for path in files:
+        roots = [Path(p) for p in args.paths if Path(p).is_dir() and Path(p) in path.parents]
+        rel = str(path.relative_to(roots[0])) if roots else path.name
+        tasks.append({"path": str(path), "rel": rel, "command": args.command, "out": args.out,
+                      "dt": args.dt, "channels": args.channels, "step": args.step, "rate_hz": args.rate_hz,
+                      "limits": limits, "map": mapping, "cue": args.cue, "chunk_rows": args.chunk_rows})
+
+    t0 = time.perf_counter()
+    failed = 0
+    jobs = max(1, min(args.jobs, len(tasks)))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(process_file, task): task for task in tasks}
+        for done, future in enumerate(as_completed(futures), 1):
+            task = futures[future]
+            report = future.result()
+            _report_path(report_dir, task["rel"]).write_text(json.dumps(report, indent=2), encoding="utf-8")
+            if not report["ok"]:
+                failed += 1
+            if not args.quiet or not report["ok"]:
+                print(f"[{done:{len(str(len(tasks)))}d}/{len(tasks)}] {task['rel']}: {_describe(report)}",
+                      file=sys.stderr)
+    elapsed = time.perf_counter() - t0
+    print(f"{args.command}: {len(tasks)} file(s), {failed} failed, {elapsed:.2f} s on {jobs} process(es); "
+          f"reports in {report_dir}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,7 +4,7 @@ import csv
 import logging
 from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 from PySide6 import QtCore, QtWidgets
 from PySide6.QtCore import Qt, Slot, QThread
@@ -16,12 +16,27 @@ from PySide6.QtWidgets import (
 )
 
 from core.arduino import ArduinoWorker
+from core.connection import REPLAY_LATEST
 from core.controller import ControllerWorker
+from core.cueing import WashoutFilter
+from core.keyframes import STREAM_LEAD_S
+from core.latency import LATENCY, GUI_SLOT
+from core.library import SequenceLibrary
+from core.limits import MotionLimits, SetpointLimiter
+from core.netinput import NetInputWorker
+from core.shm import ShmInputWorker
+from core.playback import PlaybackEngine
+from core.ports import PortDiscovery, PortInfo
+from core.predict import SetpointPredictor
+from core.rigs import RigConfig, RigManager
 from core.sequence import SequenceWorker
+from core.setpoint import Setpoint
+from core.sync import SyncPlayer
+from core.timescale import FADE_S, MAX_SPEED, MIN_SPEED
 
 MODULE_DIR = Path(__file__).resolve().parent
 APP_ROOT = MODULE_DIR.parent
-REPO_ROOT = APP_ROOT.parent.parent
+SEQUENCE_DIR = APP_ROOT / "sequences"
 LOGGER = logging.getLogger(__name__)
 
 
@@ -33,7 +48,22 @@ def hline() -> QtWidgets.QFrame:
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, latency_dump: Optional[Path] = None,
+                 rig_configs: Optional[list[RigConfig]] = None,
+                 udp_port: Optional[int] = None,
+                 predict: bool = False,
+                 predict_horizon_s: Optional[float] = None,
+                 limits: Optional[MotionLimits] = None,
+                 replay_policy: str = REPLAY_LATEST,
+                 reset_on_connect: bool = True,
+                 keepalive_s: Optional[float] = None,
+                 delta: bool = False,
+                 stream_lead_s: Optional[float] = None,
+                 sequence_dir: Optional[Path] = None,
+                 crossfade_s: Optional[float] = None,
+                 strict_limits: bool = False,
+                 cueing_hz: Optional[float] = None,
+                 shm_name: Optional[str] = None):
         super().__init__()
         self.setWindowTitle("Motion Simulator Control")
         self.setMinimumSize(1024, 700)
@@ -43,20 +73,37 @@ class MainWindow(QMainWindow):
         self._sequence_buttons: list[QPushButton] = []
         self._teardown_done = False
         self._csv_path: Optional[Path] = None
-        self.seq_thread: Optional[QThread] = None
-        self.seq: Optional[SequenceWorker] = None
-        self._sequence_aborted = False
-
-        preset_mapping = {
-            "Sequence 1": "src/test.csv",
-            "Sequence 2": "Name1.csv",
-            "Sequence 3": "src/test.csv",
-            "Sequence 4": "src/test.csv",
-        }
+        self.playback: Optional[PlaybackEngine] = None
+        self.library: Optional[SequenceLibrary] = None
+        self._latency_dump = latency_dump
+        self._rig_configs = rig_configs or []
+        self._udp_port = udp_port
+        self._cueing_hz = cueing_hz  # UDP carries vehicle telemetry at this rate (core/cueing.py)
+        self._shm_name = shm_name  # local producers write a shared-memory ring (core/shm.py)
+        self._ctrl_trace = None
+        self._predict = predict
+        self._predict_horizon_s = predict_horizon_s
+        self._predictor: Optional[SetpointPredictor] = None
+        self._limits = limits
+        self._strict_limits = strict_limits  # refuse a sequence over the limits instead of clamping it live
+        self._replay_policy = replay_policy
+        self._ard_port: Optional[str] = None
+        self.ports = PortDiscovery(parent=self)
+        self.ports.scanned.connect(self._on_ports_scanned)
+        self._reset_on_connect = reset_on_connect
+        # serial stream encoding (core/delta.py); None = the workers' default keepalive
+        self._stream_kwargs = {"delta": delta}
+        if keepalive_s is not None:
+            self._stream_kwargs["keepalive_s"] = keepalive_s
+        # sequences stream ahead as keyframes (core/keyframes.py); 0 = one step at a time
+        self._stream_lead_s = STREAM_LEAD_S if stream_lead_s is None else stream_lead_s
+
+        # preset buttons take the library's sequences in name order once it is indexed
+        self._sequence_dir = sequence_dir if sequence_dir is not None else SEQUENCE_DIR
         self._preset_sequences: dict[str, Optional[Path]] = {}
-        for name, rel in preset_mapping.items():
-            path = (REPO_ROOT / rel).resolve()
-            self._preset_sequences[name] = path if path.exists() else None
+        self._awaiting_info: dict[str, Callable] = {}  # path -> what to do once the library indexed it
+        # a sequence taking over from another blends in (core/timescale.py); 0 = cut
+        self._crossfade_s = FADE_S if crossfade_s is None else crossfade_s
 
         central = QWidget(self)
         central.setObjectName("centralWidget")
@@ -126,8 +173,24 @@ class MainWindow(QMainWindow):
         self.cb_show_log.toggled.connect(self.dock_log.setVisible)
 
         cmd_bar.addWidget(self.cb_show_log)
+
+        self.dock_latency = QtWidgets.QDockWidget("Latency", self)
+        self.dock_latency.hide()
+        self.dock_latency.setObjectName("dockLatency")  # needed for saveState/restoreState
+        self.dock_latency.setFloating(True)
+        self.dock_latency.setFeatures(
+            QtWidgets.QDockWidget.DockWidgetClosable |
+            QtWidgets.QDockWidget.DockWidgetMovable |
+            QtWidgets.QDockWidget.DockWidgetFloatable
+        )
+        self.cb_show_latency = QCheckBox("Latency")
+        self.cb_show_latency.setChecked(False)
+        self.cb_show_latency.toggled.connect(self.dock_latency.setVisible)
+
+        cmd_bar.addWidget(self.cb_show_latency)
         self.cb_show_arduino.setProperty("pill", True)
         self.cb_show_log.setProperty("pill", True)
+        self.cb_show_latency.setProperty("pill", True)
 
         main_layout.addLayout(cmd_bar)
 
@@ -266,9 +329,17 @@ class MainWindow(QMainWindow):
         self.le_dt.setRange(0.01, 10.0)
         self.le_dt.setSingleStep(0.05)
         self.le_dt.setValue(0.50)
+        self.spn_speed = QDoubleSpinBox()
+        self.spn_speed.setPrefix("speed ")
+        self.spn_speed.setSuffix(" x")
+        self.spn_speed.setRange(MIN_SPEED, MAX_SPEED)
+        self.spn_speed.setSingleStep(0.25)
+        self.spn_speed.setValue(1.0)
+        self.spn_speed.setToolTip("Playback speed; resampled, and kept under the actuators' top speed")
         top_row.addWidget(self.btn_load_csv)
         top_row.addWidget(self.le_csv, 1)
         top_row.addWidget(self.le_dt)
+        top_row.addWidget(self.spn_speed)
         v_seq.addLayout(top_row)
         self.seq_list = QListWidget()
         self.seq_list.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
@@ -321,8 +392,10 @@ class MainWindow(QMainWindow):
         self.cb_port = QComboBox()
         self.cb_port.setEditable(True)
         self.btn_connect = QPushButton("Connect")
+        self.btn_port_scan = QPushButton("Scan")
         row.addWidget(QLabel("Port:"))
         row.addWidget(self.cb_port, 1)
+        row.addWidget(self.btn_port_scan)
         row.addWidget(self.btn_connect)
         self.lbl_ard_status = QLabel("Disconnected")
         self.lbl_ack = QLabel("ACK: —")
@@ -335,6 +408,26 @@ class MainWindow(QMainWindow):
         self.dock_ard.hide()
         self.addDockWidget(Qt.RightDockWidgetArea, self.dock_ard)
 
+        g_lat = QGroupBox("Latency (ms)")
+        v_lat = QVBoxLayout(g_lat)
+        v_lat.setSpacing(8)
+        self.txt_latency = QTextEdit()
+        self.txt_latency.setReadOnly(True)
+        self.txt_latency.setLineWrapMode(QTextEdit.NoWrap)
+        self.txt_latency.setStyleSheet("font-family: monospace;")
+        self.btn_latency_reset = QPushButton("Reset")
+        v_lat.addWidget(self.txt_latency)
+        v_lat.addWidget(self.btn_latency_reset)
+        self.dock_latency.setWidget(g_lat)
+        self.dock_latency.hide()
+        self.addDockWidget(Qt.RightDockWidgetArea, self.dock_latency)
+        self._latency_timer = QtCore.QTimer(self)
+        self._latency_timer.setInterval(500)
+        self._latency_timer.timeout.connect(self._refresh_latency)
+        self._predict_timer = QtCore.QTimer(self)
+        self._predict_timer.setSingleShot(True)
+        self._predict_timer.timeout.connect(self._settle_prediction)
+
 
         right_col.addStretch(1)
         right_widget.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Expanding)
@@ -348,6 +441,7 @@ class MainWindow(QMainWindow):
 
         # State + workers
         self._start_workers()
+        self.ports.scan_async(probe=False)  # list ports now; probing waits for Scan
         self.destroyed.connect(self.teardown)
 
         # Wire signals
@@ -367,24 +461,43 @@ class MainWindow(QMainWindow):
         self.btn_seq_abort.clicked.connect(self._seq_abort)
         self.btn_seq_append.clicked.connect(self._append_angles)
         self.btn_connect.clicked.connect(self._arduino_connect_clicked)
+        self.btn_port_scan.clicked.connect(self._scan_ports)
+        self.cb_show_latency.toggled.connect(self._on_latency_toggled)
+        self.btn_latency_reset.clicked.connect(self._reset_latency)
 
         self._set_sequence_running(False)
 
     # --- Worker setup ------------------------------------------------
     def _start_workers(self):
-        # Arduino worker
+        # Arduino worker (or one shared I/O loop for several rigs)
         self.ard_thread = QThread(self)
-        self.arduino = ArduinoWorker(preferred_port=None)
+        if self._rig_configs:
+            self.arduino = RigManager(self._rig_configs, replay_policy=self._replay_policy,
+                                      reset_on_connect=self._reset_on_connect, **self._stream_kwargs)
+            self._log(f"Driving {len(self._rig_configs)} rigs: {', '.join(c.label for c in self._rig_configs)}")
+        else:
+            self.arduino = ArduinoWorker(preferred_port=None, replay_policy=self._replay_policy,
+                                         reset_on_connect=self._reset_on_connect,
+                                         discovery=self.ports, **self._stream_kwargs,
+                                         stream_lead_s=self._stream_lead_s or STREAM_LEAD_S)
+        if self._limits is None:
+            # position envelope follows the manual controls unless configured
+            self._limits = MotionLimits(pos_min=float(self.pitch_spn.minimum()),
+                                        pos_max=float(self.pitch_spn.maximum()))
+        self.arduino.set_limiter(SetpointLimiter(self._limits))
         self.arduino.moveToThread(self.ard_thread)
         self.ard_thread.started.connect(self.arduino.start)
         self.destroyed.connect(self.arduino.stop)
-        self.arduino.connected.connect(lambda p: self._set_arduino_status(f"Connected: {p}"))
-        self.arduino.disconnected.connect(lambda _="": self._set_arduino_status("Disconnected"))
+        self.arduino.connected.connect(self._on_arduino_connected)
+        self.arduino.disconnected.connect(self._on_arduino_disconnected)
         self.arduino.ack.connect(self._set_ack)
         self.arduino.error.connect(self._set_error)
+        self.arduino.message.connect(lambda msg: self._log(f"[FW] {msg}"))
         self.ard_thread.start()
 
         # Controller worker
+        if self._predict:
+            self._predictor = self._new_predictor()
         self.ctrl_thread = QThread(self)
         self.controller = ControllerWorker()
         self.controller.moveToThread(self.ctrl_thread)
@@ -399,25 +512,99 @@ class MainWindow(QMainWindow):
         self.controller.homeRequested.connect(self._on_home_requested)
         self.ctrl_thread.start()
 
+        # Network setpoint stream: straight into the serial worker, gated by Enable
+        if self._udp_port is not None:
+            self.net_thread = QThread(self)
+            self.net_input = NetInputWorker(
+                self.arduino.send_latest, port=self._udp_port,
+                predictor=self._new_predictor() if self._predict else None,
+                cueing=WashoutFilter(self._cueing_hz) if self._cueing_hz else None,
+            )
+            self.net_input.set_enabled(self._enabled)
+            self.net_input.moveToThread(self.net_thread)
+            self.net_thread.started.connect(self.net_input.start)
+            self.net_input.listening.connect(lambda addr: self._log(f"[NET] Listening for setpoints on UDP {addr}"))
+            self.net_input.error.connect(lambda msg: self._log(f"[NET] {msg}"))
+            self.chk_enable.toggled.connect(self.net_input.set_enabled, Qt.DirectConnection)
+            self.net_thread.start()
+
+        # Shared-memory setpoint ring for producers on this host: same path as UDP
+        if self._shm_name:
+            self.shm_thread = QThread(self)
+            self.shm_input = ShmInputWorker(
+                self.arduino.send_latest, name=self._shm_name,
+                predictor=self._new_predictor() if self._predict else None,
+            )
+            self.shm_input.set_enabled(self._enabled)
+            self.shm_input.moveToThread(self.shm_thread)
+            self.shm_thread.started.connect(self.shm_input.start)
+            self.shm_input.listening.connect(lambda name: self._log(f"[SHM] Reading setpoints from {name}"))
+            self.shm_input.error.connect(lambda msg: self._log(f"[SHM] {msg}"))
+            self.chk_enable.toggled.connect(self.shm_input.set_enabled, Qt.DirectConnection)
+            self.shm_thread.start()
+
+        # Sequence library: indexed (and read ahead) in the background
+        self.library = SequenceLibrary(self._sequence_dir, dt=float(self.le_dt.value()), limits=self._limits)
+        self.library.scanned.connect(self._on_library_scanned)
+        self.library.indexed.connect(self._on_library_indexed)
+        self._rescan_timer = QtCore.QTimer(self)
+        self._rescan_timer.setSingleShot(True)
+        self._rescan_timer.setInterval(500)  # once the dt spin box settles
+        self._rescan_timer.timeout.connect(self._rescan_library)
+        self.le_dt.valueChanged.connect(lambda _: self._rescan_timer.start())
+        self.library.scan_async()
+
+        # Sequence playback: one engine for the session
+        self.playback = PlaybackEngine(self._make_player, library=self.library, fade_s=self._crossfade_s,
+                                       max_vel=self._limits.max_vel)
+        self.playback.started.connect(self._on_sequence_started)
+        self.playback.stepEmitted.connect(self._on_seq_step)
+        self.playback.aborted.connect(self._on_sequence_aborted)
+        self.playback.finished.connect(self._on_sequence_finished)
+        self.playback.idle.connect(lambda: self._set_sequence_running(False))
+        self.playback.error.connect(lambda msg: self._log(f"[SEQ] {msg}"))
+        self.playback.set_speed(self.spn_speed.value())
+        self.spn_speed.valueChanged.connect(self.playback.set_speed)
+        self.playback.start()
+
+    def _make_player(self, path: Path, rows, t0: float):
+        """Build the player for one sequence (called on the playback thread).
+
+        ``rows`` already carry each step's dt, so no widget is read here.
+        """
+        if len(self._rig_configs) > 1:
+            # several seats: schedule on one host clock so the rigs move together
+            return SyncPlayer(self.arduino, str(path), rows=rows)
+        info = self.library.indexed_info(path)
+        clean = info is not None and info.valid
+        if self._stream_lead_s > 0 and isinstance(self.arduino, ArduinoWorker) and clean:
+            # the worker feeds the board's keyframe queue itself; keyframes skip the
+            # live limiter, so only a sequence the library found within the limits goes this way
+            return SequenceWorker(str(path), stream=self.arduino, rows=rows, t0=t0)
+        worker = SequenceWorker(str(path), rows=rows)
+        worker.stepEmitted.connect(self.arduino.send_setpoint)
+        return worker
+
     # --- Slots -------------------------------------------------------
     @Slot()
     def _on_estop(self):
+        # out-of-band first: drains the serial queue and writes the stop byte
+        # from this thread, ahead of anything the worker is doing
+        self.arduino.estop()
         self.chk_enable.setChecked(False)
         self.lbl_status.setText("E-STOP engaged")
         self._log("E-STOP engaged")
 
         # --- stop any active sequence immediately ---
-        if self.seq is not None:
-            try:
-                self.seq.stop()
-                self._log("Sequence stopped due to E-STOP")
-            except Exception as exc:
-                self._log(f"Error stopping sequence on E-STOP: {exc}")
+        if self.playback is not None and self.playback.abort():
+            self._log("Sequence stopped due to E-STOP")
         self._set_sequence_running(False)
 
     @Slot(bool)
     def _on_enable_changed(self, enabled: bool):
         self._enabled = enabled
+        if enabled and self.arduino.estopped:
+            self.arduino.resume()
         with QtCore.QSignalBlocker(self.btn_enable_toggle):
             self.btn_enable_toggle.setChecked(enabled)
             self.btn_enable_toggle.setText("Disable" if enabled else "Enable")
@@ -468,12 +655,15 @@ class MainWindow(QMainWindow):
     def _send_all_angles(self):
         if not self._enabled:
             return
+        trace, self._ctrl_trace = self._ctrl_trace, None
         self.arduino.send_angles(
-            self.pitch_spn.value(), self.roll_spn.value(), self.yaw_spn.value()
+            self.pitch_spn.value(), self.roll_spn.value(), self.yaw_spn.value(), trace
         )
 
     @Slot(float, float, float)
     def _ctrl_angles_changed(self, pitch, roll, yaw):
+        LATENCY.stamp(GUI_SLOT)
+        self._ctrl_trace = LATENCY.take()
         self.pb_lx.setValue(int(max(-100, min(100, getattr(self.controller, "_lx", 0.0) * 100))))
         self.pb_ly.setValue(int(max(-100, min(100, getattr(self.controller, "_ly", 0.0) * 100))))
         self.pb_rx.setValue(int(max(-100, min(100, getattr(self.controller, "_rx", 0.0) * 100))))
@@ -481,8 +671,24 @@ class MainWindow(QMainWindow):
 
         if self._drive_manual:
             self._sync_manual_controls(int(pitch), int(roll), int(yaw))
-            if self._enabled:
+            if self._enabled and self._predictor is not None:
+                trace, self._ctrl_trace = self._ctrl_trace, None
+                self.arduino.send_setpoint(self._predictor.update(Setpoint.of(pitch, roll, yaw)), trace)
+                self._predict_timer.start(int(self._predictor.settle_s * 1000))
+            elif self._enabled:
                 self._send_all_angles()
+        self._ctrl_trace = None
+
+    def _new_predictor(self) -> SetpointPredictor:
+        # never extrapolate past what the manual controls allow
+        bounds = (float(self.pitch_spn.minimum()), float(self.pitch_spn.maximum()))
+        return SetpointPredictor(horizon_s=self._predict_horizon_s, bounds=bounds)
+
+    def _settle_prediction(self):
+        """Controller input went quiet: take back the extrapolated lead."""
+        setpoint = self._predictor.settle() if self._predictor is not None else None
+        if setpoint is not None and self._enabled:
+            self.arduino.send_setpoint(setpoint)
 
     def _set_ctrl_status(self, connected: bool):
         self.lbl_ctrl_status.setText(
@@ -536,13 +742,14 @@ class MainWindow(QMainWindow):
         except Exception as exc:
             self._log(f"CSV read error: {exc}")
 
-    @Slot(float, float, float)
-    def _on_seq_step(self, pitch: float, roll: float, yaw: float):
+    @Slot(object)
+    def _on_seq_step(self, setpoint):
         """
         Mirror the running sequence's current step into the Manual Control widgets.
         Using _sync_manual_controls prevents valueChanged signals from firing,
         so we won't accidentally call _send_all_angles again.
         """
+        pitch, roll, yaw = (list(setpoint[:3]) + [0.0, 0.0, 0.0])[:3]
         self._sync_manual_controls(int(pitch), int(roll), int(yaw))
 
     def _run_sequence_path(self, path: Path):
@@ -552,41 +759,98 @@ class MainWindow(QMainWindow):
         if not path.exists():
             self._log(f"Sequence file not found: {path}")
             return
-        if self.seq is not None or (self.seq_thread is not None and self.seq_thread.isRunning()):
-            self._seq_abort()
-            if self.seq_thread is not None:
-                try:
-                    self.seq_thread.wait(2000)
-                except Exception:
-                    pass
-            self.seq = None
-            self.seq_thread = None
-
-        self._log(f"Running sequence: {path.name}")
-        thread = QThread(self)
-        self._sequence_aborted = False
-        worker = SequenceWorker(str(path), dt=float(self.le_dt.value()))
-        worker.moveToThread(thread)
-        thread.started.connect(worker.run)
-        worker.stepEmitted.connect(self.arduino.send_angles)
-        worker.stepEmitted.connect(self._on_seq_step)
-        worker.finished.connect(thread.quit)
-        worker.aborted.connect(thread.quit)
-        worker.finished.connect(worker.deleteLater)
-        worker.aborted.connect(self._on_sequence_aborted)
-        worker.finished.connect(self._on_sequence_finished)
-        thread.finished.connect(thread.deleteLater)
-        thread.start()
-        self.seq_thread = thread
-        self.seq = worker
+        self._when_indexed(path, partial(self._start_checked_sequence, path))
+
+    def _start_checked_sequence(self, path: Path, info):
+        if not self._enabled or not self._check_sequence_limits(path, info):
+            return
+        # a running sequence is stopped by the engine and this one crossfaded in
+        self.playback.play(path, float(self.le_dt.value()))
         self._set_sequence_running(True)
 
+    def _queue_checked_sequence(self, path: Path, info):
+        if not self._enabled or not self._check_sequence_limits(path, info):
+            return
+        if not self.playback.busy:
+            self._start_checked_sequence(path, info)  # the one playing ended meanwhile
+            return
+        self.playback.queue_next(path, float(self.le_dt.value()))
+        self._log(f"Queued next: {path.name}")
+
+    def _when_indexed(self, path: Path, then: Callable):
+        """``then(info)`` with the library's info for ``path``.
+
+        The library checked the file when it indexed it; one that is new or
+        changed since is read on the library's thread, not the GUI's.
+        """
+        info = self.library.indexed_info(path, float(self.le_dt.value()))
+        if info is not None:
+            then(info)
+            return
+        self._log(f"Checking {path.name}...")
+        self._awaiting_info[str(path)] = then  # pressed again meanwhile: the latest press wins
+        self.library.info_async(path, float(self.le_dt.value()))
+
+    def _on_library_indexed(self, info):
+        then = self._awaiting_info.get(str(info.path))
+        if then is None:
+            return
+        # a scan may index the same file with another dt: wait for the one asked for
+        info = self.library.indexed_info(info.path, float(self.le_dt.value()))
+        if info is not None:
+            del self._awaiting_info[str(info.path)]
+            then(info)
+
+    def _check_sequence_limits(self, path: Path, info) -> bool:
+        """Report envelope violations up front rather than only seeing them clipped mid-ride.
+
+        The ride still plays (the live limiter clamps it) unless the window
+        was made with ``strict_limits``.
+        """
+        if info.error is not None:
+            self._log(f"CSV read error: {info.error}")
+            return False
+        if not info.violation_count:
+            return True
+        for v in info.violations:
+            self._log(f"  {path.name}: {v}")
+        if info.violation_count > len(info.violations):
+            self._log(f"  ... {info.violation_count - len(info.violations)} more")
+        if self._strict_limits:
+            self._log(f"{path.name}: {info.violation_count} motion limit violation(s); not started")
+            return False
+        self._log(f"{path.name}: {info.violation_count} motion limit violation(s); "
+                  f"playing step by step, clamped to the limits")
+        return True
+
+    def _on_library_scanned(self, infos: list):
+        for i, btn in enumerate(self._sequence_buttons):
+            name = f"Sequence {i + 1}"
+            info = infos[i] if i < len(infos) else None
+            self._preset_sequences[name] = info.path if info is not None else None
+            btn.setText(name if info is None else f"{name}: {info.path.stem}")
+            btn.setToolTip("" if info is None else info.summary())
+        for info in infos:
+            if not info.valid:
+                self._log(f"[LIB] {info.summary()}")
+        self._log(f"[LIB] {len(infos)} sequence(s) in {self._sequence_dir}")
+
+    def _rescan_library(self):
+        # rows without their own dt take the default: durations change
+        self.library.dt = float(self.le_dt.value())
+        self.library.scan_async()
+
     def _run_sequence_preset(self, name: str):
         self._log(f"{name} selected")
         path = self._preset_sequences.get(name)
         if path is None:
             self._log(f"No CSV configured for {name}.")
             return
+        if self.playback.busy:
+            # pressed while one plays: it follows without a gap
+            if self._enabled:
+                self._when_indexed(path, partial(self._queue_checked_sequence, path))
+            return
         self._run_sequence_path(path)
 
     def _seq_run(self):
@@ -599,22 +863,17 @@ class MainWindow(QMainWindow):
         self._log("Pause requested (implement in SequenceWorker if desired)")
 
     def _seq_abort(self):
-        if self.seq is None:
+        if not self.playback.abort():
             self._log("No active sequence to abort.")
             return
-        try:
-            self.seq.stop()
-            self._log("Abort requested")
-        except Exception:
-            pass
-        finally:
-            self._set_sequence_running(False)
+        self._log("Abort requested")
+        self._set_sequence_running(False)
 
     def _append_angles(self):
         if self._csv_path is None:
             self._log("Load a CSV file first.")
             return
-        if self.seq_thread is not None and self.seq_thread.isRunning():
+        if self.playback.busy:
             self._log("Stop the running sequence before appending.")
             return
 
@@ -632,7 +891,39 @@ class MainWindow(QMainWindow):
             self._log(f"CSV write error: {exc}")
 
     def _arduino_connect_clicked(self):
-        self._log(f"Connect clicked to port: {self.cb_port.currentText()}")
+        # items read "<device> — <firmware>"; a typed path is used as is
+        port = self.cb_port.currentText().split(" — ")[0].strip()
+        if isinstance(self.arduino, RigManager):
+            self._log("Rig ports come from --rigs/--rig-config; Connect is for a single board")
+            return
+        self._log(f"Connecting to {port or 'auto-detected port'}")
+        self.arduino.set_port(port)
+
+    def _scan_ports(self):
+        self.btn_port_scan.setEnabled(False)
+        # never probe the port the worker is talking to
+        self.ports.scan_async(exclude=[self._ard_port] if self._ard_port else [])
+
+    def _on_arduino_connected(self, port: str):
+        self._ard_port = port
+        self._set_arduino_status(f"Connected: {port}")
+
+    def _on_arduino_disconnected(self, _port: str = ""):
+        self._ard_port = None
+        self._set_arduino_status("Disconnected")
+
+    @Slot(list)
+    def _on_ports_scanned(self, infos: list[PortInfo]):
+        self.btn_port_scan.setEnabled(True)
+        current = self.cb_port.currentText().split(" — ")[0].strip()
+        with QtCore.QSignalBlocker(self.cb_port):
+            self.cb_port.clear()
+            for info in infos:
+                self.cb_port.addItem(info.label())
+                if info.device == current:
+                    self.cb_port.setCurrentIndex(self.cb_port.count() - 1)
+        found = ", ".join(info.label() for info in infos) or "none"
+        self._log(f"[PORTS] {found}")
 
     def _on_gamepad_toggled(self, checked: bool):
         self.controller.set_enabled(checked)
@@ -660,25 +951,32 @@ class MainWindow(QMainWindow):
         self.btn_seq_abort.setEnabled(running)
         self.btn_play_top.setEnabled(not running)
         self.btn_stop_top.setEnabled(running)
-        for btn in self._sequence_buttons:
-            btn.setEnabled(not running)
+        # presets stay live: pressed during a sequence they queue up after it
+
+    def _on_latency_toggled(self, visible: bool):
+        if visible:
+            self._refresh_latency()
+            self._latency_timer.start()
+        else:
+            self._latency_timer.stop()
+
+    def _refresh_latency(self):
+        self.txt_latency.setPlainText(LATENCY.format_table())
+
+    def _reset_latency(self):
+        LATENCY.reset()
+        self._refresh_latency()
 
     # --- Logging / teardown -----------------------------------------
-    def _on_sequence_aborted(self):
-        self._sequence_aborted = True
-        self._log("Sequence aborted")
-
-    def _on_sequence_finished(self):
-        if not self._sequence_aborted:
-            self._log("Sequence finished")
-        self.seq = None
-        if self.seq_thread is not None:
-            try:
-                self.seq_thread.wait(2000)
-            except Exception:
-                pass
-            self.seq_thread = None
-        self._set_sequence_running(False)
+    def _on_sequence_started(self, name: str):
+        self._log(f"Running sequence: {name}")
+        self._set_sequence_running(True)
+
+    def _on_sequence_aborted(self, name: str):
+        self._log(f"Sequence aborted: {name}")
+
+    def _on_sequence_finished(self, name: str):
+        self._log(f"Sequence finished: {name}")
 
     def _log(self, message: str):
         LOGGER.info(message)
@@ -690,17 +988,26 @@ class MainWindow(QMainWindow):
             return
         self._teardown_done = True
 
-        seq = getattr(self, "seq", None)
-        if seq is not None:
+        playback = getattr(self, "playback", None)
+        if playback is not None:
             try:
-                seq.stop()
+                playback.stop()
             except Exception:
                 pass
-        seq_thread = getattr(self, "seq_thread", None)
-        if seq_thread is not None:
+
+        if hasattr(self, "net_input"):
             try:
-                seq_thread.quit()
-                seq_thread.wait(3000)
+                self.net_input.stop()
+                self.net_thread.quit()
+                self.net_thread.wait(3000)
+            except Exception:
+                pass
+
+        if hasattr(self, "shm_input"):
+            try:
+                self.shm_input.stop()
+                self.shm_thread.quit()
+                self.shm_thread.wait(3000)
             except Exception:
                 pass
 
@@ -728,6 +1035,13 @@ class MainWindow(QMainWindow):
             except Exception:
                 pass
 
+        if self._latency_dump is not None:
+            try:
+                LATENCY.dump_json(self._latency_dump)
+                LOGGER.info("Latency histograms written to %s", self._latency_dump)
+            except Exception as exc:
+                LOGGER.warning("Latency dump failed: %s", exc)
+
     def closeEvent(self, event):
         self.teardown()
         super().closeEvent(event)